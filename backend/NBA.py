@@ -1,235 +1,120 @@
-import mysql.connector
+import aggregates
+from backends import from_env
+from db_operations import db_operations
+from queries import sql, update_sql
 
-db = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="CPSC408!",
-    database="NBA"
-)
-cursor = db.cursor()
+# storage engine picked by NBA_DB_BACKEND (MySQL unless set to sqlite);
+# statements come from the query catalog and run prepared
+db = db_operations(backend=from_env(), pool_size=1)
 
 def add_player(name, height, weight, age, position, team_id):
-    query = '''
-    INSERT INTO player (Name, Height, Weight, Age, Position, TeamID)
-    VALUES (%s, %s, %s, %s, %s, %s'''
-    cursor.execute(query, (name, height, weight, age, position, team_id))
-    db.commit()
-
-def delete_player(player_name): 
-    query = '''
-    DELETE FROM player
-    WHERE Name = %s'''
-    cursor.execute(query, (player_name,))
-    db.commit()
+    db.modify_query_params(sql("player.add"), (name, height, weight, age, position, team_id))
+
+def delete_player(player_name):
+    db.modify_query_params(sql("player.delete_by_name"), (player_name,))
 
 def update_player(player_id, column, new_value):
-    query = f'''
-    UPDATE player
-    SET {column} = %s
-    WHERE PlayerID = %s'''
-    cursor.execute(query, (new_value, player_id))
-    db.commit()
-    
+    db.modify_query_params(update_sql("Player", column), (new_value, player_id))
+
 
 def get_player(player_name):
-    query = '''
-    SELECT * FROM player
-    WHERE Name = %s'''
-    cursor.execute(query, (player_name,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("player.by_name"), (player_name,))
 
 def get_players_by_team(team_name):
-    query = '''
-    SELECT * FROM player
-    INNER JOIN Team ON players.TeamID = Team.TeamID
-    WHERE Team.Name = %s'''
-    cursor.execute(query, (team_name,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("player.by_team"), (team_name,))
 
 def get_players_by_position(position):
-    query = '''
-    SELECT * FROM player
-    WHERE Position = %s'''
-    cursor.execute(query, (position,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("player.by_position"), (position,))
 
 
 # -----------------------------
 # TEAM CRUD
 # -----------------------------
 def add_team(name, city, division, conference):
-    query = '''
-    INSERT INTO Team (Name, City, Division, Conference)
-    VALUES (%s, %s, %s, %s)'''
-    cursor.execute(query, (name, city, division, conference))
-    db.commit()
+    db.modify_query_params(sql("team.add"), (name, city, division, conference))
 
 def delete_team(team_name):
-    query = '''
-    DELETE FROM Team
-    WHERE Name = %s'''
-    cursor.execute(query, (team_name,))
-    db.commit()
+    db.modify_query_params(sql("team.delete_by_name"), (team_name,))
 
 def update_team(team_id, column, new_value):
-    query = f'''
-    UPDATE Team
-    SET {column} = %s
-    WHERE TeamID = %s'''
-    cursor.execute(query, (new_value, team_id))
-    db.commit()
+    db.modify_query_params(update_sql("Team", column), (new_value, team_id))
 
 def get_team(team_name):
-    query = '''
-    SELECT * FROM Team
-    WHERE Name = %s'''
-    cursor.execute(query, (team_name,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("team.by_name"), (team_name,))
 
 def get_all_teams():
-    query = '''
-    SELECT * FROM Team'''
-    cursor.execute(query)
-    return cursor.fetchall()
+    return db.select_query(sql("team.all"))
 
 
 # -----------------------------
 # COACH CRUD
 # -----------------------------
 def add_coach(name, salary, team_id):
-    query = '''
-    INSERT INTO Coach (Name, Salary, TeamID)
-    VALUES (%s, %s, %s)'''
-    cursor.execute(query, (name, salary, team_id))
-    db.commit()
+    db.modify_query_params(sql("coach.add"), (name, salary, team_id))
 
 def delete_coach(coach_name):
-    query = '''
-    DELETE FROM Coach
-    WHERE Name = %s'''
-    cursor.execute(query, (coach_name,))
-    db.commit()
+    db.modify_query_params(sql("coach.delete_by_name"), (coach_name,))
 
 def update_coach(coach_id, column, new_value):
-    query = f'''
-    UPDATE Coach
-    SET {column} = %s
-    WHERE CoachID = %s'''
-    cursor.execute(query, (new_value, coach_id))
-    db.commit()
-    
+    db.modify_query_params(update_sql("Coach", column), (new_value, coach_id))
+
 
 def get_coach(coach_name):
-    query = '''
-    SELECT * FROM Coach
-    WHERE Name = %s'''
-    cursor.execute(query, (coach_name,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("coach.by_name"), (coach_name,))
 
 def get_coach_by_team(team_name):
-    query = '''
-    SELECT * FROM Coach
-    INNER JOIN Team ON Coach.teamID = Team.teamID
-    WHERE Team.Name = %s'''
-    cursor.execute(query, (team_name,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("coach.by_team"), (team_name,))
 
 
 # -----------------------------
 # GAME CRUD
 # -----------------------------
 def add_game(date, location, home_team_id, away_team_id, home_score, away_score):
-    query = '''
-    INSERT INTO Game (Date, Location, HomeTeamID, AwayTeamID, HomeScore, AwayScore)
-    VALUES (%s, %s, %s, %s, %s, %s)'''
-    cursor.execute(query, (date, location, home_team_id, away_team_id, home_score, away_score))
-    db.commit()
+    db.modify_query_params(sql("game.add"),
+                           (date, location, home_team_id, away_team_id, home_score, away_score))
 
 def delete_game(game_id):
-    query = '''
-    DELETE FROM Game
-    WHERE GameID = %s'''
-    cursor.execute(query, (game_id,))
-    db.commit()
+    db.modify_query_params(sql("game.delete"), (game_id,))
 
 def update_game(game_id, column, new_value):
-    query = '''
-    UPDATE Game
-    SET {column} = %s
-    WHERE GameID = %s'''
-    cursor.execute(query, (new_value, game_id))
-    db.commit()
+    db.modify_query_params(update_sql("Game", column), (new_value, game_id))
+
 def get_game(game_id):
-    query = '''
-    SELECT * FROM Game
-    WHERE GameID = %s'''
-    cursor.execute(query, (game_id,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("game.by_id"), (game_id,))
 
 def get_games_by_team(team_name):
-    query = '''
-    SELECT * FROM Game
-    INNER JOIN Team AS home_team ON Game.HomeTeamId = home_team.team_id
-    INNER JOIN Team AS away_team ON Game.AwayTeamId = away_team.team_id
-    WHERE home_team.Name = %s OR away_team.Name = %s'''
-    cursor.execute(query, (team_name, team_name))
-    return cursor.fetchall()
-    
+    return db.select_query_params(sql("game.by_team"), (team_name, team_name))
+
 
 def get_games_by_date(date):
-    query = '''
-    SELECT * FROM Game
-    WHERE Date = %s'''
-    cursor.execute(query, (date,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("game.by_date"), (date,))
 
 # -----------------------------
 # PLAYER STATISTICS (BOX SCORE)
 # -----------------------------
 def add_player_statistics(game_id, player_id, points, rebounds, assists, blocks, steals, turnovers, minutes_played, fouls):
-    query = '''
-    INSERT INTO PlayerStatistics (GameID, PlayerID, Points, Rebounds, Assists, Blocks, Steals, Turnovers, MinutesPlayed, Fouls)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'''
-    cursor.execute(query, (game_id, player_id, points, rebounds, assists, blocks, steals, turnovers, minutes_played, fouls))
-    db.commit()
+    row = (game_id, player_id, points, rebounds, assists, blocks, steals, turnovers, minutes_played, fouls)
+    # keeps PlayerStatTotals in step, committed together with the row
+    db.log_box_scores([row])
+
 def update_player_statistics(game_id, player_id, column, new_value):
-    query = f'''
-    UPDATE PlayerStatistics
-    SET {column} = %s
-    WHERE GameID = %s AND PlayerID = %s'''
-    cursor.execute(query, (new_value, game_id, player_id))
-    db.commit()
-    
+    query = update_sql("PlayerGameStatistics", column)
+    with db.transaction() as cursor:
+        cursor.execute(sql(f"box_score.stat.{column}"), (game_id, player_id))
+        old = cursor.fetchone()
+        cursor.execute(query, (new_value, game_id, player_id))
+        if old is not None:
+            aggregates.adjust_stat(cursor, player_id, column, new_value - (old[0] or 0))
+
 
 def get_player_statistics(game_id, player_id):
-    query = '''
-    SELECT * FROM PlayerStatistics
-    WHERE GameID = %s AND PlayerID = %s'''
-    cursor.execute(query, (game_id, player_id))
-    return cursor.fetchall()
+    return db.select_query_params(sql("box_score.by_key"), (game_id, player_id))
 
 def get_statistics_by_player(player_id):
-    query = '''
-    SELECT * FROM PlayerStatistics
-    WHERE PlayerID = %s'''
-    cursor.execute(query, (player_id,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("box_score.by_player"), (player_id,))
 
 def get_statistics_by_game(game_id):
-    query = '''
-    SELECT * FROM PlayerStatistics
-    WHERE GameID = %s'''
-    cursor.execute(query, (game_id,))
-    return cursor.fetchall()
+    return db.select_query_params(sql("box_score.by_game"), (game_id,))
 
 def get_average_statistics_by_player(player_name):
-    query = '''
-    
-    SELECT AVG(Points) AS AvgPoints, AVG(Rebounds) AS AvgRebounds, AVG(Assists) AS AvgAssists,
-           AVG(Blocks) AS AvgBlocks, AVG(Steals) AS AvgSteals, AVG(Turnovers) AS AvgTurnovers,
-           AVG(MinutesPlayed) AS AvgMinutesPlayed, AVG(Fouls) AS AvgFouls
-    FROM PlayerStatistics
-    INNER JOIN Player ON PlayerStatistics.PlayerID = Player.PlayerID
-    WHERE Player.Name = %s'''
-    cursor.execute(query, (player_name,))
-    return cursor.fetchall()
\ No newline at end of file
+    return db.select_query_params(sql("box_score.averages_by_player_name"), (player_name,))
@@ -0,0 +1,192 @@
+# backend/advanced.py
+#
+# Derived metrics for every player, computed in one vectorized pass over
+# the box-score column store: per-36 rates, assist/turnover ratio, stocks
+# (steals + blocks), game score, double- and triple-doubles, and the
+# game-to-game standard deviation of the main stats. After the initial
+# pass only players whose box scores changed are recomputed, on the next
+# read.
+#
+# Game score here is Hollinger's formula without the shooting terms, as
+# box scores do not record attempts, and with every rebound weighted as
+# a defensive one (0.3), as they are not split:
+#   PTS + 0.3 REB + STL + 0.7 AST + 0.7 BLK - 0.4 PF - TOV
+#
+#   python advanced.py [metric]
+
+import threading
+
+import numpy as np
+
+from aggregates import STAT_COLUMNS
+
+_COL = {column: i for i, column in enumerate(STAT_COLUMNS)}
+
+# json key -> column, for the per-36 rates
+PER_36 = {"points": "Points", "rebounds": "Rebounds", "assists": "Assists",
+          "steals": "Steals", "blocks": "Blocks", "turnovers": "Turnovers"}
+
+# stats counted towards double- and triple-doubles
+_DOUBLE_COLUMNS = ["Points", "Rebounds", "Assists", "Steals", "Blocks"]
+
+# json key -> per-game series whose standard deviation is reported
+_SPREAD = ["points", "rebounds", "assists", "game_score"]
+
+METRICS = (["games", "minutes"] + [f"{k}_per_36" for k in PER_36]
+           + ["ast_to", "stocks", "game_score", "double_doubles", "triple_doubles"]
+           + [f"{k}_std" for k in _SPREAD])
+
+
+# function returns the game score of every box-score row
+def game_score(stats):
+    s = stats.astype(np.float64)
+    return (s[:, _COL["Points"]] + 0.3 * s[:, _COL["Rebounds"]] + s[:, _COL["Steals"]]
+            + 0.7 * s[:, _COL["Assists"]] + 0.7 * s[:, _COL["Blocks"]]
+            - 0.4 * s[:, _COL["Fouls"]] - s[:, _COL["Turnovers"]])
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator * scale / denominator, np.nan)
+
+
+# function computes every metric for every player in player_ids (one
+# entry per box-score row, rows of stats in STAT_COLUMNS order).
+# returns {PlayerID: {metric: value}}, None for undefined ratios
+def compute(player_ids, stats):
+    if len(player_ids) == 0:
+        return {}
+    players, inverse = np.unique(player_ids, return_inverse=True)
+    k = len(players)
+
+    def total(values):
+        return np.bincount(inverse, weights=values, minlength=k)
+
+    stats = stats.astype(np.float64)
+    games = np.bincount(inverse, minlength=k).astype(np.float64)
+    sums = {column: total(stats[:, i]) for column, i in _COL.items()}
+    minutes = sums["MinutesPlayed"]
+
+    scores = game_score(stats)
+    doubles = (stats[:, [_COL[c] for c in _DOUBLE_COLUMNS]] >= 10).sum(axis=1)
+
+    per_game = {"points": stats[:, _COL["Points"]], "rebounds": stats[:, _COL["Rebounds"]],
+                "assists": stats[:, _COL["Assists"]], "game_score": scores}
+    columns = {
+        "games": games,
+        "minutes": minutes / games,
+        "ast_to": _ratio(sums["Assists"], sums["Turnovers"]),
+        "stocks": (sums["Steals"] + sums["Blocks"]) / games,
+        "game_score": total(scores) / games,
+        "double_doubles": total(doubles >= 2),
+        "triple_doubles": total(doubles >= 3),
+    }
+    for key, column in PER_36.items():
+        columns[f"{key}_per_36"] = _ratio(sums[column], minutes, 36.0)
+    for key, values in per_game.items():
+        mean = total(values) / games
+        # population variance from the sums of squares, clipped against
+        # rounding just below zero
+        variance = np.maximum(total(values * values) / games - mean * mean, 0.0)
+        columns[f"{key}_std"] = np.sqrt(variance)
+
+    result = {}
+    for i, player_id in enumerate(players.tolist()):
+        entry = {}
+        for metric in METRICS:
+            value = columns[metric][i]
+            if metric in ("games", "double_doubles", "triple_doubles"):
+                entry[metric] = int(value)
+            else:
+                entry[metric] = None if np.isnan(value) else round(float(value), 3)
+        result[player_id] = entry
+    return result
+
+
+class advanced_engine():
+
+    # store: column_store.box_score_store the box scores are read from
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._players = {}
+        self._dirty = set()
+        self._generation = None     # store.generation the metrics were computed from
+
+    # function computes every player's metrics in one pass over the store
+    def load(self):
+        player_ids, stats = self.store.columns()
+        generation = self.store.generation
+        players = compute(player_ids, stats)
+        with self._lock:
+            self._players = players
+            self._generation = generation
+            self._dirty = set()
+            self._loaded = True
+
+    # caller holds the lock
+    def _refresh(self):
+        # a reloaded store (e.g. a new snapshot swapped in) changes every player
+        if not self._loaded or self.store.refresh() != self._generation:
+            self.load()
+        for player_id in list(self._dirty):
+            _, _, stats, _, _ = self.store.player_rows(player_id)
+            entry = compute(np.full(len(stats), player_id), stats).get(player_id)
+            if entry is None:
+                self._players.pop(player_id, None)
+            else:
+                self._players[player_id] = entry
+            self._dirty.discard(player_id)
+
+    # ---------- write hooks ----------
+
+    # function marks players whose box scores changed; they are
+    # recomputed on the next read
+    def touch(self, player_ids):
+        with self._lock:
+            if self._loaded:
+                self._dirty.update(player_ids)
+
+    # ---------- reads ----------
+
+    # function returns a player's metrics, or None without box scores
+    def player(self, player_id):
+        with self._lock:
+            self._refresh()
+            entry = self._players.get(player_id)
+            return dict(entry, player_id=player_id) if entry is not None else None
+
+    # function returns up to n players ordered by metric (best first, or
+    # lowest first with descending=False), players without a value last
+    def table(self, metric="game_score", n=50, min_games=1, descending=True):
+        if metric not in METRICS:
+            raise KeyError(metric)
+        with self._lock:
+            self._refresh()
+            rows = [dict(entry, player_id=player_id)
+                    for player_id, entry in self._players.items()
+                    if entry["games"] >= min_games]
+        sign = -1 if descending else 1
+        rows.sort(key=lambda r: (r[metric] is None, sign * (r[metric] or 0), r["player_id"]))
+        return rows[:n]
+
+
+def main():
+    import sys
+    from backends import from_env
+    from column_store import box_score_store
+    from db_operations import db_operations
+
+    metric = sys.argv[1] if len(sys.argv) > 1 else "game_score"
+    db = db_operations(backend=from_env(), pool_size=1)
+    engine = advanced_engine(box_score_store(db))
+    for row in engine.table(metric, n=20, min_games=10):
+        print(f"{row['player_id']:>6}  {metric} {row[metric]!s:>8}  games {row['games']:>3}  "
+              f"gmsc {row['game_score']!s:>6}  dd {row['double_doubles']:>3}  "
+              f"td {row['triple_doubles']:>2}")
+    db.destructor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# backend/aggregates.py
+#
+# PlayerStatTotals keeps one row per player with the number of games
+# played and the running sum of every box-score column. Writes to
+# PlayerGameStatistics fold into it in the same transaction, so averages
+# are a division away instead of an AVG() over the whole box-score table.
+#
+#   python aggregates.py rebuild   recompute every row from scratch
+#   python aggregates.py check     compare against PlayerGameStatistics
+
+import argparse
+
+# box-score columns that are summed per player
+STAT_COLUMNS = ["Points", "Rebounds", "Assists", "Blocks", "Steals",
+                "Turnovers", "MinutesPlayed", "Fouls"]
+
+# column order of a PlayerGameStatistics row
+BOX_SCORE_COLUMNS = ["GameID", "PlayerID"] + STAT_COLUMNS
+
+CREATE_TOTALS = '''
+CREATE TABLE PlayerStatTotals (
+    PlayerID INT PRIMARY KEY,
+    GamesPlayed INT NOT NULL DEFAULT 0,
+    Points INT NOT NULL DEFAULT 0,
+    Rebounds INT NOT NULL DEFAULT 0,
+    Assists INT NOT NULL DEFAULT 0,
+    Blocks INT NOT NULL DEFAULT 0,
+    Steals INT NOT NULL DEFAULT 0,
+    Turnovers INT NOT NULL DEFAULT 0,
+    MinutesPlayed INT NOT NULL DEFAULT 0,
+    Fouls INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (PlayerID) REFERENCES Player(PlayerID)
+);
+'''
+
+_TOTAL_COLUMNS = ["GamesPlayed"] + STAT_COLUMNS
+
+_SUMS_QUERY = f'''
+SELECT PlayerID, COUNT(*), {", ".join(f"COALESCE(SUM({c}), 0)" for c in STAT_COLUMNS)}
+FROM PlayerGameStatistics
+GROUP BY PlayerID
+'''
+
+# fills an empty PlayerStatTotals from the box scores already stored
+BACKFILL_TOTALS = f'''
+INSERT INTO PlayerStatTotals ({", ".join(["PlayerID"] + _TOTAL_COLUMNS)})
+{_SUMS_QUERY}'''
+
+
+# write counter of PlayerGameStatistics. every box-score transaction made
+# through db_operations bumps it, so a reader that took it in the same
+# consistent read as the rows (snapshot.export) knows exactly which
+# writes it has seen
+CREATE_DATA_VERSION = '''
+CREATE TABLE DataVersion (
+    Name VARCHAR(64) PRIMARY KEY,
+    Version BIGINT NOT NULL DEFAULT 0
+);
+'''
+
+INSERT_DATA_VERSION = "INSERT INTO DataVersion (Name, Version) VALUES ('PlayerGameStatistics', 0)"
+
+_VERSION_QUERY = "SELECT Version FROM DataVersion WHERE Name = 'PlayerGameStatistics'"
+
+
+# function bumps the box-score write counter inside the caller's
+# transaction and returns the new value
+def bump_version(cursor):
+    cursor.execute("UPDATE DataVersion SET Version = Version + 1 "
+                   "WHERE Name = 'PlayerGameStatistics'")
+    return read_version(cursor)
+
+
+# function returns the box-score write counter as the cursor sees it
+def read_version(cursor):
+    cursor.execute(_VERSION_QUERY)
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+# function returns the statement adding one game's line to a
+# player's totals, inserting the row on their first game
+def totals_upsert(backend):
+    return backend.upsert_increment("PlayerStatTotals", ["PlayerID"], _TOTAL_COLUMNS)
+
+
+# function maps PlayerGameStatistics rows (BOX_SCORE_COLUMNS order,
+# missing stats treated as 0) to totals_upsert parameters
+def totals_params(box_scores):
+    return [(row[1], 1) + tuple(v or 0 for v in row[2:]) for row in box_scores]
+
+
+# function folds box-score rows into the totals using an open cursor,
+# so it commits (or rolls back) together with the rows themselves
+def apply_box_scores(cursor, backend, box_scores):
+    if box_scores:
+        cursor.executemany(totals_upsert(backend), totals_params(box_scores))
+
+
+# function folds stat increments (BOX_SCORE_COLUMNS order) into the totals
+# using an open cursor. existing: (GameID, PlayerID) keys that already had
+# a box score; the others are a player's first line of that game
+def apply_box_score_deltas(cursor, backend, deltas, existing):
+    if deltas:
+        cursor.executemany(totals_upsert(backend), [
+            (row[1], int((row[0], row[1]) not in existing)) + tuple(row[2:])
+            for row in deltas])
+
+
+# function shifts one stat of a player's totals, used when an existing
+# box-score value is corrected in place
+def adjust_stat(cursor, player_id, column, delta):
+    if column not in STAT_COLUMNS:
+        raise ValueError(f"Invalid column '{column}'")
+    cursor.execute(f"UPDATE PlayerStatTotals SET {column} = {column} + %s WHERE PlayerID = %s",
+                   (delta, player_id))
+
+
+# function recomputes every player's totals in one transaction
+def rebuild(db):
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM PlayerStatTotals")
+        cursor.execute(BACKFILL_TOTALS)
+    print("Rebuilt PlayerStatTotals")
+
+
+# function returns a list of (PlayerID, expected, stored) rows where the
+# totals disagree with PlayerGameStatistics; empty means consistent
+def check(db):
+    expected = {row[0]: tuple(int(v or 0) for v in row[1:])
+                for row in db.select_query(_SUMS_QUERY)}
+    stored = {row[0]: tuple(int(v) for v in row[1:])
+              for row in db.select_query(
+                  f"SELECT PlayerID, {', '.join(_TOTAL_COLUMNS)} FROM PlayerStatTotals")}
+    mismatches = []
+    for player_id in sorted(expected.keys() | stored.keys()):
+        want = expected.get(player_id, (0,) * len(_TOTAL_COLUMNS))
+        have = stored.get(player_id)
+        if have != want:
+            mismatches.append((player_id, want, have))
+    return mismatches
+
+
+def main():
+    from backends import from_env
+    from db_operations import db_operations
+
+    parser = argparse.ArgumentParser(description="Maintain PlayerStatTotals")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+
+    db = db_operations(backend=from_env(), pool_size=1)
+    if args.command == "rebuild":
+        rebuild(db)
+    else:
+        mismatches = check(db)
+        for player_id, want, have in mismatches:
+            print(f"PlayerID {player_id}: expected {want}, stored {have}")
+        print(f"{len(mismatches)} inconsistent players")
+        if mismatches:
+            raise SystemExit(1)
+    db.destructor()
+
+
+if __name__ == "__main__":
+    main()
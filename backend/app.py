@@ -1,21 +1,208 @@
 # backend/app.py
 
-from flask import Flask, request, jsonify
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
-from db_operations import db_operations
+from advanced import METRICS, advanced_engine
+from backends import from_env, sqlite_backend
+from cache import response_cache
+from column_store import box_score_store
+from db_operations import BoxScoreError, db_operations
+from leaderboard import STATS, leaderboard_engine
+from live_scoring import live_scorer
+from metrics import metrics_registry
+from queries import UPDATABLE, batch, sql, verify
+from search_index import KINDS, search_index
+from serialize import FieldError, compressor, json_provider, project
+from serialize import rows_to_dicts as decode_to_dicts
+from similar import similarity_index
+from snapshot import snapshot_watcher
+from standings import GROUPS, standings_engine
+from trades import TradeError
+from versions import data_versions
 
 app = Flask(__name__)
 CORS(app)  # allow requests from your Vite dev server
 
-# Single shared DB object
-db = db_operations()
+# jsonify() encodes with orjson when it is installed (same output as the
+# stdlib provider), and responses over NBA_COMPRESS_MIN_BYTES are gzip /
+# brotli compressed for clients accepting it; NBA_COMPRESS=0 turns that off
+app.json = json_provider(app)
+compression = compressor(min_bytes=int(os.environ.get("NBA_COMPRESS_MIN_BYTES", 1024)))
+if os.environ.get("NBA_COMPRESS", "1") != "0":
+    compression.install(app)
+
+# Route latency, per-query timings and row counts, served at /api/metrics.
+# Statements slower than NBA_SLOW_QUERY_MS are logged to nba.slow_query.
+metrics = metrics_registry(slow_query_ms=float(os.environ.get("NBA_SLOW_QUERY_MS", 200)))
+metrics.install(app)
+
+# Per-table data versions, bumped by every write; read routes derive
+# strong ETags from them and answer If-None-Match with 304 up front.
+# Tags also roll over every NBA_CACHE_TTL seconds, bounding staleness for
+# writes made by other processes
+versions = data_versions(max_age=float(os.environ.get("NBA_CACHE_TTL", 60)))
+
+# Single shared DB object; each query checks out its own pooled connection.
+# NBA_DB_BACKEND=sqlite runs the API on an embedded SQLite database.
+db = db_operations(backend=from_env(),
+                   pool_size=int(os.environ.get("NBA_DB_POOL_SIZE", 10)),
+                   metrics=metrics, versions=versions)
+
+# Leaderboards can be served from a read-only SQLite snapshot published
+# with export_sqlite.py, keeping their aggregates off the main database.
+if os.environ.get("NBA_LEADERBOARD_SNAPSHOT"):
+    leaders_db = db_operations(
+        backend=sqlite_backend(os.environ["NBA_LEADERBOARD_SNAPSHOT"], read_only=True),
+        pool_size=int(os.environ.get("NBA_DB_POOL_SIZE", 10)),
+        metrics=metrics)
+else:
+    leaders_db = db
+
+# In-memory top-N indexes for every stat, kept current by the write routes
+leaders = leaderboard_engine(leaders_db)
+
+# NumPy column store of box scores joined with games, for game logs and splits.
+# With NBA_SNAPSHOT it starts from a columnar snapshot published with
+# snapshot.py, memory-mapped and shared by every worker on the host,
+# instead of joining the tables in the database. Reads pick up a newly
+# published snapshot (checked every NBA_SNAPSHOT_CHECK seconds), and the
+# routes reading the store hash store.refresh()'s generation into their ETag
+league_snapshot = (snapshot_watcher(os.environ["NBA_SNAPSHOT"],
+                                    float(os.environ.get("NBA_SNAPSHOT_CHECK", 5.0)))
+                   if os.environ.get("NBA_SNAPSHOT") else None)
+store = box_score_store(db, snapshot=league_snapshot)
+
+# Per-36 rates, game score, double-doubles... computed over the column store
+advanced = advanced_engine(store)
+
+# Team records (win %, streaks, home/away...) updated as games are added
+standings = standings_engine(db)
+
+# Typeahead over player, team and coach names, kept current by the write routes
+search = search_index(db)
+
+# Nearest players by per-game averages and bio fields, rebuilt in the
+# background (at most every NBA_SIMILAR_REBUILD_SECONDS) as stats change.
+# NBA_SIMILAR_ALGORITHM=kdtree searches a scipy KD-tree instead
+similar = similarity_index(db,
+                           algorithm=os.environ.get("NBA_SIMILAR_ALGORITHM", "brute"),
+                           min_interval=float(os.environ.get("NBA_SIMILAR_REBUILD_SECONDS", 5.0)))
+
+# Live stat increments, coalesced in memory and flushed in batches every
+# NBA_LIVE_FLUSH_SECONDS; the leaderboards and column store take them at once
+live = live_scorer(db,
+                   interval=float(os.environ.get("NBA_LIVE_FLUSH_SECONDS", 1.0)),
+                   max_pending=int(os.environ.get("NBA_LIVE_MAX_PENDING", 2000)),
+                   on_totals=leaders.add_totals,
+                   on_box_scores=lambda rows: box_scores_changed(rows, deltas=True),
+                   on_flushed=store.deltas_flushed)
+
+# GET response cache, invalidated by tag from the write routes below
+cache = response_cache(max_entries=int(os.environ.get("NBA_CACHE_SIZE", 1024)),
+                       ttl=float(os.environ.get("NBA_CACHE_TTL", 60)))
+
+# Runs /api/dashboard's sub-queries side by side
+dashboard_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dashboard")
 
 
 # ---------- helpers ----------
 
 def rows_to_dicts(columns, rows):
-    """Zip column names with row tuples into list[dict]."""
-    return [dict(zip(columns, row)) for row in rows]
+    """Zip column names with decoded row tuples into list[dict], keeping
+    only the columns listed in ?fields= when the request has one."""
+    metrics.record_rows(len(rows))
+    fields = request.args.get("fields") if has_request_context() else None
+    return decode_to_dicts(columns, rows, fields=fields)
+
+
+# ?fields= naming a column the route does not return
+@app.errorhandler(FieldError)
+def unknown_field(e):
+    return jsonify({"error": str(e), "fields": e.columns}), 400
+
+
+# function feeds new box-score rows (or live increments to them, with
+# deltas=True) to the column store and the engines derived from it.
+# version: the box-score write version the rows were committed at
+def box_scores_changed(rows, deltas=False, version=None):
+    if deltas:
+        store.add_stat_deltas(rows)
+    else:
+        store.add_box_scores(rows, version=version)
+    advanced.touch(row[1] for row in rows)
+    similar.mark_stale()
+
+
+# cache tags; names are lowercased since MySQL compares them case-insensitively
+def team_tag(name):
+    return f"team:{(name or '').lower()}"
+
+
+# tags of the teams a request names in team_name, repeated and/or comma
+# separated as list_arg reads them
+def team_name_tags(args):
+    return [team_tag(name.strip()) for raw in args.getlist("team_name")
+            for name in raw.split(",")]
+
+
+def player_tag(name):
+    return f"player:{(name or '').lower()}"
+
+
+# player rows carry their team's name; entries tagged with this are
+# dropped when a team is renamed
+TEAM_NAMES_TAG = "team-names"
+
+
+def team_tags_by_id(*team_ids):
+    ids = [int(t) for t in team_ids if t is not None]
+    if not ids:
+        return []
+    rows = db.select_query_params(sql("team.names_by_ids", ids=len(ids)), tuple(ids))
+    return [team_tag(r[0]) for r in rows]
+
+
+# most values a batch endpoint takes per list
+BATCH_MAX = 100
+
+
+# function collects a list argument given repeated (?id=1&id=2) and/or
+# comma separated (?id=1,2 or ?team_name=Hawks,Celtics), so values may not
+# contain commas themselves. raises ValueError when ints are asked for
+# and a value is not one, or when the list is longer than BATCH_MAX
+def list_arg(name, ints=False):
+    values = []
+    for raw in request.args.getlist(name):
+        parts = [p.strip() for p in raw.split(",")]
+        try:
+            values += [int(p) if ints else p for p in parts if p]
+        except ValueError:
+            raise ValueError(f"'{name}' must be a list of integers")
+    values = list(dict.fromkeys(values))
+    if len(values) > BATCH_MAX:
+        raise ValueError(f"at most {BATCH_MAX} values for '{name}'")
+    return values
+
+
+PLAYER_COLS = ["player_id", "name", "height", "weight", "age", "position",
+               "team_id", "team"]
+ROSTER_COLS = ["player_id", "name", "position", "age"]
+
+
+# function returns {requested team name: roster} with one query for all
+# of the teams; names match case-insensitively, unknown teams get []
+def fetch_rosters(team_names):
+    if not team_names:
+        return {}
+    query, params = batch("team.rosters", "names", team_names)
+    by_team = {}
+    for row in db.select_query_params(query, params):
+        by_team.setdefault(row[0].lower(), []).append(row[1:])
+    return {name: by_team.get(name.lower(), []) for name in team_names}
 
 
 # ---------- basic health check ----------
@@ -25,125 +212,461 @@ def health():
     return jsonify({"status": "ok"})
 
 
-# ---------- TOP 10 QUERIES ----------
-
-@app.route("/api/players/top/points")
-def top_players_points():
-    query = """
-        SELECT
-            Player.PlayerID,
-            Player.Name,
-            AVG(PlayerGameStatistics.Points) AS avg_points
-        FROM Player
-        JOIN PlayerGameStatistics ON Player.PlayerID = PlayerGameStatistics.PlayerID
-        GROUP BY Player.PlayerID, Player.Name
-        ORDER BY avg_points DESC
-        LIMIT 10;
-    """
-    rows = db.select_query(query)
-    data = [
-        {"player_id": r[0], "name": r[1], "avg_points": float(r[2])}
-        for r in rows
-    ]
+# connection pool counters: in use, idle, waits, wait time
+@app.route("/api/health/pool")
+def pool_health():
+    return jsonify(db.pool_stats())
+
+
+# response cache counters: hits, misses, evictions, invalidations
+@app.route("/api/health/cache")
+def cache_health():
+    return jsonify(cache.stats())
+
+
+# Prometheus scrape target: route latency histograms, query timings and
+# row counts by SQL fingerprint, rows serialized, pool and cache counters
+@app.route("/api/metrics")
+def prometheus_metrics():
+    gauges = {f"nba_db_pool_{k}": v for k, v in db.pool_stats().items()}
+    gauges.update((f"nba_cache_{k}", v) for k, v in cache.stats().items())
+    gauges.update((f"nba_live_{k}", float(v)) for k, v in live.stats().items())
+    gauges["nba_http_not_modified"] = versions.stats()["not_modified"]
+    gauges.update((f"nba_compression_{k}", v) for k, v in compression.stats().items())
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+# ---------- LEADERBOARDS ----------
+
+@app.route("/api/players/top/<stat>")
+@versions.conditional("Player", "Team", "PlayerStatTotals")
+@cache.cached(lambda args: ["leaderboard"])
+def top_players(stat):
+    if stat not in STATS:
+        return jsonify({"error": f"Unknown stat '{stat}'",
+                        "stats": STATS}), 400
+    n = max(1, min(request.args.get("n", 10, type=int), 500))
+    try:
+        min_games = int(request.args.get("min_games", 1))
+        team_id = request.args.get("team_id", type=int)
+    except ValueError:
+        return jsonify({"error": "min_games and team_id must be integers"}), 400
+
+    team_name = request.args.get("team_name")
+    if team_name and team_id is None:
+        team_id = leaders.team_id(team_name)
+        if team_id is None:
+            return jsonify([])
+
+    data = leaders.top(stat, n=n, min_games=min_games, team_id=team_id,
+                       position=request.args.get("position"))
+    metrics.record_rows(len(data))
     return jsonify(data)
 
 
-@app.route("/api/players/top/assists")
-def top_players_assists():
-    query = """
-        SELECT
-            Player.PlayerID,
-            Player.Name,
-            AVG(PlayerGameStatistics.Assists) AS avg_assists
-        FROM Player
-        JOIN PlayerGameStatistics ON Player.PlayerID = PlayerGameStatistics.PlayerID
-        GROUP BY Player.PlayerID, Player.Name
-        ORDER BY avg_assists DESC
-        LIMIT 10;
-    """
-    rows = db.select_query(query)
-    data = [
-        {"player_id": r[0], "name": r[1], "avg_assists": float(r[2])}
-        for r in rows
-    ]
+# ---------- DISTRIBUTIONS ----------
+
+# ?stat=points,assists (all stats by default); ?position=PG ranks the player
+# among one position, ?position=same among their own
+@app.route("/api/player/<int:player_id>/percentiles")
+@versions.conditional("Player", "PlayerStatTotals")
+def player_percentiles(player_id):
+    stats = [s for s in request.args.get("stat", "").split(",") if s] or None
+    unknown = [s for s in stats or [] if s not in STATS]
+    if unknown:
+        return jsonify({"error": f"Unknown stat '{unknown[0]}'", "stats": STATS}), 400
+    position = request.args.get("position")
+    if position == "same":
+        position = leaders.position(player_id)
+    data = leaders.percentiles(player_id, stats=stats, position=position)
+    if data is None:
+        return jsonify({"error": f"Unknown player {player_id}"}), 404
+    return jsonify({"player_id": player_id, "position": position, "stats": data})
+
+
+# histogram and quantiles of a stat's per-player values:
+# ?position=PG&bins=10
+@app.route("/api/distribution/<stat>")
+@versions.conditional("Player", "PlayerStatTotals")
+@cache.cached(lambda args: ["leaderboard"])
+def stat_distribution(stat):
+    if stat not in STATS:
+        return jsonify({"error": f"Unknown stat '{stat}'", "stats": STATS}), 400
+    bins = max(1, min(request.args.get("bins", 10, type=int), 100))
+    return jsonify(leaders.distribution(stat, position=request.args.get("position"), bins=bins))
+
+
+# ---------- SIMILAR PLAYERS ----------
+
+# the ?k= players closest to player_id by per-game averages, height,
+# weight, age and position
+@app.route("/api/player/<int:player_id>/similar")
+@versions.conditional("Player", "PlayerStatTotals", extra=lambda: similar.built_at)
+def similar_players(player_id):
+    k = max(1, min(request.args.get("k", 10, type=int), 100))
+    data = similar.similar(player_id, k=k)
+    if data is None:
+        return jsonify({"error": f"No games recorded for player {player_id}"}), 404
+    metrics.record_rows(len(data))
+    return jsonify({"player_id": player_id, "k": k, "similar": data})
+
+
+# ---------- STANDINGS ----------
+
+# ?group=conference|division|league, optionally narrowed with
+# ?conference=East or ?division=Pacific
+@app.route("/api/standings")
+@versions.conditional("Team", "Game")
+@cache.cached(lambda args: ["standings"])
+def get_standings():
+    group = request.args.get("group", "conference")
+    if group not in GROUPS:
+        return jsonify({"error": f"Unknown group '{group}'", "groups": list(GROUPS)}), 400
+    data = standings.standings(group, conference=request.args.get("conference"),
+                               division=request.args.get("division"))
+    metrics.record_rows(sum(len(block["teams"]) for block in data))
     return jsonify(data)
 
 
-@app.route("/api/players/top/rebounds")
-def top_players_rebounds():
-    query = """
-        SELECT
-            Player.PlayerID,
-            Player.Name,
-            AVG(PlayerGameStatistics.Rebounds) AS avg_rebounds
-        FROM Player
-        JOIN PlayerGameStatistics ON Player.PlayerID = PlayerGameStatistics.PlayerID
-        GROUP BY Player.PlayerID, Player.Name
-        ORDER BY avg_rebounds DESC
-        LIMIT 10;
-    """
-    rows = db.select_query(query)
-    data = [
-        {"player_id": r[0], "name": r[1], "avg_rebounds": float(r[2])}
-        for r in rows
-    ]
+# full rebuild from the Game table, e.g. after games were backfilled
+# with loader.py or written by another process
+@app.route("/api/standings/rebuild", methods=["POST"])
+def rebuild_standings():
+    standings.load()
+    versions.bump("Game")
+    cache.invalidate("standings")
+    return jsonify({"status": "ok"})
+
+
+# ---------- DASHBOARD ----------
+
+DASHBOARD_STATS = ("points", "assists", "rebounds")
+
+
+# points/assists/rebounds leaders plus the rosters of ?team_name=A&team_name=B
+# in one round trip; the leaderboards and the roster query run concurrently
+@app.route("/api/dashboard")
+@versions.conditional("Player", "Team", "PlayerStatTotals")
+@cache.cached(lambda args: ["leaderboard"] + team_name_tags(args))
+def dashboard():
+    n = max(1, min(request.args.get("n", 10, type=int), 100))
+    try:
+        team_names = list_arg("team_name")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    tops = {stat: dashboard_pool.submit(leaders.top, stat, n=n) for stat in DASHBOARD_STATS}
+    rosters = dashboard_pool.submit(fetch_rosters, team_names)
+    data = {
+        "leaders": {stat: future.result() for stat, future in tops.items()},
+        "rosters": {name: rows_to_dicts(ROSTER_COLS, rows)
+                    for name, rows in rosters.result().items()},
+    }
+    metrics.record_rows(sum(len(rows) for rows in data["leaders"].values()))
     return jsonify(data)
 
 
 # ---------- TEAM QUERIES ----------
 
 @app.route("/api/team/roster")
+@versions.conditional("Player", "Team")
+@cache.cached(lambda args: [team_tag(args.get("team_name"))])
 def team_roster():
     team_name = request.args.get("team_name")
     if not team_name:
         return jsonify({"error": "team_name is required"}), 400
 
-    query = """
-        SELECT Player.PlayerID, Player.Name, Player.Position, Player.Age
-        FROM Player
-        INNER JOIN Team ON Player.TeamID = Team.TeamID
-        WHERE Team.Name = %s;
-    """
-    rows = db.select_query_params(query, (team_name,))
-    cols = ["player_id", "name", "position", "age"]
-    return jsonify(rows_to_dicts(cols, rows))
+    rows = db.select_query_params(sql("team.roster"), (team_name,))
+    return jsonify(rows_to_dicts(ROSTER_COLS, rows))
+
+
+# ?team_name=A&team_name=B -> {"A": [...], "B": [...]} in one query
+@app.route("/api/team/rosters")
+@versions.conditional("Player", "Team")
+@cache.cached(team_name_tags)
+def team_rosters():
+    try:
+        team_names = list_arg("team_name")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not team_names:
+        return jsonify({"error": "team_name is required"}), 400
+
+    rosters = fetch_rosters(team_names)
+    return jsonify({name: rows_to_dicts(ROSTER_COLS, rows) for name, rows in rosters.items()})
 
 
 # optional: search team players by position
 @app.route("/api/team/players-by-position")
+@versions.conditional("Player", "Team")
+@cache.cached(lambda args: [team_tag(args.get("team_name"))])
 def team_players_by_position():
     team_name = request.args.get("team_name")
     position = request.args.get("position")
     if not team_name or not position:
         return jsonify({"error": "team_name and position are required"}), 400
 
-    query = """
-        SELECT Player.PlayerID, Player.Name, Player.Position, Player.Age
-        FROM Player
-        INNER JOIN Team ON Player.TeamID = Team.TeamID
-        WHERE Team.Name = %s AND Player.Position = %s;
-    """
-    rows = db.select_query_params(query, (team_name, position))
-    cols = ["player_id", "name", "position", "age"]
-    return jsonify(rows_to_dicts(cols, rows))
+    rows = db.select_query_params(sql("team.roster_by_position"), (team_name, position))
+    return jsonify(rows_to_dicts(ROSTER_COLS, rows))
 
 
 # ---------- PLAYER QUERIES ----------
 
 @app.route("/api/player/search")
+@versions.conditional("Player", "Team")
+@cache.cached(lambda args: [player_tag(args.get("name")), TEAM_NAMES_TAG])
 def search_player_by_name():
     name = request.args.get("name")
     if not name:
         return jsonify({"error": "name is required"}), 400
 
-    query = """
-        SELECT PlayerID, Name, Height, Weight, Age, Position, TeamID
-        FROM Player
-        WHERE Name = %s;
-    """
-    rows = db.select_query_params(query, (name,))
-    cols = ["player_id", "name", "height", "weight", "age", "position", "team_id"]
-    return jsonify(rows_to_dicts(cols, rows))
+    rows = db.select_query_params(sql("player.search"), (name,))
+    return jsonify(rows_to_dicts(PLAYER_COLS, rows))
+
+
+# ?id=1,2,3 and/or ?name=A&name=B: many players in one query per list,
+# each with its team's name
+@app.route("/api/players/batch")
+@versions.conditional("Player", "Team")
+def players_batch():
+    try:
+        ids = list_arg("id", ints=True)
+        names = list_arg("name")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not ids and not names:
+        return jsonify({"error": "id or name is required"}), 400
+
+    rows = []
+    if ids:
+        rows += db.select_query_params(*batch("players.by_ids", "ids", ids))
+    if names:
+        rows += db.select_query_params(*batch("players.by_names", "names", names))
+    players = {row[0]: row for row in rows}
+    return jsonify(rows_to_dicts(PLAYER_COLS, sorted(players.values())))
+
+
+# typeahead: ?q=<partial name>&kind=player,team,coach&limit=10
+# prefix, case/accent-insensitive and typo-tolerant, served from memory
+@app.route("/api/search")
+@versions.conditional("Player", "Team", "Coach")
+def typeahead_search():
+    q = request.args.get("q", "")
+    kinds = [k for k in request.args.get("kind", "").split(",") if k]
+    unknown = [k for k in kinds if k not in KINDS]
+    if unknown:
+        return jsonify({"error": f"Unknown kind '{unknown[0]}'", "kinds": list(KINDS)}), 400
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+    data = search.search(q, limit=limit, kinds=kinds or None)
+    metrics.record_rows(len(data))
+    return jsonify(data)
+
+
+# ---------- LISTINGS (keyset pagination / streaming) ----------
+
+PAGE_SIZE = 100
+PAGE_MAX = 1000
+
+
+# function serves a listing either one keyset page at a time
+#   ?after=<last key>&limit=<n>  ->  {"items": [...], "next_cursor": ...}
+# or, with ?format=ndjson|stream, as a response streamed from the cursor
+# in batches (NDJSON lines, or one chunked JSON array).
+# select: catalog SELECT ... FROM ... without WHERE; key: unique ordering column,
+# reported as cols[0]; filters: list of (condition, params); branches: lists
+# of filters, one per UNION ALL branch of select, for an OR across columns
+# that each have their own index (see queries.game.by_team)
+def list_response(select, key, cols, filters=(), branches=None):
+    after = request.args.get("after", type=int)
+    limit = request.args.get("limit", type=int)
+    filters = list(filters)
+    if after is not None:
+        filters.append((f"{key} > %s", [after]))
+    parts, params = [], []
+    for branch in branches or [[]]:
+        conditions = [c for c, _ in branch + filters]
+        parts.append(select + (" WHERE " + " AND ".join(conditions) if conditions else ""))
+        params += [v for _, values in branch + filters for v in values]
+    query = " UNION ALL ".join(parts) + f" ORDER BY {key}"
+
+    fmt = request.args.get("format", "page")
+    if fmt in ("ndjson", "stream"):
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        # checked up front: an unknown field fails with a 400, not mid-stream
+        fields = request.args.get("fields")
+        if fields:
+            project(cols, fields)
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+        return Response(stream_with_context(stream_rows(query, tuple(params), cols, fmt, fields)),
+                        mimetype=mimetype)
+
+    limit = max(1, min(limit or PAGE_SIZE, PAGE_MAX))
+    rows = db.select_query_params(query + " LIMIT %s", tuple(params) + (limit + 1,))
+    items = rows_to_dicts(cols, rows[:limit])
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return jsonify({"items": items, "next_cursor": next_cursor})
+
+
+# generator behind list_response's streaming mode; memory stays at one
+# batch of rows however large the result is
+def stream_rows(query, params, cols, fmt, fields=None):
+    dumps = app.json.dumps
+    first = True
+    if fmt == "stream":
+        yield "["
+    for rows in db.stream_query_params(query, params):
+        metrics.record_rows(len(rows))
+        items = decode_to_dicts(cols, rows, fields=fields)
+        if fmt == "ndjson":
+            yield "\n".join(dumps(item) for item in items) + "\n"
+        else:
+            # one encoder call per batch, without the list's brackets
+            yield ("" if first else ",") + dumps(items)[1:-1]
+        first = False
+    if fmt == "stream":
+        yield "]"
+
+
+@app.route("/api/players")
+@versions.conditional("Player")
+def list_players():
+    filters = []
+    if request.args.get("team_id", type=int) is not None:
+        filters.append(("TeamID = %s", [request.args.get("team_id", type=int)]))
+    if request.args.get("position"):
+        filters.append(("Position = %s", [request.args["position"]]))
+    return list_response(
+        sql("players.list"),
+        "PlayerID",
+        ["player_id", "name", "height", "weight", "age", "position", "team_id"],
+        filters)
+
+
+@app.route("/api/games")
+@versions.conditional("Game")
+def list_games():
+    branches = None
+    team_id = request.args.get("team_id", type=int)
+    if team_id is not None:
+        # home and away games apart, each on its own index
+        branches = [[("HomeTeamID = %s", [team_id])], [("AwayTeamID = %s", [team_id])]]
+    return list_response(
+        sql("games.list"),
+        "GameID",
+        ["game_id", "date", "location", "home_team_id", "away_team_id",
+         "home_score", "away_score"],
+        branches=branches)
+
+
+@app.route("/api/player/<int:player_id>/games")
+@versions.conditional("PlayerGameStatistics", "Game")
+def list_player_games(player_id):
+    live.flush(player_ids={player_id})
+    return list_response(
+        sql("player.games.list"),
+        "PlayerGameStatistics.GameID",
+        ["game_id", "date", "points", "rebounds", "assists", "blocks",
+         "steals", "turnovers", "minutes_played", "fouls"],
+        [("PlayerGameStatistics.PlayerID = %s", [player_id])])
+
+
+# ---------- PLAYER GAME LOGS / SPLITS (column store) ----------
+
+# function returns the 404 for a player that does not exist, else None.
+# the store only knows players with box scores
+def unknown_player(player_id):
+    if db.select_query_params(sql("player.name_and_team"), (player_id,)):
+        return None
+    return jsonify({"error": f"No player {player_id}"}), 404
+
+
+@app.route("/api/player/<int:player_id>/gamelog")
+@versions.conditional("PlayerGameStatistics", "Game", "Player", extra=store.refresh)
+def player_gamelog(player_id):
+    missing = unknown_player(player_id)
+    if missing:
+        return missing
+    log = store.game_log(player_id)
+    metrics.record_rows(len(log))
+    return jsonify(log)
+
+
+# ?last=5,10,20 picks the last-N windows, ?rolling=N adds a rolling series
+@app.route("/api/player/<int:player_id>/splits")
+@versions.conditional("PlayerGameStatistics", "Game", "Player", extra=store.refresh)
+def player_splits(player_id):
+    try:
+        last_n = [int(n) for n in request.args.get("last", "5,10,20").split(",") if n]
+        rolling = request.args.get("rolling", type=int)
+    except ValueError:
+        return jsonify({"error": "last must be a comma separated list of integers"}), 400
+    missing = unknown_player(player_id)
+    if missing:
+        return missing
+    return jsonify(store.splits(player_id, last_n=last_n, rolling=rolling))
+
+
+# ---------- GAME BOX SCORES (batch) ----------
+
+BOX_SCORE_COLS = ["player_id", "name", "points", "rebounds", "assists", "blocks",
+                  "steals", "turnovers", "minutes_played", "fouls"]
+
+
+# ?game_id=1,2,3 -> {"1": [stat lines], ...} in one query; games without
+# box scores get []
+@app.route("/api/games/stats")
+@versions.conditional("PlayerGameStatistics", "Player")
+def games_stats():
+    try:
+        game_ids = list_arg("game_id", ints=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not game_ids:
+        return jsonify({"error": "game_id is required"}), 400
+
+    live.flush(game_ids=set(game_ids))
+    by_game = {game_id: [] for game_id in game_ids}
+    for row in db.select_query_params(*batch("box_scores.by_games", "ids", game_ids)):
+        by_game[row[0]].append(row[1:])
+    return jsonify({str(game_id): rows_to_dicts(BOX_SCORE_COLS, rows)
+                    for game_id, rows in by_game.items()})
+
+
+# ---------- ADVANCED METRICS ----------
+
+@app.route("/api/player/<int:player_id>/advanced")
+@versions.conditional("PlayerGameStatistics", "Game", "Player", extra=store.refresh)
+def player_advanced(player_id):
+    missing = unknown_player(player_id)
+    if missing:
+        return missing
+    data = advanced.player(player_id)
+    if data is None:
+        return jsonify({"error": f"No box scores for player {player_id}"}), 404
+    return jsonify(data)
+
+
+# league table: ?metric=game_score&n=50&min_games=1&order=desc|asc
+@app.route("/api/advanced")
+@versions.conditional("PlayerGameStatistics", "Game", "Player", extra=store.refresh)
+@cache.cached(lambda args: ["leaderboard"])
+def advanced_table():
+    metric = request.args.get("metric", "game_score")
+    if metric not in METRICS:
+        return jsonify({"error": f"Unknown metric '{metric}'", "metrics": METRICS}), 400
+    n = max(1, min(request.args.get("n", 50, type=int), 500))
+    min_games = request.args.get("min_games", 1, type=int)
+    rows = advanced.table(metric, n=n, min_games=min_games,
+                          descending=request.args.get("order", "desc") != "asc")
+    if rows:
+        query, params = batch("players.by_ids", "ids", [r["player_id"] for r in rows])
+        names = {row[0]: row[1] for row in db.select_query_params(query, params)}
+        for row in rows:
+            row["name"] = names.get(row["player_id"])
+    metrics.record_rows(len(rows))
+    return jsonify(rows)
 
 
 # ---------- ADD / UPDATE ----------
@@ -156,13 +679,13 @@ def add_team():
     if missing:
         return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
 
-    query = """
-        INSERT INTO Team (Name, City, Division, Conference)
-        VALUES (%s, %s, %s, %s);
-    """
     params = (data["name"], data["city"], data["division"], data["conference"])
-    db.modify_query_params(query, params)
-    return jsonify({"status": "ok"}), 201
+    team_id = db.insert_query_params(sql("team.add"), params)
+    leaders.set_team(team_id, data["name"])
+    search.set("team", team_id, data["name"])
+    standings.set_team(team_id, data["name"], data["conference"], data["division"])
+    cache.invalidate(team_tag(data["name"]), "standings")
+    return jsonify({"status": "ok", "team_id": team_id}), 201
 
 
 @app.route("/api/player", methods=["POST"])
@@ -173,10 +696,6 @@ def add_player():
     if missing:
         return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
 
-    query = """
-        INSERT INTO Player (Name, Height, Weight, Age, Position, TeamID)
-        VALUES (%s, %s, %s, %s, %s, %s);
-    """
     params = (
         data["name"],
         int(data["height"]),
@@ -185,8 +704,15 @@ def add_player():
         data["position"],
         int(data["team_id"]),
     )
-    db.modify_query_params(query, params)
-    return jsonify({"status": "ok"}), 201
+    player_id = db.insert_query_params(sql("player.add"), params)
+    leaders.set_player(player_id, data["name"], int(data["team_id"]), data["position"])
+    search.set("player", player_id, data["name"], int(data["team_id"]))
+    cache.invalidate(player_tag(data["name"]), *team_tags_by_id(data["team_id"]))
+    return jsonify({"status": "ok", "player_id": player_id}), 201
+
+
+# Player columns PUT /api/player stores as integers
+PLAYER_INT_COLUMNS = {"Height", "Weight", "Age", "TeamID"}
 
 
 @app.route("/api/player", methods=["PUT"])
@@ -197,14 +723,43 @@ def update_player():
     if missing:
         return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
 
-    allowed_cols = {"Name", "Height", "Weight", "Age", "Position", "TeamID"}
+    allowed_cols, _ = UPDATABLE["Player"]
     column = data["column"]
     if column not in allowed_cols:
         return jsonify({"error": f"Invalid column '{column}'"}), 400
 
-    query = f"UPDATE Player SET {column} = %s WHERE PlayerID = %s;"
-    params = (data["new_value"], int(data["player_id"]))
-    db.modify_query_params(query, params)
+    try:
+        player_id = int(data["player_id"])
+        new_value = int(data["new_value"]) if column in PLAYER_INT_COLUMNS else data["new_value"]
+    except (TypeError, ValueError):
+        return jsonify({"error": f"player_id and {column} must be integers"}), 400
+    if column not in PLAYER_INT_COLUMNS and not isinstance(new_value, str):
+        return jsonify({"error": f"{column} must be a string"}), 400
+
+    old = db.select_query_params(sql("player.name_and_team"), (player_id,))
+    if not old:
+        return jsonify({"error": f"No player {player_id}"}), 404
+    if column == "TeamID" and not db.select_query_params(sql("team.name_by_id"), (new_value,)):
+        return jsonify({"error": f"Unknown team {new_value}"}), 400
+
+    params = (new_value, player_id)
+    db.modify_query_params(sql(f"update.Player.{column}"), params)
+    leaders.update_player(player_id, column, new_value)
+    if column == "Name":
+        search.update("player", player_id, name=new_value)
+    elif column == "TeamID":
+        search.update("player", player_id, team_id=new_value)
+    similar.mark_stale()
+
+    # a trade touches the rosters of both the old and the new team
+    old_name, old_team = old[0]
+    tags = [player_tag(old_name)]
+    tags += team_tags_by_id(old_team, new_value if column == "TeamID" else None)
+    if column == "Name":
+        tags.append(player_tag(new_value))
+    if column in ("Name", "TeamID", "Position"):
+        tags.append("leaderboard")
+    cache.invalidate(*tags)
     return jsonify({"status": "ok"})
 
 
@@ -216,19 +771,97 @@ def update_team():
     if missing:
         return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
 
-    allowed_cols = {"Name", "City", "Division", "Conference"}
+    allowed_cols, _ = UPDATABLE["Team"]
     column = data["column"]
     if column not in allowed_cols:
         return jsonify({"error": f"Invalid column '{column}'"}), 400
 
-    query = f"UPDATE Team SET {column} = %s WHERE TeamID = %s;"
-    params = (data["new_value"], int(data["team_id"]))
-    db.modify_query_params(query, params)
+    team_id = int(data["team_id"])
+    old_name = None
+    if column == "Name":
+        rows = db.select_query_params(sql("team.name_by_id"), (team_id,))
+        old_name = rows[0][0] if rows else None
+
+    params = (data["new_value"], team_id)
+    db.modify_query_params(sql(f"update.Team.{column}"), params)
+    standings.update_team(team_id, column, data["new_value"])
+    if column != "City":
+        cache.invalidate("standings")
+    if column == "Name":
+        leaders.set_team(team_id, data["new_value"], old_name)
+        search.update("team", team_id, name=data["new_value"])
+        cache.invalidate(team_tag(old_name), team_tag(data["new_value"]), "leaderboard",
+                         TEAM_NAMES_TAG)
     return jsonify({"status": "ok"})
 
 
+# ---------- GAMES ----------
+
+# body: date, location, home_team_id, away_team_id and optionally
+# home_score / away_score (left out for a scheduled game)
+@app.route("/api/game", methods=["POST"])
+def add_game():
+    data = request.json or {}
+    required = ["date", "location", "home_team_id", "away_team_id"]
+    missing = [f for f in required if f not in data]
+    if missing:
+        return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
+    try:
+        home_team_id, away_team_id = int(data["home_team_id"]), int(data["away_team_id"])
+        scores = [None if data.get(f) is None else int(data[f])
+                  for f in ("home_score", "away_score")]
+    except (TypeError, ValueError):
+        return jsonify({"error": "team ids and scores must be integers"}), 400
+    if home_team_id == away_team_id:
+        return jsonify({"error": "a team cannot play itself"}), 400
+    # MySQL has foreign keys for this, SQLite does not (migrations.py)
+    for team_id in (home_team_id, away_team_id):
+        if not db.select_query_params(sql("team.name_by_id"), (team_id,)):
+            return jsonify({"error": f"Unknown team {team_id}"}), 400
+
+    params = (data["date"], data["location"], home_team_id, away_team_id, *scores)
+    game_id = db.insert_query_params(sql("game.add"), params)
+    standings.add_game(game_id, data["date"], home_team_id, away_team_id, *scores)
+    cache.invalidate("standings")
+    return jsonify({"status": "ok", "game_id": game_id}), 201
+
+
+# ---------- TRADES ----------
+
+# body: {"moves": [{"player": "<name>", "to_team": "<team name>"}, ...]}
+# moves may span any number of teams; the trade applies atomically
+@app.route("/api/trades", methods=["POST"])
+def make_trade():
+    data = request.json or {}
+    moves = data.get("moves")
+    if not isinstance(moves, list) or not moves:
+        return jsonify({"error": "moves is required"}), 400
+    if not all(isinstance(m, dict) and m.get("player") and m.get("to_team") for m in moves):
+        return jsonify({"error": "every move needs player and to_team"}), 400
+
+    try:
+        plan = db.trade([(m["player"], m["to_team"]) for m in moves])
+    except TradeError as e:
+        return jsonify({"error": str(e)}), 400
+
+    team_ids = set()
+    for move in plan:
+        leaders.update_player(move["player_id"], "TeamID", move["to_team_id"])
+        search.update("player", move["player_id"], team_id=move["to_team_id"])
+        team_ids.update((move["from_team_id"], move["to_team_id"]))
+    similar.mark_stale()
+    cache.invalidate("leaderboard", *team_tags_by_id(*team_ids),
+                     *(player_tag(move["name"]) for move in plan))
+    return jsonify({"status": "ok", "moves": plan})
+
+
 # ---------- LOG PLAYER GAME (very simple version) ----------
 
+# unknown game or player: 400; a line the game already has: 409
+def box_score_error(e):
+    return jsonify({"error": str(e)}), 409 if e.conflict else 400
+
+
 @app.route("/api/player/log-game", methods=["POST"])
 def log_player_game():
     data = request.json or {}
@@ -237,22 +870,140 @@ def log_player_game():
     if missing:
         return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
 
-    query = """
-        INSERT INTO PlayerGameStatistics
-        (GameID, PlayerID, Points, Rebounds, Assists, Blocks, Steals, Turnovers, MinutesPlayed, Fouls)
-        VALUES (%s, %s, %s, %s, %s, 0, 0, 0, 0, 0);
-    """
-    params = (
-        int(data["game_id"]),
-        int(data["player_id"]),
-        int(data["points"]),
-        int(data["rebounds"]),
-        int(data["assists"]),
-    )
-    db.modify_query_params(query, params)
+    try:
+        row = (
+            int(data["game_id"]),
+            int(data["player_id"]),
+            int(data["points"]),
+            int(data["rebounds"]),
+            int(data["assists"]),
+            0, 0, 0, 0, 0,
+        )
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids and stats must be integers"}), 400
+    # box score and PlayerStatTotals are written in one transaction
+    # live events for the game wait until every engine has the new lines
+    with live.sync([row[0]]):
+        try:
+            version = db.log_box_scores([row])
+        except BoxScoreError as e:
+            return box_score_error(e)
+        leaders.add_box_scores([row])
+        box_scores_changed([row], version=version)
+    cache.invalidate("leaderboard")
     return jsonify({"status": "ok"}), 201
 
 
+# ---------- BULK BOX SCORE ----------
+
+# request field -> PlayerGameStatistics column, in BOX_SCORE_COLUMNS order
+BOX_SCORE_FIELDS = ["player_id", "points", "rebounds", "assists", "blocks",
+                    "steals", "turnovers", "minutes_played", "fouls"]
+
+
+# whole game's stat lines in one transaction. body is either a JSON list
+# of objects (or {"lines": [...]}) or text/csv with a header row, using
+# the BOX_SCORE_FIELDS names; stats left out default to 0
+@app.route("/api/games/<int:game_id>/boxscore", methods=["POST"])
+def log_box_score(game_id):
+    if request.mimetype == "text/csv":
+        lines = list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+    else:
+        lines = request.json or []
+        if isinstance(lines, dict):
+            lines = lines.get("lines", [])
+    if not isinstance(lines, list) or not lines:
+        return jsonify({"error": "no stat lines given"}), 400
+
+    rows = []
+    for number, line in enumerate(lines, start=1):
+        if not isinstance(line, dict) or not line.get("player_id"):
+            return jsonify({"error": f"line {number}: player_id is required"}), 400
+        try:
+            rows.append((game_id,) + tuple(int(line.get(f) or 0) for f in BOX_SCORE_FIELDS))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"line {number}: stats must be integers"}), 400
+
+    player_ids = [row[1] for row in rows]
+    if len(set(player_ids)) != len(player_ids):
+        return jsonify({"error": "a player appears more than once"}), 400
+
+    # live events for the game wait until every engine has the new lines
+    with live.sync([game_id]):
+        try:
+            version = db.log_box_scores(rows)
+        except BoxScoreError as e:
+            return box_score_error(e)
+        leaders.add_box_scores(rows)
+        box_scores_changed(rows, version=version)
+    cache.invalidate("leaderboard")
+    return jsonify({"status": "ok", "rows": len(rows)}), 201
+
+
+# ---------- LIVE SCORING ----------
+
+# body: {"events": [{"game_id": 1, "player_id": 7, "points": 2}, ...]} (or
+# the bare list) with stat increments named as in BOX_SCORE_FIELDS; values
+# may be negative for corrections. accepted events show in the leaderboards
+# and game logs at once and are written to the database in the next flush
+@app.route("/api/live/events", methods=["POST"])
+def live_events():
+    events = request.json or []
+    if isinstance(events, dict):
+        events = events.get("events", [])
+    if not isinstance(events, list) or not events:
+        return jsonify({"error": "no events given"}), 400
+
+    rows = []
+    for number, event in enumerate(events, start=1):
+        if not isinstance(event, dict) or not event.get("game_id") or not event.get("player_id"):
+            return jsonify({"error": f"event {number}: game_id and player_id are required"}), 400
+        try:
+            rows.append((int(event["game_id"]),)
+                        + tuple(int(event.get(f) or 0) for f in BOX_SCORE_FIELDS))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"event {number}: stats must be integers"}), 400
+
+    try:
+        merged = live.record(rows)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # the engines already serve the events; the database follows on flush
+    versions.bump("PlayerGameStatistics")
+    cache.invalidate("leaderboard")
+    return jsonify({"status": "accepted", "events": len(rows), "rows": merged}), 202
+
+
+# writes everything pending now instead of at the next interval
+@app.route("/api/live/flush", methods=["POST"])
+def live_flush():
+    return jsonify({"status": "ok", "rows": live.flush()})
+
+
+# event/flush counters, or with ?game_id= that game's unflushed deltas
+@app.route("/api/live/status")
+def live_status():
+    game_id = request.args.get("game_id", type=int)
+    if game_id is not None:
+        return jsonify({str(p): d for p, d in live.pending(game_id).items()})
+    return jsonify(live.stats())
+
+
+# function checks every catalog query compiles against the schema, then
+# loads the in-memory indexes up front instead of on first use
+def warm_up():
+    verify(db)
+    leaders.load()
+    store.load()
+    advanced.load()
+    standings.load()
+    search.load()
+    similar.rebuild()
+    similar.start()
+    live.start()
+
+
 if __name__ == "__main__":
+    warm_up()
     # run on http://localhost:5000
     app.run(debug=True)
@@ -0,0 +1,141 @@
+# backend/asgi_app.py
+#
+# asyncio serving mode for the same routes as app.py. The event loop owns
+# the sockets, so thousands of concurrent clients cost a coroutine each
+# rather than a thread each. Requests are dispatched into the Flask app
+# itself, which keeps the JSON byte-for-byte identical to the sync server:
+#   - routes answered from memory (leaderboards, health) run on the loop;
+#   - everything else runs on a thread pool no larger than the DB pool,
+#     so waiting requests queue up cheaply instead of blocking threads.
+#
+#   uvicorn asgi_app:application --port 8000
+
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import app as flask_module
+
+# routes that never touch the database once app.warm_up() has run
+INLINE_PREFIXES = ("/api/players/top/", "/api/health")
+
+
+class asgi_app():
+
+    # wsgi_app: the Flask application to dispatch into
+    # workers: threads running database-bound requests
+    def __init__(self, wsgi_app, workers=10, inline_prefixes=INLINE_PREFIXES,
+                 on_startup=None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asgi-db")
+        self.inline_prefixes = inline_prefixes
+        self.on_startup = on_startup
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.on_startup is not None:
+                    await loop.run_in_executor(self.executor, self.on_startup)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        environ = build_environ(scope, bytes(body))
+
+        if scope["path"].startswith(self.inline_prefixes):
+            status, headers, chunks = self._run_wsgi(environ)
+            await self._send(send, status, headers, chunks)
+            return
+
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(
+            self.executor, self._run_wsgi, environ)
+        await self._send(send, status, headers, chunks)
+
+    # function runs the Flask app and collects the response.
+    # streamed responses are drained here too, off the event loop
+    def _run_wsgi(self, environ):
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured["status"] = int(status.split(" ", 1)[0])
+            captured["headers"] = headers
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            chunks = [chunk for chunk in result if chunk]
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return captured["status"], captured["headers"], chunks
+
+    @staticmethod
+    async def _send(send, status, headers, chunks):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        })
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+# function translates an ASGI http scope into a WSGI environ (PEP 3333)
+def build_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name == "CONTENT_LENGTH":
+            continue
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+application = asgi_app(flask_module.app,
+                       workers=int(os.environ.get("NBA_DB_POOL_SIZE", 10)),
+                       on_startup=flask_module.warm_up)
@@ -0,0 +1,278 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# module contains the storage engines db_operations can run on.
+# queries are written once in MySQL syntax with %s placeholders;
+# each backend translates them to its own dialect if it has to.
+#----------------------------------------
+
+# prepared cursor bound to one query text. the driver only re-uses a
+# prepared statement when it is given the very same string object, so
+# every execute goes through the copy the statement was cached under
+class prepared_statement():
+
+    def __init__(self, cursor, query):
+        self._cursor = cursor
+        self._query = query
+
+    def execute(self, query, params=()):
+        return self._cursor.execute(self._query, params)
+
+    def executemany(self, query, seq_of_params):
+        return self._cursor.executemany(self._query, seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class mysql_backend():
+    name = "mysql"
+    # MySQL can add foreign keys to existing tables with ALTER TABLE
+    supports_alter_constraints = True
+    # prepared statements kept open per pooled connection
+    statement_cache_size = 256
+
+    def __init__(self, host="localhost", user="root", password="CPSC408!",
+                 database="NBA"):
+        self.config = {
+            "host": host,
+            "user": user,
+            "password": password,
+            "auth_plugin": 'mysql_native_password',
+            "database": database,
+        }
+
+    # function opens a brand new connection, used by the pool
+    def connect(self):
+        # imported here so SQLite-only setups don't need the driver
+        import mysql.connector
+        return mysql.connector.connect(**self.config)
+
+    # function checks a pooled connection is still alive
+    def ping(self, connection):
+        connection.ping(reconnect=False)
+        return True
+
+    # function starts a read-only transaction in which every query sees
+    # the same committed state
+    def begin_snapshot(self, cursor):
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+
+    # function tells whether e is a constraint violation (duplicate key,
+    # missing parent row)
+    def is_integrity_error(self, e):
+        import mysql.connector
+        return isinstance(e, mysql.connector.errors.IntegrityError)
+
+    def cursor(self, connection):
+        return connection.cursor()
+
+    # function returns a server-side prepared cursor for query. it is
+    # prepared on first use and kept on the connection, so later calls
+    # with the same text only send the parameters
+    def statement(self, connection, query):
+        cache = getattr(connection, "_nba_statements", None)
+        if cache is None:
+            cache = connection._nba_statements = OrderedDict()
+        cursor = cache.get(query)
+        if cursor is not None:
+            cache.move_to_end(query)
+            return cursor
+        cursor = prepared_statement(connection.cursor(prepared=True), query)
+        cache[query] = cursor
+        if len(cache) > self.statement_cache_size:
+            _, oldest = cache.popitem(last=False)
+            oldest.close()
+        return cursor
+
+    # prepared cursors stay open in the connection's cache
+    def release_statement(self, cursor):
+        pass
+
+    # function has the server parse and resolve query without running it
+    def check_statement(self, connection, query):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("PREPARE nba_check FROM %s", (query.replace("%s", "?"),))
+            cursor.execute("DEALLOCATE PREPARE nba_check")
+        finally:
+            cursor.close()
+
+    def translate(self, query):
+        return query
+
+    # function builds an INSERT that adds to the counters of an
+    # existing row instead of failing on a duplicate key
+    def upsert_increment(self, table, key_columns, counter_columns):
+        columns = key_columns + counter_columns
+        placeholders = ("%s,"*len(columns))[:-1]
+        updates = ", ".join(f"{c} = {c} + VALUES({c})" for c in counter_columns)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES({placeholders}) "
+                f"ON DUPLICATE KEY UPDATE {updates}")
+
+    # function returns [(column name, SQL type)] for a table, in order
+    def column_types(self, db, table):
+        return db.select_query_params('''
+            SELECT COLUMN_NAME, COLUMN_TYPE
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION''', (table,))
+
+
+# translations from the MySQL dialect used throughout the repo
+_SQLITE_REWRITES = [
+    (re.compile(r"\bINT\s+PRIMARY\s+KEY\s+AUTO_INCREMENT\b", re.I),
+     "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bAUTO_INCREMENT\b", re.I), "AUTOINCREMENT"),
+    (re.compile(r"%s"), "?"),
+]
+
+@lru_cache(maxsize=1024)
+def sqlite_translate(query):
+    for pattern, replacement in _SQLITE_REWRITES:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+# DB-API cursor that rewrites MySQL-flavoured SQL before running it
+class sqlite_cursor():
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        return self._cursor.execute(sqlite_translate(query), params or ())
+
+    def executemany(self, query, seq_of_params):
+        return self._cursor.executemany(sqlite_translate(query), seq_of_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._cursor.fetchmany()
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+
+class sqlite_backend():
+    name = "sqlite"
+    # SQLite cannot ALTER TABLE ... ADD CONSTRAINT
+    supports_alter_constraints = False
+
+    _memory_ids = 0
+    _memory_lock = threading.Lock()
+
+    # path: database file, or ":memory:" for a private in-process database
+    # read_only: open the file read-only, e.g. for a published snapshot
+    def __init__(self, path=":memory:", read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self._anchor = None
+        if path == ":memory:":
+            # every pooled connection must see the same in-memory database,
+            # so use a named shared-cache database kept alive by an anchor
+            with sqlite_backend._memory_lock:
+                sqlite_backend._memory_ids += 1
+                name = f"nba_memory_{os.getpid()}_{sqlite_backend._memory_ids}"
+            self.uri = f"file:{name}?mode=memory&cache=shared"
+            self._anchor = self.connect()
+        elif read_only:
+            self.uri = f"file:{path}?mode=ro"
+        else:
+            self.uri = f"file:{path}"
+
+    def connect(self):
+        # sqlite3 keeps compiled statements per connection, keyed by text;
+        # make room for the whole query catalog
+        connection = sqlite3.connect(self.uri, uri=True, timeout=30,
+                                     check_same_thread=False,
+                                     cached_statements=256)
+        connection.execute("PRAGMA foreign_keys = ON")
+        if self.read_only:
+            connection.execute("PRAGMA query_only = ON")
+        elif self.path != ":memory:":
+            # WAL lets readers run while a writer holds the lock
+            connection.execute("PRAGMA journal_mode = WAL")
+        return connection
+
+    # a deferred transaction reads one snapshot from its first SELECT on
+    def begin_snapshot(self, cursor):
+        cursor.execute("BEGIN")
+
+    def is_integrity_error(self, e):
+        return isinstance(e, sqlite3.IntegrityError)
+
+    def ping(self, connection):
+        connection.execute("SELECT 1").fetchone()
+        return True
+
+    def cursor(self, connection):
+        return sqlite_cursor(connection.cursor())
+
+    # compiled statements are reused by sqlite3's own per-connection cache
+    def statement(self, connection, query):
+        return self.cursor(connection)
+
+    def release_statement(self, cursor):
+        cursor.close()
+
+    # function compiles query with EXPLAIN, binding NULL to every placeholder
+    def check_statement(self, connection, query):
+        query = sqlite_translate(query)
+        connection.execute("EXPLAIN " + query, (None,) * query.count("?")).fetchall()
+
+    def translate(self, query):
+        return sqlite_translate(query)
+
+    def upsert_increment(self, table, key_columns, counter_columns):
+        columns = key_columns + counter_columns
+        placeholders = ("%s,"*len(columns))[:-1]
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in counter_columns)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES({placeholders}) "
+                f"ON CONFLICT({', '.join(key_columns)}) DO UPDATE SET {updates}")
+
+    def column_types(self, db, table):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name '{table}'")
+        return [(row[1], row[2]) for row in db.select_query(f"PRAGMA table_info({table})")]
+
+
+# function picks a backend from the environment:
+#   NBA_DB_BACKEND=mysql (default) or sqlite
+#   NBA_SQLITE_PATH=path/to/file.db (default :memory:)
+#   NBA_SQLITE_READ_ONLY=1 to open the file read-only
+def from_env(environ=os.environ):
+    name = environ.get("NBA_DB_BACKEND", "mysql").lower()
+    if name == "mysql":
+        return mysql_backend()
+    if name == "sqlite":
+        return sqlite_backend(environ.get("NBA_SQLITE_PATH", ":memory:"),
+                              read_only=environ.get("NBA_SQLITE_READ_ONLY") == "1")
+    raise ValueError(f"Unknown NBA_DB_BACKEND '{name}'")
+#----------------------------------------------
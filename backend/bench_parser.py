@@ -0,0 +1,71 @@
+# backend/bench_parser.py
+#
+# Compares helper.data_cleaner with the schema-aware csv_parser on a
+# generated PlayerGameStatistics file (one million rows by default).
+# Column types are read from an in-memory SQLite copy of the schema.
+#
+#   python bench_parser.py --rows 1000000
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import aggregates
+from backends import sqlite_backend
+from csv_parser import typed_parser
+from db_operations import db_operations
+from helper import helper
+
+
+def write_box_scores(path, rows):
+    rng = random.Random(408)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(rows):
+            f.write(f"{i // 20 + 1},{i % 20 + 1},{rng.randint(0, 50)},{rng.randint(0, 20)},"
+                    f"{rng.randint(0, 15)},{rng.randint(0, 5)},{rng.randint(0, 5)},"
+                    f"{rng.randint(0, 8)},{rng.randint(0, 48)},{rng.randint(0, 6)}\n")
+
+
+def timed(label, fn, rows):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:7.2f}s  {rows / elapsed:>12,.0f} rows/sec")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV parsing")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    db = db_operations(backend=sqlite_backend(), pool_size=1)
+    db.create_all_tables()
+    typed = typed_parser.for_table(db, "PlayerGameStatistics", aggregates.BOX_SCORE_COLUMNS)
+
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        write_box_scores(path, args.rows)
+        print(f"{args.rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        old, old_time = timed("helper.data_cleaner", lambda: helper.data_cleaner(path), args.rows)
+
+        def parse_all():
+            rows = []
+            for _, batch in typed.parse_file(path, batch_size=args.batch_size):
+                rows.extend(batch)
+            return rows
+
+        new, new_time = timed("csv_parser.typed_parser", parse_all, args.rows)
+        print(f"speedup: {old_time / new_time:.2f}x, identical output: {old == new}")
+    finally:
+        os.remove(path)
+        db.destructor()
+
+
+if __name__ == "__main__":
+    main()
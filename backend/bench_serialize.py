@@ -0,0 +1,83 @@
+# backend/bench_serialize.py
+#
+# Compares the serialization path of a row-heavy response: the old
+# dict(zip()) per row with a hand float() on the DECIMAL column and
+# Flask's stdlib jsonify, against serialize.rows_to_dicts (column-wise
+# decoding) with the orjson provider, with and without a ?fields=
+# projection, plus the cost and ratio of compressing the body.
+#
+#   python bench_serialize.py --rows 50000 --repeat 5
+
+import argparse
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from serialize import compressor, json_provider, rows_to_dicts
+
+COLUMNS = ["player_id", "name", "avg_points", "date", "points", "rebounds", "assists",
+           "minutes_played"]
+
+
+# rows shaped like a MySQL result: ints, text, DECIMAL and DATE
+def generate(rows):
+    rng = random.Random(408)
+    start = datetime.date(2024, 10, 22)
+    return [(i, f"Player {i % 450}", Decimal(f"{rng.uniform(0, 35):.4f}"),
+             start + datetime.timedelta(days=i % 170), rng.randint(0, 50),
+             rng.randint(0, 20), rng.randint(0, 15), rng.randint(0, 48))
+            for i in range(rows)]
+
+
+def timed(label, fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<34} {best * 1000:9.1f}ms  {rows / best:>12,.0f} rows/sec")
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = generate(args.rows)
+    app = Flask(__name__)
+    stdlib, fast = DefaultJSONProvider(app), json_provider(app)
+    if fast._orjson is None:
+        print("orjson not installed, the provider falls back to the stdlib encoder")
+
+    with app.app_context():
+        def old_path():
+            items = [dict(zip(COLUMNS, (r[0], r[1], float(r[2])) + r[3:])) for r in rows]
+            return stdlib.response(items).get_data()
+
+        def new_path(fields=None):
+            return fast.response(rows_to_dicts(COLUMNS, rows, fields=fields)).get_data()
+
+        old, old_time = timed("dict(zip()) + stdlib jsonify", old_path, args.rows, args.repeat)
+        new, new_time = timed("rows_to_dicts + json_provider", new_path, args.rows, args.repeat)
+        projected, _ = timed("  with ?fields=player_id,name,points",
+                             lambda: new_path("player_id,name,points"), args.rows, args.repeat)
+        print(f"speedup: {old_time / new_time:.2f}x, "
+              f"same document: {stdlib.loads(old) == stdlib.loads(new)}")
+        print(f"body {len(new) / 1e6:.2f} MB, projected {len(projected) / 1e6:.2f} MB")
+
+        compress = compressor()
+        for encoding in compress.encodings:
+            body, _ = timed(f"compress {encoding}", lambda: compress.compress(new, encoding),
+                            args.rows, args.repeat)
+            print(f"  {len(body) / 1e6:.2f} MB ({len(body) / len(new):.1%} of the body)")
+
+
+if __name__ == "__main__":
+    main()
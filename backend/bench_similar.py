@@ -0,0 +1,76 @@
+# backend/bench_similar.py
+#
+# Query latency of the similar-players index against league size, for
+# the brute-force search and, when scipy is installed, the KD-tree.
+# Players are generated in memory (per-game totals, bio fields and a
+# position), so no database is needed.
+#
+#   python bench_similar.py --sizes 500,5000,50000,500000 --queries 200
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from aggregates import STAT_COLUMNS
+from similar import POSITIONS, _index, feature_matrix, normalize
+
+
+# function returns rows shaped like similar._LOAD_QUERY's
+def league(players, seed=408):
+    rng = random.Random(seed)
+    rows = []
+    for player_id in range(1, players + 1):
+        games = rng.randint(1, 82)
+        rows.append((player_id, f"Player {player_id}", rng.randint(1, 30),
+                     rng.choice(POSITIONS), rng.randint(72, 88), rng.randint(170, 290),
+                     rng.randint(19, 40), games)
+                    + tuple(rng.randint(0, 30) * games for _ in STAT_COLUMNS))
+    return rows
+
+
+def latencies(index, queries, k, rng):
+    samples = []
+    for _ in range(queries):
+        i = rng.randrange(len(index.ids))
+        start = time.perf_counter()
+        index.nearest(i, k)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark similar-player queries")
+    parser.add_argument("--sizes", default="500,5000,50000,500000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    algorithms = ["brute"]
+    try:
+        import scipy.spatial  # noqa: F401
+        algorithms.append("kdtree")
+    except ImportError:
+        print("scipy not installed, timing brute force only")
+
+    print(f"{'players':>9}  {'algorithm':<8} {'build ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rows = league(size)
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        vectors = normalize(feature_matrix(rows))
+        results = {}
+        for algorithm in algorithms:
+            start = time.perf_counter()
+            index = _index(ids, {}, vectors, algorithm)
+            build_ms = (time.perf_counter() - start) * 1000
+            p50, p99 = latencies(index, args.queries, args.k, random.Random(size))
+            results[algorithm] = [row for row, _ in index.nearest(0, args.k)]
+            print(f"{size:>9,}  {algorithm:<8} {build_ms:>9.1f} {p50:>8.3f} {p99:>8.3f}")
+        if len(results) > 1:
+            print(f"{'':>9}  same neighbours: {results['brute'] == results['kdtree']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+# backend/bench_suite.py
+#
+# Benchmark suite for the API and the db_operations reports. Builds (or
+# reuses) a synthetic league in SQLite, runs every app.py endpoint through
+# the Flask test client and every report function directly, and records
+# latency percentiles, throughput and peak allocation per case. Results
+# go to a JSON file; with --baseline the run fails if any case got slower
+# than the stored numbers by more than --tolerance.
+#
+#   python bench_suite.py                                  # 30 teams, 1 season
+#   python bench_suite.py --teams 30 --seasons 3 --iterations 500
+#   python bench_suite.py --save-baseline                  # refresh the baseline
+#
+# Writes run against a scratch copy of the league, so --db can be reused.
+# The response cache is cleared before every timed request unless --cached.
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from loadgen import percentile
+from synthetic_league import build_sqlite
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "bench_baseline.json")
+
+
+# function returns every endpoint case: (name, request(i) -> (method, path,
+# json body), prepare(count) run untimed before the loop, or None)
+def endpoint_cases(app_module):
+    db = app_module.db
+    team_name = db.select_query("SELECT Name FROM Team ORDER BY TeamID LIMIT 1")[0][0]
+    player_id, player_name, player_team = db.select_query(
+        "SELECT PlayerID, Name, TeamID FROM Player ORDER BY PlayerID LIMIT 1")[0]
+    other_team = db.select_query_params(
+        "SELECT Name FROM Team WHERE TeamID <> %s ORDER BY TeamID LIMIT 1", (player_team,))[0][0]
+    roster = [r[0] for r in db.select_query_params(
+        "SELECT PlayerID FROM Player WHERE TeamID = %s ORDER BY PlayerID", (player_team,))]
+
+    spare_games = []
+
+    # empty games for the box-score writes to fill
+    def add_games(count):
+        first = db.single_record("SELECT COALESCE(MAX(GameID), 0) FROM Game") + 1
+        db.bulk_insert("INSERT INTO Game (GameID, Date, Location, HomeTeamID, AwayTeamID, "
+                       "HomeScore, AwayScore) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                       [(first + i, "2030-01-01", "Bench", player_team, 2 if player_team != 2 else 1,
+                         0, 0) for i in range(count)])
+        spare_games[:] = range(first, first + count)
+
+    def get(path):
+        return lambda i: ("GET", path, None)
+
+    return [
+        ("GET /api/health", get("/api/health"), None),
+        ("GET /api/health/pool", get("/api/health/pool"), None),
+        ("GET /api/metrics", get("/api/metrics"), None),
+        ("GET /api/players/top/points", get("/api/players/top/points"), None),
+        ("GET /api/players/top/assists_per_minute?team_name",
+         get(f"/api/players/top/assists_per_minute?team_name={team_name}&n=5"), None),
+        ("GET /api/player/<id>/percentiles",
+         get(f"/api/player/{player_id}/percentiles?position=same"), None),
+        ("GET /api/distribution/points", get("/api/distribution/points?position=PG&bins=20"),
+         None),
+        ("GET /api/player/<id>/similar", get(f"/api/player/{player_id}/similar?k=10"), None),
+        ("GET /api/standings", get("/api/standings"), None),
+        ("GET /api/standings?group=division", get("/api/standings?group=division"), None),
+        ("GET /api/team/roster", get(f"/api/team/roster?team_name={team_name}"), None),
+        ("GET /api/team/players-by-position",
+         get(f"/api/team/players-by-position?team_name={team_name}&position=PG"), None),
+        ("GET /api/player/search", get(f"/api/player/search?name={player_name}"), None),
+        ("GET /api/players/batch", get("/api/players/batch?id=" + ",".join(map(str, roster))),
+         None),
+        ("GET /api/team/rosters", get(f"/api/team/rosters?team_name={team_name}"
+                                      f"&team_name={other_team}"), None),
+        ("GET /api/games/stats", get("/api/games/stats?game_id=1,2,3,4,5,6,7,8,9,10"), None),
+        ("GET /api/dashboard", get(f"/api/dashboard?team_name={team_name}"
+                                   f"&team_name={other_team}"), None),
+        ("GET /api/search (prefix)", get(f"/api/search?q={player_name[:4]}"), None),
+        ("GET /api/search (typo)", get(f"/api/search?q={player_name[:1] + player_name[2:]}"),
+         None),
+        ("GET /api/players (page)", get("/api/players?limit=100"), None),
+        ("GET /api/players (ndjson)", get("/api/players?format=ndjson"), None),
+        ("GET /api/games?team_id", get(f"/api/games?team_id={player_team}&limit=100"), None),
+        ("GET /api/player/<id>/games", get(f"/api/player/{player_id}/games"), None),
+        ("GET /api/player/<id>/gamelog", get(f"/api/player/{player_id}/gamelog"), None),
+        ("GET /api/player/<id>/advanced", get(f"/api/player/{player_id}/advanced"), None),
+        ("GET /api/advanced", get("/api/advanced?metric=game_score&n=50"), None),
+        ("GET /api/player/<id>/splits", get(f"/api/player/{player_id}/splits?rolling=10"), None),
+        ("POST /api/team", lambda i: ("POST", "/api/team", {
+            "name": f"Bench Team {i}", "city": "Bench", "division": "Atlantic",
+            "conference": "East"}), None),
+        ("POST /api/player", lambda i: ("POST", "/api/player", {
+            "name": f"Bench Player {i}", "height": 80, "weight": 220, "age": 25,
+            "position": "SF", "team_id": player_team}), None),
+        ("PUT /api/player", lambda i: ("PUT", "/api/player", {
+            "player_id": player_id, "column": "Age", "new_value": 20 + i % 10}), None),
+        ("PUT /api/team", lambda i: ("PUT", "/api/team", {
+            "team_id": player_team, "column": "City", "new_value": f"City {i}"}), None),
+        ("POST /api/game", lambda i: ("POST", "/api/game", {
+            "date": "2030-02-01", "location": "Bench", "home_team_id": player_team,
+            "away_team_id": 2 if player_team != 2 else 1,
+            "home_score": 100 + i % 7, "away_score": 98}), None),
+        ("POST /api/trades", lambda i: ("POST", "/api/trades", {"moves": [
+            {"player": player_name, "to_team": other_team if i % 2 == 0 else team_name}]}),
+         None),
+        ("POST /api/player/log-game", lambda i: ("POST", "/api/player/log-game", {
+            "game_id": spare_games[i], "player_id": player_id,
+            "points": 20, "rebounds": 5, "assists": 5}), add_games),
+        ("POST /api/games/<id>/boxscore", lambda i: (
+            "POST", f"/api/games/{spare_games[i]}/boxscore",
+            [{"player_id": p, "points": 10, "rebounds": 4, "assists": 3, "minutes_played": 24}
+             for p in roster[:10]]), add_games),
+        ("POST /api/live/events", lambda i: ("POST", "/api/live/events", [
+            {"game_id": spare_games[i % 10], "player_id": roster[(i + k) % len(roster)],
+             "points": 2, "assists": k % 2} for k in range(20)]), lambda count: add_games(10)),
+    ]
+
+
+# function returns the db_operations report cases: (name, fn())
+def report_cases(db):
+    team_name = db.select_query("SELECT Name FROM Team ORDER BY TeamID LIMIT 1")[0][0]
+    player_name = db.select_query("SELECT Name FROM Player ORDER BY PlayerID LIMIT 1")[0][0]
+    return [
+        ("db.get_top_players_by_avg_points", db.get_top_players_by_avg_points),
+        ("db.get_top_players_by_avg_assists", db.get_top_players_by_avg_assists),
+        ("db.get_top_players_by_avg_rebounds", db.get_top_players_by_avg_rebounds),
+        ("db.get_team_roster", lambda: db.get_team_roster(team_name)),
+        ("db.search_player_by_name", lambda: db.search_player_by_name(player_name)),
+        ("db.get_player_id", lambda: db.get_player_id(player_name)),
+    ]
+
+
+# function times fn(i) for i in range(iterations) after a few untimed
+# warm-up calls, then measures peak allocation over a few more calls
+def measure(fn, iterations, warmup=5, memory_runs=5, before=None):
+    for i in range(warmup):
+        if before:
+            before()
+        fn(i)
+    latencies = []
+    for i in range(warmup, warmup + iterations):
+        if before:
+            before()
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for i in range(warmup + iterations, warmup + iterations + memory_runs):
+            if before:
+                before()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            fn(i)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "mean_ms": round(total / iterations * 1000, 4),
+        "throughput": round(iterations / total, 1) if total else 0.0,
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="nba_bench_")
+    try:
+        league = {"teams": args.teams, "players_per_team": args.players,
+                  "seasons": args.seasons, "games_per_team": args.games, "seed": args.seed}
+        path = os.path.join(workdir, "league.db")
+        if args.db:
+            if not os.path.exists(args.db):
+                build_sqlite(args.db, **league)
+            shutil.copyfile(args.db, path)
+        else:
+            build_sqlite(path, **league)
+
+        # app.py builds its database objects from the environment on import
+        os.environ.update(NBA_DB_BACKEND="sqlite", NBA_SQLITE_PATH=path,
+                          NBA_SLOW_QUERY_MS=os.environ.get("NBA_SLOW_QUERY_MS", "1000000"))
+        os.environ.pop("NBA_LEADERBOARD_SNAPSHOT", None)
+        import app as app_module
+        app_module.warm_up()
+        client = app_module.app.test_client()
+        clear = None if args.cached else app_module.cache.clear
+        counts = {table: app_module.db.single_record(f"SELECT COUNT(*) FROM {table}")
+                  for table in ("Team", "Player", "Game", "PlayerGameStatistics")}
+
+        results = {}
+        for name, make_request, prepare in endpoint_cases(app_module):
+            if args.only and args.only not in name:
+                continue
+            if prepare:
+                prepare(args.iterations + 10 + 5)
+
+            def call(i, make_request=make_request, name=name):
+                method, url, body = make_request(i)
+                response = client.open(url, method=method, json=body)
+                response.get_data()
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{name}: HTTP {response.status_code} "
+                                       f"{response.get_data(as_text=True)[:200]}")
+            results[name] = measure(call, args.iterations, before=clear)
+            print(format_row(name, results[name]))
+
+        for name, fn in report_cases(app_module.db):
+            if args.only and args.only not in name:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[name] = measure(lambda i, fn=fn: fn(), args.iterations)
+            print(format_row(name, results[name]))
+
+        return {
+            "meta": {
+                "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "backend": "sqlite",
+                "league": league,
+                "rows": counts,
+                "iterations": args.iterations,
+                "cached": args.cached,
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            },
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_row(name, r):
+    return (f"{name:<52} p50 {r['p50_ms']:8.3f}ms  p95 {r['p95_ms']:8.3f}ms  "
+            f"p99 {r['p99_ms']:8.3f}ms  {r['throughput']:9.1f}/s  {r['peak_alloc_kb']:8.1f}KB")
+
+
+# function compares a run with a baseline run. a case regresses when its
+# p50 or p95 is more than tolerance times the baseline and at least
+# min_delta_ms slower. returns [(case, metric, baseline, current)]
+def regressions(current, baseline, tolerance=2.0, min_delta_ms=0.2):
+    found = []
+    for name, old in baseline["results"].items():
+        new = current["results"].get(name)
+        if new is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if new[metric] > old[metric] * tolerance and new[metric] - old[metric] >= min_delta_ms:
+                found.append((name, metric, old[metric], new[metric]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API and db_operations")
+    parser.add_argument("--db", help="league SQLite file, generated if missing")
+    parser.add_argument("--teams", type=int, default=30)
+    parser.add_argument("--players", type=int, default=15, help="players per team")
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--games", type=int, default=82, help="games per team per season")
+    parser.add_argument("--seed", type=int, default=408)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--cached", action="store_true",
+                        help="keep the response cache between requests")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="allowed slowdown factor before a case fails")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write this run as the new baseline")
+    args = parser.parse_args()
+
+    result = run(args)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, skipping regression check")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"]["league"] != result["meta"]["league"]:
+        print("warning: baseline was recorded on a different league size", file=sys.stderr)
+    found = regressions(result, baseline, args.tolerance)
+    for name, metric, old, new in found:
+        print(f"REGRESSION {name}: {metric} {old:.3f}ms -> {new:.3f}ms ({new / old:.1f}x)")
+    if found:
+        raise SystemExit(f"{len(found)} regressions against {args.baseline}")
+    print(f"no regressions against {args.baseline} (tolerance {args.tolerance}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# backend/bench_trades.py
+#
+# Counts database round trips (statements + commits) for a 1-player and a
+# 15-player trade, done the old way (a SELECT and an UPDATE + commit per
+# player) and through trades.execute_trade. Runs on in-memory SQLite.
+#
+#   python bench_trades.py
+
+import time
+
+from backends import sqlite_backend
+from db_operations import db_operations
+
+
+class counting_connection():
+
+    def __init__(self, connection, counts):
+        self._connection = connection
+        self._counts = counts
+
+    def commit(self):
+        self._counts["commits"] += 1
+        return self._connection.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class counting_cursor():
+
+    def __init__(self, cursor, counts):
+        self._cursor = cursor
+        self._counts = counts
+
+    def execute(self, query, params=()):
+        self._counts["statements"] += 1
+        return self._cursor.execute(query, params)
+
+    def executemany(self, query, seq_of_params):
+        self._counts["statements"] += 1
+        return self._cursor.executemany(query, seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# sqlite backend whose connections and cursors count their round trips
+class counting_backend(sqlite_backend):
+
+    def __init__(self):
+        self.counts = {"statements": 0, "commits": 0}
+        super().__init__()
+
+    def connect(self):
+        return counting_connection(super().connect(), self.counts)
+
+    def ping(self, connection):
+        return super().ping(connection._connection)
+
+    def cursor(self, connection):
+        return counting_cursor(super().cursor(connection._connection), self.counts)
+
+    def reset_counts(self):
+        self.counts.update(statements=0, commits=0)
+
+
+# the pre-engine trade_multiple_players, kept here for comparison
+def legacy_trade(db, playernames, newteamname):
+    team_id = db.get_team_id(newteamname)
+    for playername in playernames:
+        player_id = db.get_player_id(playername)
+        db.modify_query_params("UPDATE Player SET TeamID = %s WHERE PlayerID = %s;",
+                               (team_id, player_id))
+
+
+def setup(backend):
+    db = db_operations(backend=backend, pool_size=1)
+    db.create_all_tables()
+    for team in ("East", "West"):
+        db.modify_query_params(
+            "INSERT INTO Team (Name, City, Division, Conference) VALUES (%s, %s, %s, %s)",
+            (team, team, team, team))
+    db.bulk_insert(
+        "INSERT INTO Player (Name, Height, Weight, Age, Position, TeamID) VALUES (%s, %s, %s, %s, %s, %s)",
+        [(f"Player {i}", 80, 220, 25, "SF", 1) for i in range(30)])
+    return db
+
+
+def measure(backend, label, fn):
+    backend.reset_counts()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    trips = backend.counts["statements"] + backend.counts["commits"]
+    print(f"{label:<28} {backend.counts['statements']:>4} statements "
+          f"{backend.counts['commits']:>4} commits  {trips:>4} round trips  "
+          f"{elapsed * 1000:7.2f}ms")
+
+
+def main():
+    backend = counting_backend()
+    db = setup(backend)
+    for size in (1, 15):
+        names = [f"Player {i}" for i in range(size)]
+        measure(backend, f"legacy, {size} player(s)",
+                lambda: legacy_trade(db, names, "West"))
+        measure(backend, f"trade engine, {size} player(s)",
+                lambda: db.trade([(n, "East") for n in names]))
+    # a three-team trade costs the same
+    db.trade([("Player 20", "West")])
+    measure(backend, "trade engine, 3 teams",
+            lambda: db.trade([("Player 0", "West"), ("Player 20", "East"),
+                              ("Player 1", "West")]))
+    db.destructor()
+
+
+if __name__ == "__main__":
+    main()
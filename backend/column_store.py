@@ -0,0 +1,486 @@
+# backend/column_store.py
+#
+# NumPy column store of PlayerGameStatistics joined with Game. Loaded once
+# at startup and appended to by the box-score write routes, it answers the
+# per-player game-log and split queries with vectorized group-bys instead
+# of hitting the database.
+#
+# Home/away and opponent are worked out from the team a box score was
+# played for (PlayerGameStatistics.TeamID, see migrations) and the game's
+# Home/AwayTeamID, so a trade does not move a player's old games to the
+# other side. Rows logged after startup take the player's team at the time.
+#
+# Started from a league snapshot (snapshot.py), the snapshot's rows are
+# read in place from its memory mapping, so every worker on the host
+# shares those pages. Rows and live increments arriving afterwards go to
+# private overlay arrays / a per-row delta map (copy on write). Reads
+# check the snapshot_watcher for a newly published file and swap it in,
+# replaying the writes committed after the box-score write version the
+# file was exported at, and the live increments not committed yet.
+
+import threading
+
+import numpy as np
+
+from aggregates import STAT_COLUMNS
+from queries import batch
+
+# json keys for the stat columns, same order as STAT_COLUMNS
+STAT_KEYS = ["points", "rebounds", "assists", "blocks", "steals",
+             "turnovers", "minutes_played", "fouls"]
+
+_LOAD_QUERY = f'''
+SELECT PlayerGameStatistics.GameID, PlayerGameStatistics.PlayerID,
+       {", ".join(f"PlayerGameStatistics.{c}" for c in STAT_COLUMNS)},
+       Game.Date, Game.HomeTeamID, Game.AwayTeamID, PlayerGameStatistics.TeamID
+FROM PlayerGameStatistics
+JOIN Game ON Game.GameID = PlayerGameStatistics.GameID
+JOIN Player ON Player.PlayerID = PlayerGameStatistics.PlayerID
+'''
+
+# is_home values
+HOME, AWAY, UNKNOWN = 1, 0, -1
+
+
+def _to_date(value):
+    return np.datetime64(str(value), "D") if value is not None else np.datetime64("NaT")
+
+
+def _side(team_id, home_team_id, away_team_id):
+    if team_id is not None and team_id == home_team_id:
+        return HOME, away_team_id
+    if team_id is not None and team_id == away_team_id:
+        return AWAY, home_team_id
+    return UNKNOWN, -1
+
+
+# function averages every stat per distinct key.
+# returns [(key, games, stat means)] sorted by key
+def group_means(keys, stats):
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(unique))
+    sums = np.stack([np.bincount(inverse, weights=column, minlength=len(unique))
+                     for column in stats.T], axis=1)
+    means = sums / counts[:, None]
+    return [(key, int(n), row) for key, n, row in zip(unique, counts, means)]
+
+
+def _stat_dict(means):
+    return {key: round(float(v), 2) for key, v in zip(STAT_KEYS, means)}
+
+
+# function returns a lookup of ids -> row positions: (sorted ids, their
+# rows), with ids as they are when already sorted (no copy)
+def _sorted_index(ids):
+    if len(ids) < 2 or bool(np.all(ids[1:] >= ids[:-1])):
+        return ids, None
+    order = np.argsort(ids, kind="stable")
+    return ids[order], order
+
+
+# function returns (found mask, row positions) of keys in a _sorted_index
+def _find(index, keys):
+    ids, order = index
+    if len(ids) == 0:
+        return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=np.int64)
+    pos = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+    found = ids[pos] == keys
+    return found, (pos if order is None else order[pos])
+
+
+# PlayerGameStatistics of one snapshot, read from its mapping. Only the
+# per-player row ranges and the id lookups are private; snapshot.export
+# writes box scores ordered by player, so a player's rows are one range
+class _snapshot_rows():
+
+    def __init__(self, snap):
+        table = "PlayerGameStatistics"
+        self.snap = snap
+        # box-score writes up to this version are in the file; older files
+        # without it get every logged write replayed
+        self.version = snap.header.get("box_score_version", 0)
+        self.game_id = snap.column(table, "GameID")
+        self.player_id = snap.column(table, "PlayerID")
+        # read-only views, except for columns with NULLs (filled copies)
+        self.stats = [snap.ints(table, column, fill=0) for column in STAT_COLUMNS]
+
+        ids, self.order = _sorted_index(self.player_id)
+        starts = np.flatnonzero(np.diff(ids)) + 1 if len(ids) else np.array([], dtype=np.int64)
+        bounds = np.concatenate(([0], starts, [len(ids)])).tolist() if len(ids) else []
+        self.ranges = {int(ids[a]): (a, b) for a, b in zip(bounds[:-1], bounds[1:])}
+
+        self.games = _sorted_index(snap.column("Game", "GameID"))
+        self.game_date = snap.column("Game", "Date")
+        self.home = snap.ints("Game", "HomeTeamID")
+        self.away = snap.ints("Game", "AwayTeamID")
+        self.players = _sorted_index(snap.column("Player", "PlayerID"))
+        # files from before box scores recorded their team fall back to
+        # the players' teams
+        self.row_team = (snap.ints(table, "TeamID") if "TeamID" in snap.columns(table)
+                         else None)
+        self.team = snap.ints("Player", "TeamID")
+
+    # function returns the snapshot rows of a player
+    def rows(self, player_id):
+        start, end = self.ranges.get(player_id, (0, 0))
+        if self.order is None:
+            return np.arange(start, end)
+        return self.order[start:end]
+
+    # function returns the row holding (game_id, player_id), or None
+    def find(self, game_id, player_id):
+        rows = self.rows(player_id)
+        match = rows[self.game_id[rows] == game_id]
+        return int(match[0]) if len(match) else None
+
+    # function joins rows with Game and Player as _LOAD_QUERY does: returns
+    # (rows kept, dates, is_home, opponent) for rows whose game and player
+    # exist in the snapshot
+    def join(self, rows):
+        has_game, game_rows = _find(self.games, self.game_id[rows])
+        has_player, player_rows = _find(self.players, self.player_id[rows])
+        keep = has_game & has_player
+        game_rows, player_rows = game_rows[keep], player_rows[keep]
+        team = self.team[player_rows] if self.row_team is None else self.row_team[rows[keep]]
+        home, away = self.home[game_rows], self.away[game_rows]
+        is_home = np.where((team >= 0) & (team == home), HOME,
+                           np.where((team >= 0) & (team == away), AWAY, UNKNOWN))
+        opponent = np.where(is_home == HOME, away, np.where(is_home == AWAY, home, -1))
+        return rows[keep], self.game_date[game_rows], is_home.astype(np.int8), opponent
+
+    # function returns the stats of rows, as a new (rows, stats) array
+    def stat_rows(self, rows):
+        return np.stack([column[rows] for column in self.stats], axis=1)
+
+
+class box_score_store():
+
+    # snapshot: optional snapshot.snapshot_watcher to load from instead of
+    # the database (new rows are still looked up in db)
+    def __init__(self, db, capacity=1024, snapshot=None):
+        self.db = db
+        self.snapshot = snapshot
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._base = None           # _snapshot_rows, when loaded from a snapshot
+        self._base_deltas = {}      # snapshot row -> live increments on top of it
+        self._log = []              # (write version, kind, rows) committed since, for replays
+        self._unflushed = {}        # (GameID, PlayerID) -> live increments not committed yet
+        self.generation = 0         # bumped by every (re)load
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self._size = 0
+        self.game_id = np.zeros(capacity, dtype=np.int32)
+        self.player_id = np.zeros(capacity, dtype=np.int32)
+        self.stats = np.zeros((capacity, len(STAT_COLUMNS)), dtype=np.int32)
+        self.date = np.full(capacity, np.datetime64("NaT"), dtype="datetime64[D]")
+        self.is_home = np.full(capacity, UNKNOWN, dtype=np.int8)
+        self.opponent = np.full(capacity, -1, dtype=np.int32)
+        self._rows_by_player = {}
+        self._games = {}
+
+    def _grow(self, needed):
+        capacity = len(self.game_id)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("game_id", "player_id", "stats", "date", "is_home", "opponent"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    # caller holds the lock
+    def _append(self, game_id, player_id, stats, date, side, opponent):
+        i = self._size
+        self._grow(i + 1)
+        self.game_id[i] = game_id
+        self.player_id[i] = player_id
+        self.stats[i] = [v or 0 for v in stats]
+        self.date[i] = date
+        self.is_home[i] = side
+        self.opponent[i] = opponent
+        self._rows_by_player.setdefault(player_id, []).append(i)
+        self._size = i + 1
+
+    # function (re)loads every box score from the snapshot when there is
+    # one, from the database otherwise
+    def load(self):
+        if self.snapshot is not None:
+            self._load_snapshot(self.snapshot.current())
+            return
+        rows = self.db.select_query(_LOAD_QUERY)
+        with self._lock:
+            self._allocate(max(1024, len(rows)))
+            for row in rows:
+                game_id, player_id = row[0], row[1]
+                stats = row[2:2 + len(STAT_COLUMNS)]
+                date, home, away, team = row[2 + len(STAT_COLUMNS):]
+                self._games[game_id] = (_to_date(date), home, away)
+                side, opponent = _side(team, home, away)
+                self._append(game_id, player_id, stats, self._games[game_id][0], side, opponent)
+            self._loaded = True
+            self.generation += 1
+
+    # function serves the snapshot's rows in place, then replays the
+    # writes made since it was created
+    def _load_snapshot(self, snap):
+        base = _snapshot_rows(snap)
+        with self._lock:
+            self._base = base
+            self._base_deltas = {}
+            self._allocate(1024)
+            for game_id, date, home, away in zip(snap.column("Game", "GameID").tolist(),
+                                                 base.game_date, base.home.tolist(),
+                                                 base.away.tolist()):
+                self._games[game_id] = (date, None if home < 0 else home,
+                                        None if away < 0 else away)
+            self._loaded = True
+            # writes the file was exported after are part of it already;
+            # increments not committed yet cannot be
+            self._log = [entry for entry in self._log
+                         if entry[0] is None or entry[0] > base.version]
+            for _, kind, rows in self._log:
+                if kind == "rows":
+                    self._insert([row for row in rows if base.find(row[0], row[1]) is None])
+                else:
+                    self._apply_deltas(rows)
+            self._apply_deltas([key + tuple(deltas.tolist())
+                                for key, deltas in self._unflushed.items()])
+            self.generation += 1
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    # function swaps in a newer snapshot if one was published since the
+    # last check. returns the current generation, e.g. for cache keys
+    def refresh(self):
+        if self.snapshot is not None and self._loaded:
+            snap = self.snapshot.current()
+            with self._lock:
+                if self._base is None or snap is not self._base.snap:
+                    self._load_snapshot(snap)
+        return self.generation
+
+    # caller holds the lock. appends rows, looking up unseen games and
+    # the players' teams
+    def _insert(self, rows, games=None, teams=None):
+        games, teams = self._lookup(rows, games, teams)
+        self._games.update(games)
+        for row in rows:
+            date, home, away = self._games.get(row[0], (np.datetime64("NaT"), None, None))
+            side, opponent = _side(teams.get(row[1]), home, away)
+            self._append(row[0], row[1], row[2:], date, side, opponent)
+
+    # function fetches the games not seen yet and the players' teams of
+    # rows, one query each whatever the rows
+    def _lookup(self, rows, games=None, teams=None):
+        games, teams = dict(games or {}), dict(teams or {})
+        game_ids = sorted(game_id for game_id in {row[0] for row in rows}
+                          if game_id not in self._games and game_id not in games)
+        if game_ids:
+            for game_id, date, home, away in self.db.select_query_params(
+                    *batch("games.by_ids", "ids", game_ids)):
+                games[game_id] = (_to_date(date), home, away)
+        player_ids = sorted({row[1] for row in rows} - set(teams))
+        if player_ids:
+            teams.update(dict.fromkeys(player_ids))
+            teams.update(self.db.select_query_params(
+                *batch("players.teams_by_ids", "ids", player_ids)))
+        return games, teams
+
+    # caller holds the lock
+    def _apply_deltas(self, rows):
+        new_rows = []
+        for row in rows:
+            deltas = [v or 0 for v in row[2:]]
+            base_row = self._base.find(row[0], row[1]) if self._base is not None else None
+            if base_row is not None:
+                # the snapshot is read-only: increments live beside it
+                current = self._base_deltas.get(base_row)
+                if current is None:
+                    current = self._base_deltas[base_row] = np.zeros(len(STAT_COLUMNS),
+                                                                     dtype=np.int64)
+                current += deltas
+                continue
+            index = self._rows_by_player.get(row[1], [])
+            # live games are the player's most recent rows
+            i = next((i for i in reversed(index) if self.game_id[i] == row[0]), None)
+            if i is None:
+                new_rows.append(row)
+            else:
+                self.stats[i] += deltas
+        if new_rows:
+            self._insert(new_rows)
+
+    # function appends freshly logged PlayerGameStatistics rows
+    # (aggregates.BOX_SCORE_COLUMNS order). version: the box-score write
+    # version they were committed at (db_operations.log_box_scores)
+    def add_box_scores(self, rows, version=None):
+        if not self._loaded:
+            return
+        rows = [tuple(row) for row in rows]
+        # look up unseen games and the players' teams outside the lock
+        games, teams = self._lookup(rows)
+        with self._lock:
+            if self._base is not None:
+                if version is not None and version <= self._base.version:
+                    # a snapshot swapped in since the commit holds them already
+                    return
+                self._log.append((version, "rows", rows))
+            self._insert(rows, games, teams)
+
+    # function adds stat increments (BOX_SCORE_COLUMNS order) to the
+    # matching rows, appending rows for games a player had no line in yet.
+    # they count as not committed until deltas_flushed reports them
+    def add_stat_deltas(self, rows):
+        if not self._loaded:
+            return
+        rows = [tuple(row) for row in rows]
+        with self._lock:
+            if self._base is not None:
+                for row in rows:
+                    pending = self._pending_deltas(row[:2])
+                    pending += [v or 0 for v in row[2:]]
+            self._apply_deltas(rows)
+
+    # function records that increments given to add_stat_deltas were
+    # committed at a box-score write version (live_scoring's flush)
+    def deltas_flushed(self, rows, version):
+        rows = [tuple(row) for row in rows]
+        with self._lock:
+            if self._base is None:
+                return
+            for row in rows:
+                pending = self._pending_deltas(row[:2])
+                pending -= [v or 0 for v in row[2:]]
+                if not pending.any():
+                    del self._unflushed[row[:2]]
+            if version is not None and version <= self._base.version:
+                # a snapshot swapped in since the commit holds them already,
+                # on top of which they were replayed as uncommitted
+                self._apply_deltas([row[:2] + tuple(-(v or 0) for v in row[2:])
+                                    for row in rows])
+            else:
+                self._log.append((version, "deltas", rows))
+
+    # caller holds the lock
+    def _pending_deltas(self, key):
+        pending = self._unflushed.get(key)
+        if pending is None:
+            pending = self._unflushed[key] = np.zeros(len(STAT_COLUMNS), dtype=np.int64)
+        return pending
+
+    # caller holds the lock. returns (rows, dates, game ids, stats,
+    # is_home, opponent) of the snapshot rows given, increments applied
+    def _base_rows(self, rows):
+        rows, dates, is_home, opponent = self._base.join(rows)
+        stats = self._base.stat_rows(rows)
+        if self._base_deltas:
+            for k, row in enumerate(rows.tolist()):
+                deltas = self._base_deltas.get(row)
+                if deltas is not None:
+                    stats[k] += deltas.astype(stats.dtype)
+        return rows, dates, self._base.game_id[rows], stats, is_home, opponent
+
+    # function returns (player ids, stats) of every row, as copies safe to
+    # use without the lock
+    def columns(self):
+        self.refresh()
+        with self._lock:
+            self._ensure_loaded()
+            player_id, stats = self.player_id[:self._size], self.stats[:self._size]
+            if self._base is None:
+                return player_id.copy(), stats.copy()
+            rows, _, _, base_stats, _, _ = self._base_rows(np.arange(len(self._base.game_id)))
+            return (np.concatenate([self._base.player_id[rows], player_id]),
+                    np.concatenate([base_stats, stats]))
+
+    # function returns (dates, game ids, stats, is_home, opponent) for a
+    # player's games in date order, as copies safe to use without the lock
+    def player_rows(self, player_id):
+        self.refresh()
+        with self._lock:
+            self._ensure_loaded()
+            index = np.array(self._rows_by_player.get(player_id, []), dtype=np.int64)
+            parts = [(self.date[index], self.game_id[index], self.stats[index],
+                      self.is_home[index], self.opponent[index])]
+            if self._base is not None:
+                parts.append(self._base_rows(self._base.rows(player_id))[1:])
+        dates, game_ids, stats, is_home, opponent = (np.concatenate(p) for p in zip(*parts))
+        order = np.lexsort((game_ids, dates))
+        return dates[order], game_ids[order], stats[order], is_home[order], opponent[order]
+
+    # function returns the player's games, oldest first
+    def game_log(self, player_id):
+        dates, game_ids, stats, is_home, opponent = self.player_rows(player_id)
+        log = []
+        for date, game_id, line, side, opp in zip(dates, game_ids, stats.tolist(),
+                                                  is_home, opponent):
+            entry = {
+                "game_id": int(game_id),
+                "date": None if np.isnat(date) else str(date),
+                "home": None if side == UNKNOWN else bool(side == HOME),
+                "opponent_team_id": None if opp < 0 else int(opp),
+            }
+            entry.update(zip(STAT_KEYS, line))
+            log.append(entry)
+        return log
+
+    # function returns the player's averages overall, home/away, by month,
+    # by opponent and over their last n games for each n in last_n.
+    # with rolling=n it also returns the n-game rolling average after
+    # every game
+    def splits(self, player_id, last_n=(5, 10, 20), rolling=None):
+        dates, _, stats, is_home, opponent = self.player_rows(player_id)
+        games = len(stats)
+        result = {"player_id": player_id, "games": games}
+        if games == 0:
+            return result
+        values = stats.astype(np.float64)
+
+        result["overall"] = _stat_dict(values.mean(axis=0))
+
+        sides = {HOME: "home", AWAY: "away", UNKNOWN: "unknown"}
+        result["home_away"] = {
+            sides[int(key)]: dict(games=n, **_stat_dict(means))
+            for key, n, means in group_means(is_home, values)
+        }
+
+        months = dates.astype("datetime64[M]")
+        known = ~np.isnat(months)
+        result["by_month"] = [
+            dict(month=str(key), games=n, **_stat_dict(means))
+            for key, n, means in group_means(months[known], values[known])
+        ]
+
+        known = opponent >= 0
+        result["by_opponent"] = [
+            dict(opponent_team_id=int(key), games=n, **_stat_dict(means))
+            for key, n, means in group_means(opponent[known], values[known])
+        ]
+
+        # rolling averages: cumulative sums give every window in one pass
+        cumulative = np.vstack([np.zeros(len(STAT_COLUMNS)), np.cumsum(values, axis=0)])
+        result["last_n"] = {}
+        for n in last_n:
+            if n <= 0:
+                continue
+            window = min(n, games)
+            result["last_n"][str(n)] = dict(
+                games=window,
+                **_stat_dict((cumulative[-1] - cumulative[-1 - window]) / window))
+
+        if rolling and rolling > 0:
+            ends = np.arange(1, games + 1)
+            starts = np.maximum(ends - rolling, 0)
+            means = (cumulative[ends] - cumulative[starts]) / (ends - starts)[:, None]
+            result["rolling"] = {
+                "window": rolling,
+                "games": [dict(date=None if np.isnat(d) else str(d), **_stat_dict(m))
+                          for d, m in zip(dates, means)],
+            }
+        return result
@@ -0,0 +1,120 @@
+# backend/csv_parser.py
+#
+# Schema-aware CSV parsing. Column types come from the target table's
+# schema, rows are split by the csv module (so quoted commas survive)
+# and each column is converted in one pass with a single converter,
+# instead of helper.convert trying int, float and str cell by cell.
+
+import csv
+from datetime import date
+from itertools import chain, islice
+
+
+# function maps a SQL column type to the converter kind used below
+def type_kind(sql_type):
+    sql_type = sql_type.upper()
+    if "INT" in sql_type:
+        return "int"
+    if any(t in sql_type for t in ("DECIMAL", "NUMERIC", "FLOAT", "DOUBLE", "REAL")):
+        return "float"
+    if sql_type.startswith("DATE"):
+        return "date"
+    return "str"
+
+
+# function returns {column: kind} for a table, read from the live schema
+def table_types(db, table):
+    return {name: type_kind(sql_type)
+            for name, sql_type in db.backend.column_types(db, table)}
+
+
+# exports often write whole numbers as "5.0"; real fractions are refused
+def _int(value):
+    if not value.strip():
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f"'{value.strip()}' is not a whole number") from None
+        return int(number)
+
+
+def _int_column(values):
+    try:
+        return list(map(int, values))
+    except ValueError:
+        return list(map(_int, values))
+
+
+def _float_column(values):
+    try:
+        return list(map(float, values))
+    except ValueError:
+        return [float(v) if v.strip() else None for v in values]
+
+
+def _date_column(values):
+    return [date.fromisoformat(v.strip()) if v.strip() else None for v in values]
+
+
+def _str_column(values):
+    return [v.strip() or None for v in values]
+
+
+_CONVERTERS = {
+    "int": _int_column,
+    "float": _float_column,
+    "date": _date_column,
+    "str": _str_column,
+}
+
+
+class typed_parser():
+
+    # kinds: converter kind per file column ("int", "float", "date", "str")
+    def __init__(self, kinds):
+        self.kinds = list(kinds)
+        self._converters = [_CONVERTERS[k] for k in self.kinds]
+
+    # function builds a parser for columns of table, in file order
+    @staticmethod
+    def for_table(db, table, columns):
+        types = table_types(db, table)
+        missing = [c for c in columns if c not in types]
+        if missing:
+            raise ValueError(f"{table} has no column(s) {', '.join(missing)}")
+        return typed_parser(types[c] for c in columns)
+
+    # function converts a list of raw string rows into insert-ready tuples,
+    # one column at a time. first_line is only used in error messages
+    def parse_rows(self, rows, first_line=1):
+        width = len(self.kinds)
+        if set(map(len, rows)) - {width, 0}:
+            for number, row in enumerate(rows, start=first_line):
+                if row and len(row) != width:
+                    raise ValueError(f"line {number}: expected {width} fields, got {len(row)}")
+        # flatten once and slice out each column; much cheaper than zip(*rows)
+        flat = list(chain.from_iterable(rows))
+        if not flat:
+            return []
+        columns = [convert(flat[i::width]) for i, convert in enumerate(self._converters)]
+        return list(zip(*columns))
+
+    # function yields (lines consumed, parsed tuples) for chunks of at most
+    # batch_size lines, after skipping the first `skip` lines
+    def parse_file(self, path, batch_size=5000, skip=0, header=False):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            if header:
+                next(reader, None)
+            for _ in islice(reader, skip):
+                pass
+            line = skip + 1
+            while True:
+                chunk = list(islice(reader, batch_size))
+                if not chunk:
+                    break
+                yield len(chunk), self.parse_rows(chunk, first_line=line)
+                line += len(chunk)
@@ -1,144 +1,142 @@
-import mysql.connector
+import aggregates
+import loader
+import migrations
+import queries
+import trades
+from contextlib import contextmanager
+from backends import mysql_backend
 from helper import helper
+from pool import connection_pool
+
+# league tables, parents before children
+TABLES = ["Team", "Coach", "Player", "Game", "PlayerGameStatistics",
+          "PlayerStatTotals"]
+
+
+# raised by log_box_scores for rows that cannot be inserted; nothing has
+# been written. conflict is True when a row is already there
+class BoxScoreError(ValueError):
+
+    def __init__(self, message, conflict=False):
+        super().__init__(message)
+        self.conflict = conflict
+
 
 class db_operations():
 
-    def __init__(self):
-        # Make connection
-        self.connection = mysql.connector.connect(host="localhost",
-            user= "root",
-            password= "CPSC408!",
-            auth_plugin= 'mysql_native_password',
-            database = "NBA")
-        print("Connection made...")
-        self.cursor = self.connection.cursor()
-        print("Cursor object made...")
+    # backend: storage engine from backends.py (MySQL when omitted)
+    # pool_size: max connections shared by all threads using this object
+    # pool_timeout: seconds a caller waits for a free connection
+    # metrics: metrics.metrics_registry timing every statement, optional
+    # versions: versions.data_versions bumped after every committed write,
+    #   optional
+    def __init__(self, backend=None, pool_size=5, pool_timeout=30, metrics=None,
+                 versions=None):
+        self.backend = backend if backend is not None else mysql_backend()
+        self.metrics = metrics
+        self.versions = versions
+        # Make connection pool; connections are opened lazily on checkout
+        self.pool = connection_pool(self.backend.connect, size=pool_size,
+            timeout=pool_timeout, ping=self.backend.ping)
+        print(f"Connection pool made ({self.backend.name})...")
+
+    # context manager that checks out a connection and cursor for the
+    # duration of the block. with commit=True the block runs as one
+    # transaction: committed on success, rolled back on error
+    @contextmanager
+    def get_cursor(self, commit=False):
+        with self.pool.connection() as connection:
+            cursor = self.backend.cursor(connection)
+            if self.metrics is not None:
+                cursor = self.metrics.wrap(cursor)
+            try:
+                yield cursor
+                if commit:
+                    connection.commit()
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    # e.g. unread rows left by a stream closed early; the
+                    # pool then fails the rollback and drops the connection
+                    pass
+
+    # shorthand for a committed block of statements
+    def transaction(self):
+        return self.get_cursor(commit=True)
+
+    # context manager like get_cursor for a single statement: yields a
+    # cursor prepared for query (server-side on MySQL, reused for the
+    # life of the pooled connection)
+    @contextmanager
+    def get_statement(self, query, commit=False):
+        with self.pool.connection() as connection:
+            cursor = self.backend.statement(connection, query)
+            timed = self.metrics.wrap(cursor) if self.metrics is not None else None
+            try:
+                yield timed or cursor
+                if commit:
+                    connection.commit()
+            finally:
+                if timed is not None:
+                    timed.finish()
+                try:
+                    self.backend.release_statement(cursor)
+                except Exception:
+                    pass
+
+    # function compiles query against the schema without running it;
+    # raises the driver's error for broken SQL. see queries.self_test
+    def check_statement(self, query):
+        with self.pool.connection() as connection:
+            self.backend.check_statement(connection, query)
 
 #=============================================================
 # FUNCTIONS FOR CREATING TABLES AND POPULATING
-    def create_team(self):
-        query = '''
-        CREATE TABLE Team (
-            TeamID INT PRIMARY KEY AUTO_INCREMENT,
-            Name VARCHAR(70),
-            City VARCHAR(70),
-            Division VARCHAR(30),
-            Conference VARCHAR(30),
-        );
-        '''
-        self.cursor.execute(query)
-        print('Team Table Created')
-
-    def create_coach(self):
-        query = '''
-        CREATE TABLE Coach (
-            CoachID INT PRIMARY KEY AUTO_INCREMENT,
-            Name VARCHAR(80),
-            Salary INT,
-            TeamID INT
-        );
-        '''
-        self.cursor.execute(query)
-        print('Coach Table Created')
-
-    def create_player(self):
-        query = '''
-        CREATE TABLE Player (
-            PlayerID INT PRIMARY KEY AUTO_INCREMENT,
-            Name VARCHAR(70),
-            Height INT,
-            Weight INT,
-            Age INT,
-            Position VARCHAR(2),
-            TeamID INT
-        );
-        '''
-        self.cursor.execute(query)
-        print('Player Table Created')
-
-    def create_game(self):
-        query = '''
-        CREATE TABLE Game (
-            GameID INT PRIMARY KEY AUTO_INCREMENT,
-            Date DATE,
-            Location VARCHAR(80),
-            HomeTeamID INT,
-            AwayTeamID INT,
-            HomeScore INT,
-            AwayScore INT
-        );
-        '''
-        self.cursor.execute(query)
-        print('Game Table Created')        
-
-    def create_playergamestatistics(self):
-        query = '''
-        CREATE TABLE PlayerGameStatistics (
-            GameID INT,
-            PlayerID INT,
-            Points INT,
-            Rebounds INT,
-            Assists INT,
-            Blocks INT,
-            Steals INT,
-            Turnovers INT,
-            MinutesPlayed INT,
-            Fouls INT,
-            PRIMARY KEY (GameID, PlayerID),
-            FOREIGN KEY (GameID) REFERENCES Game(GameID),
-            FOREIGN KEY (PlayerID) REFERENCES Player(PlayerID)
-        );
-        '''
-        self.cursor.execute(query)
-        print('PlayerGameStatistics Table Created')   
-
-    def update_fk_tables(self):
-        query = '''
-        ALTER TABLE Coach
-        ADD CONSTRAINT fk_coach_team
-        FOREIGN KEY (TeamID) REFERENCES Team(TeamID);
-
-        ALTER TABLE Player
-        ADD CONSTRAINT fk_player_team
-        FOREIGN KEY (TeamID) REFERENCES Team(TeamID);
-
-        ALTER TABLE Game
-        ADD CONSTRAINT fk_home_game_team
-        FOREIGN KEY (HomeTeamID) REFERENCES Team(TeamID),
-        ADD CONSTRAINT fk_away_game_team
-        FOREIGN KEY (AwayTeamID) REFERENCES Team(TeamID);
-        '''
-        self.cursor.execute(query)
-        print('Foreign Keys Updated')    
-
+    # function brings the schema up to date, see migrations.py
     def create_all_tables(self):
-        self.create_team()
-        self.create_coach()
-        self.create_player()
-        self.create_game()
-        self.create_playergamestatistics()
-        self.update_fk_tables()
+        migrations.migrate(self)
+        self._changed_all()
 
     #incase tables are messed up and need to be deleted and readded
     def reset(self):
-        query = '''
-        DROP TABLE Team;
-        DROP TABLE Coach;
-        DROP TABLE Player;
-        DROP TABLE Game;
-        DROP TABLE PlayerGameStatistics;
-        '''
-        self.cursor.execute(query)
-        print('All tables deleted')
-
+        migrations.reset(self)
+        self._changed_all()
+
+    # bump the data versions of tables / the table query writes to, once
+    # the write is committed
+    def _changed(self, *tables, query=None):
+        if self.versions is not None:
+            if query is not None:
+                self.versions.changed(query)
+            self.versions.bump(*tables)
+
+    def _changed_all(self):
+        if self.versions is not None:
+            self.versions.bump_all()
+
+    # function streams a headerless CSV file into table in batched
+    # transactions; values is the comma separated column list
     def populate_table(self, table, filepath, values):
-        data = helper.data_cleaner(filepath)
-        attribute_count = len(data[0])
-        placeholders = ("%s,"*attribute_count)[:-1]
-        query = f"INSERT INTO {table} ({values}) VALUES("+placeholders+")"
-        self.bulk_insert(query, data)
+        columns = [v.strip() for v in values.split(",")]
+        loader.load_csv(self, table, filepath, columns)
+        self._changed(table)
         print(f"Populated {table}")
 
+    # function copies every league table into another db_operations
+    # whose tables already exist, e.g. MySQL -> SQLite snapshot
+    def copy_to(self, target, batch_size=5000):
+        for table in TABLES:
+            with self.get_cursor() as cursor:
+                cursor.execute(f"SELECT * FROM {table}")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    placeholders = ("%s,"*len(rows[0]))[:-1]
+                    target.bulk_insert(f"INSERT INTO {table} VALUES({placeholders})", rows)
+            print(f"Copied {table}")
+
 #=============================================================
 
 
@@ -146,72 +144,33 @@ class db_operations():
 # -----------------------------
 # REPORTS & SPECIAL QUERIES
 # -----------------------------
-    def get_top_players_by_avg_points(self):
-        query = f'''
-        SELECT
-            Player.PlayerID,
-            Player.Name,
-            AVG(PlayerGameStatistics.Points) AS avg_points
-        FROM Player
-        JOIN PlayerGameStatistics ON Player.PlayerID = PlayerGameStatistics.PlayerID
-        GROUP BY Player.PlayerID, Player.name
-        ORDER BY avg_points DESC
-        LIMIT 10;
-        '''
-        result = self.select_query(query)
+    # function prints the top n players by per-game average of a
+    # PlayerStatTotals column (Points, Assists, Rebounds, ...)
+    def get_top_players_by_avg(self, column, n=10):
+        if column not in aggregates.STAT_COLUMNS:
+            raise ValueError(f"Invalid column '{column}'")
+        result = self.select_query_params(queries.sql(f"leaders.avg.{column}"), (n,))
         return helper.pretty_print(result)
 
+    def get_top_players_by_avg_points(self):
+        return self.get_top_players_by_avg("Points")
+
     def get_top_players_by_avg_assists(self):
-        query = f'''
-        SELECT
-            Player.PlayerID,
-            Player.Name,
-            AVG(PlayerGameStatistics.Assists) AS avg_assists
-        FROM Player
-        INNER JOIN PlayerGameStatistics ON Player.PlayerID = PlayerGameStatistics.PlayerID
-        GROUP BY Player.PlayerID, Player.name
-        ORDER BY avg_assists DESC
-        LIMIT 10;
-        '''
-        result = self.select_query(query)
-        return helper.pretty_print(result)
+        return self.get_top_players_by_avg("Assists")
 
     def get_top_players_by_avg_rebounds(self):
-        query = f'''
-        SELECT
-            Player.PlayerID,
-            Player.Name,
-            AVG(PlayerGameStatistics.Rebounds) AS avg_rebounds
-        FROM Player
-        INNER JOIN PlayerGameStatistics ON Player.PlayerID = PlayerGameStatistics.PlayerID
-        GROUP BY Player.PlayerID, Player.name
-        ORDER BY avg_rebounds DESC
-        LIMIT 10;
-        '''
-        result = self.select_query(query)
-        return helper.pretty_print(result)
+        return self.get_top_players_by_avg("Rebounds")
 
     def get_team_roster(self, team_name):
-        query = '''
-        SELECT PlayerID, Player.Name, Position, Player.Age
-        FROM Player
-        INNER JOIN Team ON Player.TeamID = Team.TeamID
-        WHERE Team.name = %s
-        '''
         record = (team_name,)
-        result = self.select_query_params(query, record)
+        result = self.select_query_params(queries.sql("team.roster"), record)
         return helper.pretty_print(result)
 
 
 
     def search_player_by_name(self, name):
-        query = '''
-        SELECT *
-        FROM Player
-        WHERE Player.name = %s
-        '''
         record = (name,)
-        result = self.select_query_params(query, record)
+        result = self.select_query_params(queries.sql("player.by_name"), record)
         return helper.pretty_print(result)
 
 #=============================================================
@@ -219,62 +178,118 @@ class db_operations():
 
 
 
+# -----------------------------
+# BOX SCORES
+# -----------------------------
+
+    # function inserts PlayerGameStatistics rows (aggregates.BOX_SCORE_COLUMNS
+    # order), recording the players' teams, and folds them into PlayerStatTotals in one transaction.
+    # returns the box-score write version it committed (aggregates.py).
+    # raises BoxScoreError for unknown games or players and for rows
+    # already there, leaving nothing written
+    def log_box_scores(self, rows):
+        rows = [tuple(row) for row in rows]
+        if not rows:
+            return None
+        try:
+            with self.transaction() as cursor:
+                self._check_box_scores(cursor, rows)
+                cursor.executemany(queries.sql("box_score.add"), rows)
+                cursor.execute(*queries.batch("box_score.fill_teams", "ids",
+                                              sorted({row[0] for row in rows})))
+                aggregates.apply_box_scores(cursor, self.backend, rows)
+                version = aggregates.bump_version(cursor)
+        except Exception as e:
+            # a row inserted by someone else since the check
+            if self.backend.is_integrity_error(e):
+                raise BoxScoreError(f"Box score rows already exist: {e}", conflict=True)
+            raise
+        self._changed("PlayerGameStatistics")
+        return version
+
+    # caller holds a transaction. checks rows against the games, players
+    # and box scores there, in three queries whatever the rows
+    def _check_box_scores(self, cursor, rows):
+        keys = [row[:2] for row in rows]
+        if len(set(keys)) != len(keys):
+            raise BoxScoreError("a player appears more than once in a game")
+        game_ids = sorted({game_id for game_id, _ in keys})
+        player_ids = sorted({player_id for _, player_id in keys})
+        cursor.execute(*queries.batch("games.ids_in", "ids", game_ids))
+        missing = set(game_ids) - {row[0] for row in cursor.fetchall()}
+        if missing:
+            raise BoxScoreError(f"Unknown game {min(missing)}")
+        cursor.execute(*queries.batch("players.ids_in", "ids", player_ids))
+        missing = set(player_ids) - {row[0] for row in cursor.fetchall()}
+        if missing:
+            raise BoxScoreError(f"Unknown player {min(missing)}")
+        cursor.execute(*queries.batch("box_score.keys_by_games", "ids", game_ids))
+        existing = sorted(set(keys) & {tuple(row) for row in cursor.fetchall()})
+        if existing:
+            raise BoxScoreError(f"Player {existing[0][1]} already has a box score for "
+                                f"game {existing[0][0]}", conflict=True)
+
+    # function adds stat increments (aggregates.BOX_SCORE_COLUMNS order) to
+    # PlayerGameStatistics, creating the rows not there yet, and to
+    # PlayerStatTotals in one transaction. see live_scoring.py. returns the
+    # box-score write version it committed
+    def add_box_score_deltas(self, deltas):
+        deltas = [tuple(row) for row in deltas]
+        if not deltas:
+            return None
+        game_ids = sorted({row[0] for row in deltas})
+        with self.transaction() as cursor:
+            cursor.execute(*queries.batch("box_score.keys_by_games", "ids", game_ids))
+            existing = {tuple(row) for row in cursor.fetchall()}
+            cursor.executemany(self.backend.upsert_increment(
+                "PlayerGameStatistics", ["GameID", "PlayerID"], aggregates.STAT_COLUMNS), deltas)
+            cursor.execute(*queries.batch("box_score.fill_teams", "ids", game_ids))
+            aggregates.apply_box_score_deltas(cursor, self.backend, deltas, existing)
+            version = aggregates.bump_version(cursor)
+        self._changed("PlayerGameStatistics")
+        return version
+
+#=============================================================
+
+
+
+
 # -----------------------------
 # TRADE OPERATIONS
 # -----------------------------
 
+    # returns None when no player has that name
     def get_player_id(self, name):
-        query = '''
-        SELECT PlayerID
-        FROM Player
-        WHERE name = %s;
-        '''
         record = (name,)
-        result = self.select_query_params(query, record)
-        return result[0][0]
+        result = self.select_query_params(queries.sql("player.id_by_name"), record)
+        return result[0][0] if result else None
      
         
+    # returns None when no team has that name
     def get_team_id(self, name):
-        query = '''
-        SELECT TeamID
-        FROM Team
-        WHERE name = %s;
-        '''
         record = (name,)
-        result = self.select_query_params(query, record)
-        return result[0][0]
+        result = self.select_query_params(queries.sql("team.id_by_name"), record)
+        return result[0][0] if result else None
     
     def trade_player(self, playername, newteamname):
-        player_id = self.get_player_id(playername)
-        team_id = self.get_team_id(newteamname)
-        query = '''
-        UPDATE Player
-        SET TeamID = %s
-        WHERE PlayerID = %s;
-        '''
-        record = (team_id, player_id)
-        self.modify_query_params(query, record)
-        print("Traded Player: " + playername)
-
-    #Takes in list of players
+        self.trade_multiple_players([playername], newteamname)
+
+    #Takes in list of players; all of them move or none do
     def trade_multiple_players(self, playernames, newteamname):
-        team_id = self.get_team_id(newteamname)
-        if team_id is None:
-            print(f"Error: Team '{newteamname}' not found.")
+        try:
+            trades.execute_trade(self, [(p, newteamname) for p in playernames])
+        except trades.TradeError as e:
+            print(f"Error: {e}. No players traded.")
             return
-        query = '''
-            UPDATE Player
-            SET TeamID = %s
-            WHERE PlayerID = %s;
-        '''
+        self._changed("Player")
         for playername in playernames:
-            player_id = self.get_player_id(playername)
-            if player_id is None:
-                print(f"Error: Player '{playername}' not found. Skipping.")
-                continue
-            record = (team_id, player_id)
-            self.modify_query_params(query, record)
             print("Traded Player: " + playername)
+
+    # multi-team trade: moves is a list of (player name, new team name)
+    def trade(self, moves):
+        plan = trades.execute_trade(self, moves)
+        self._changed("Player")
+        return plan
 #=============================================================
 
 
@@ -289,23 +304,39 @@ class db_operations():
     # commits query, returns no results. 
     # best used for insert/update/delete queries with no parameters
     def modify_query(self, query):
-        self.cursor.execute(query)
-        self.connection.commit()
+        with self.transaction() as cursor:
+            cursor.execute(query)
+        self._changed(query=query)
+
+    # the *_params helpers below run as prepared statements, see
+    # get_statement; stream_query_params keeps a plain cursor since a
+    # stream closed early can leave rows unread
 
     # function to simply execute a DDL or DML query with parameters
     # commits query, returns no results. 
     # best used for insert/update/delete queries with named placeholders
     def modify_query_params(self, query, dictionary):
-        self.cursor.execute(query, dictionary)
-        self.connection.commit()
+        with self.get_statement(query, commit=True) as cursor:
+            cursor.execute(query, dictionary)
+        self._changed(query=query)
+
+    # function to execute a single INSERT with parameters
+    # commits query, returns the new row's auto-increment id
+    def insert_query_params(self, query, dictionary):
+        with self.get_statement(query, commit=True) as cursor:
+            cursor.execute(query, dictionary)
+            row_id = cursor.lastrowid
+        self._changed(query=query)
+        return row_id
 
     # function to simply execute a DQL query
     # does not commit, returns results
     # best used for select queries with no parameters
     # slight edit for mysql
     def select_query(self, query):
-        self.cursor.execute(query)
-        result = self.cursor.fetchall()
+        with self.get_cursor() as cursor:
+            cursor.execute(query)
+            result = cursor.fetchall()
         return result
     
     # function to simply execute a DQL query with parameters
@@ -313,33 +344,50 @@ class db_operations():
     # best used for select queries with named placeholders
     # slight edit for mysql
     def select_query_params(self, query, dictionary):
-        self.cursor.execute(query, dictionary)
-        result = self.cursor.fetchall()     
+        with self.get_statement(query) as cursor:
+            cursor.execute(query, dictionary)
+            result = cursor.fetchall()
         return result
     
+    # function to stream the results of a DQL query with parameters
+    # yields lists of at most batch_size rows, holding one pooled
+    # connection until the generator is exhausted or closed
+    # best used for result sets too large to fetchall()
+    def stream_query_params(self, query, dictionary, batch_size=1000):
+        with self.get_cursor() as cursor:
+            cursor.execute(query, dictionary)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
     # function to return the value of the first row's 
     # first attribute of some select query.
     # best used for querying a single aggregate select 
     # query with no parameters
     # slight edit for mysql
     def single_record(self, query):
-        self.cursor.execute(query)
-        return self.cursor.fetchone()[0]
+        with self.get_cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchone()[0]
     
     # function to return the value of the first row's 
     # first attribute of some select query.
     # best used for querying a single aggregate select 
     # query with named placeholders
     def single_record_params(self, query, dictionary):
-        self.cursor.execute(query, dictionary)
-        return self.cursor.fetchone()[0]
+        with self.get_statement(query) as cursor:
+            cursor.execute(query, dictionary)
+            return cursor.fetchone()[0]
     
     # function to return a single attribute for all records 
     # from some table.
     # best used for select statements with no parameters
     def single_attribute(self, query):
-        self.cursor.execute(query)
-        results = self.cursor.fetchall()
+        with self.get_cursor() as cursor:
+            cursor.execute(query)
+            results = cursor.fetchall()
         results = [i[0] for i in results]
         results.remove(None)
         return results
@@ -348,21 +396,36 @@ class db_operations():
     # from some table.
     # best used for select statements with named placeholders
     def single_attribute_params(self, query, dictionary):
-        self.cursor.execute(query,dictionary)
-        results = self.cursor.fetchall()
+        with self.get_statement(query) as cursor:
+            cursor.execute(query,dictionary)
+            results = cursor.fetchall()
         results = [i[0] for i in results]
         return results
     
+    # function to run several ;-separated statements in one transaction
+    # best used for DDL scripts
+    def execute_script(self, script):
+        statements = [q.strip() for q in script.split(";") if q.strip()]
+        with self.transaction() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        for statement in statements:
+            self._changed(query=statement)
+
     # function for bulk inserting records
     # best used for inserting many records with parameters
     def bulk_insert(self, query, data):
-        self.cursor.executemany(query, data)
-        self.connection.commit()
+        with self.transaction() as cursor:
+            cursor.executemany(query, data)
+        self._changed(query=query)
     
     #-------------------------------
     #END OF ASSIGNMENT 4 CODE
     #-------------------------------
 
+    # function returns connection pool counters (in use, waits, wait time...)
+    def pool_stats(self):
+        return self.pool.stats()
+
     def destructor(self):
-        self.cursor.close()
-        self.connection.close()
\ No newline at end of file
+        self.pool.close()
@@ -0,0 +1,91 @@
+# backend/explain_check.py
+#
+# Runs EXPLAIN on the queries behind the hot API endpoints and fails if
+# any of them reads a whole table. Point it at a populated database
+# (e.g. one built by the benchmark suite): on empty tables MySQL's
+# optimizer happily picks a full scan because it is free.
+#
+#   python explain_check.py
+#   NBA_DB_BACKEND=sqlite NBA_SQLITE_PATH=league.db python explain_check.py
+
+import re
+
+from aggregates import STAT_COLUMNS
+from queries import batch, sql
+
+# (name, query, sample params) for every hot lookup, as the endpoints
+# run them: catalog statements, with the WHERE / ORDER BY / LIMIT that
+# app.list_response adds for the listings
+HOT_QUERIES = [
+    ("team roster", sql("team.roster"), ("Lakers",)),
+    ("team players by position", sql("team.roster_by_position"), ("Lakers", "PG")),
+    ("team rosters (batch)", *batch("team.rosters", "names", ["Lakers", "Celtics"])),
+    ("player search", sql("player.search"), ("LeBron James",)),
+    ("players by ids (batch)", *batch("players.by_ids", "ids", [1, 2, 3])),
+    ("players by names (batch)", *batch("players.by_names", "names", ["LeBron James"])),
+    ("players by position", sql("player.by_position"), ("C",)),
+    ("coach by team", sql("coach.by_team"), ("Lakers",)),
+    ("games by date", sql("game.by_date"), ("2024-01-01",)),
+    ("games by team", sql("game.by_team"), ("Lakers", "Lakers")),
+    ("statistics by player", sql("box_score.by_player"), (1,)),
+    ("statistics by games (batch)", *batch("box_scores.by_games", "ids", [1, 2])),
+    ("average statistics by player", sql("box_score.averages_by_player_name"),
+     ("LeBron James",)),
+    ("player game log page", sql("player.games.list")
+     + " WHERE PlayerGameStatistics.PlayerID = %s AND PlayerGameStatistics.GameID > %s"
+       " ORDER BY PlayerGameStatistics.GameID LIMIT %s", (1, 0, 101)),
+    ("team games page", sql("games.list") + " WHERE HomeTeamID = %s AND GameID > %s UNION ALL "
+     + sql("games.list") + " WHERE AwayTeamID = %s AND GameID > %s ORDER BY GameID LIMIT %s",
+     (1, 0, 1, 0, 101)),
+] + [(f"leaderboard average {column}", sql(f"leaders.avg.{column}"), (10,))
+     for column in STAT_COLUMNS]
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)\b(?! USING (COVERING )?INDEX)")
+
+
+# function returns the tables a query reads in full, per the plan
+def full_scans(db, query, params):
+    if db.backend.name == "sqlite":
+        rows = db.select_query_params("EXPLAIN QUERY PLAN " + query, params)
+        scans = []
+        for row in rows:
+            match = _SQLITE_SCAN.match(row[-1])
+            if match:
+                scans.append(match.group(1))
+        return scans
+
+    with db.get_cursor() as cursor:
+        cursor.execute("EXPLAIN " + query, params)
+        columns = [d[0].lower() for d in cursor.description]
+        rows = cursor.fetchall()
+    table, access = columns.index("table"), columns.index("type")
+    # <unionM,N> is the temporary table a UNION is merged in, not a read
+    return [row[table] for row in rows
+            if row[access] == "ALL" and not str(row[table]).startswith("<union")]
+
+
+# function runs every hot query through EXPLAIN; returns the failures
+def check(db, queries=HOT_QUERIES):
+    failures = []
+    for name, query, params in queries:
+        scans = full_scans(db, query, params)
+        print(f"{'FULL SCAN' if scans else 'ok':<10} {name}"
+              + (f" ({', '.join(scans)})" if scans else ""))
+        if scans:
+            failures.append((name, scans))
+    return failures
+
+
+def main():
+    from backends import from_env
+    from db_operations import db_operations
+
+    db = db_operations(backend=from_env(), pool_size=1)
+    failures = check(db)
+    db.destructor()
+    if failures:
+        raise SystemExit(f"{len(failures)} hot queries scan a whole table")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# backend/export_sqlite.py
+#
+# Publishes a SQLite copy of the league database. The source backend is
+# picked from the environment (MySQL by default, see backends.from_env).
+# The file is built next to the target and swapped in atomically, so a
+# server reading the old snapshot never sees a half-written one.
+#
+#   python export_sqlite.py leaderboard.db
+#   NBA_LEADERBOARD_SNAPSHOT=leaderboard.db python app.py
+
+import argparse
+import os
+
+from backends import from_env, sqlite_backend
+from db_operations import db_operations
+
+
+def export(source, path):
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    target = db_operations(backend=sqlite_backend(tmp_path), pool_size=1)
+    target.create_all_tables()
+    source.copy_to(target)
+    # readers open the snapshot read-only (NBA_SQLITE_READ_ONLY), which a
+    # WAL file cannot do without writing its -shm next to it
+    target.modify_query("PRAGMA journal_mode = DELETE")
+    target.destructor()
+    os.replace(tmp_path, path)
+    print(f"Snapshot written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the league DB to a SQLite file")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    source = db_operations(backend=from_env(), pool_size=1)
+    export(source, args.path)
+    source.destructor()
+
+
+if __name__ == "__main__":
+    main()
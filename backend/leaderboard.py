@@ -0,0 +1,310 @@
+# backend/leaderboard.py
+#
+# In-memory top-N engine over every PlayerGameStatistics column.
+# Player totals are loaded once from PlayerStatTotals and then kept
+# current by the write routes; each stat has a sorted index, so a
+# leaderboard is a walk down the first few entries of a list.
+#
+# The same indexes, kept once for the league and once per position,
+# answer distribution questions with binary searches: a player's
+# percentile in a stat, or a histogram of the stat for a position.
+
+import threading
+import math
+from bisect import bisect_left, bisect_right, insort
+
+from aggregates import STAT_COLUMNS, totals_params
+
+# url name -> PlayerStatTotals column, served as a per-game average
+AVERAGE_STATS = {
+    "points": "Points",
+    "rebounds": "Rebounds",
+    "assists": "Assists",
+    "blocks": "Blocks",
+    "steals": "Steals",
+    "turnovers": "Turnovers",
+    "minutes": "MinutesPlayed",
+    "fouls": "Fouls",
+}
+
+# url name -> column, served as total / MinutesPlayed
+RATE_STATS = {f"{name}_per_minute": column
+              for name, column in AVERAGE_STATS.items() if column != "MinutesPlayed"}
+
+STATS = sorted(AVERAGE_STATS) + sorted(RATE_STATS)
+
+_LOAD_QUERY = f'''
+SELECT Player.PlayerID, Player.Name, Player.TeamID, Player.Position,
+       COALESCE(PlayerStatTotals.GamesPlayed, 0),
+       {", ".join(f"COALESCE(PlayerStatTotals.{c}, 0)" for c in STAT_COLUMNS)}
+FROM Player
+LEFT JOIN PlayerStatTotals ON Player.PlayerID = PlayerStatTotals.PlayerID
+'''
+
+
+# function returns the json key a stat is reported under
+def value_key(stat):
+    return f"avg_{stat}" if stat in AVERAGE_STATS else stat
+
+
+class leaderboard_engine():
+
+    # db: db_operations to load from; loading waits for the first query
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._players = {}
+        self._team_ids = {}
+        # stat -> sorted list of (-value, PlayerID); stat -> {PlayerID: entry}
+        self._index = {stat: [] for stat in STATS}
+        self._entries = {stat: {} for stat in STATS}
+        # stat -> position -> sorted list of (-value, PlayerID), and the
+        # position each player was indexed under
+        self._by_position = {stat: {} for stat in STATS}
+        self._placed = {}
+
+    # function (re)loads every player and team from the database
+    def load(self):
+        rows = self.db.select_query(_LOAD_QUERY)
+        teams = self.db.select_query("SELECT TeamID, Name FROM Team")
+        with self._lock:
+            self._players = {}
+            self._index = {stat: [] for stat in STATS}
+            self._entries = {stat: {} for stat in STATS}
+            self._by_position = {stat: {} for stat in STATS}
+            self._team_ids = {name.lower(): team_id for team_id, name in teams if name}
+            for row in rows:
+                self._players[row[0]] = {
+                    "name": row[1],
+                    "team_id": row[2],
+                    "position": row[3],
+                    "games": int(row[4]),
+                    "totals": dict(zip(STAT_COLUMNS, (int(v) for v in row[5:]))),
+                }
+            for stat in STATS:
+                entries, by_position = self._entries[stat], self._by_position[stat]
+                for player_id, player in self._players.items():
+                    value = self._value(player_id, stat)
+                    if value is not None:
+                        entries[player_id] = (-value, player_id)
+                        by_position.setdefault(player["position"], []).append(entries[player_id])
+                self._index[stat] = sorted(entries.values())
+                for group in by_position.values():
+                    group.sort()
+            self._placed = {player_id: player["position"]
+                            for player_id, player in self._players.items()}
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    # function returns a player's current value for a stat, or None
+    # when they have no games (or no minutes, for rates)
+    def _value(self, player_id, stat):
+        player = self._players[player_id]
+        if stat in AVERAGE_STATS:
+            if player["games"] == 0:
+                return None
+            return player["totals"][AVERAGE_STATS[stat]] / player["games"]
+        minutes = player["totals"]["MinutesPlayed"]
+        if minutes == 0:
+            return None
+        return player["totals"][RATE_STATS[stat]] / minutes
+
+    # function moves a player to their new place in every index
+    def _reindex(self, player_id):
+        position = self._players[player_id]["position"]
+        placed = self._placed.get(player_id)
+        for stat in STATS:
+            index, entries = self._index[stat], self._entries[stat]
+            by_position = self._by_position[stat]
+            old = entries.pop(player_id, None)
+            if old is not None:
+                del index[bisect_left(index, old)]
+                group = by_position[placed]
+                del group[bisect_left(group, old)]
+            value = self._value(player_id, stat)
+            if value is not None:
+                entry = (-value, player_id)
+                entries[player_id] = entry
+                insort(index, entry)
+                insort(by_position.setdefault(position, []), entry)
+        self._placed[player_id] = position
+
+    # ---------- write hooks ----------
+
+    # function folds new PlayerGameStatistics rows (aggregates
+    # BOX_SCORE_COLUMNS order) into the totals
+    def add_box_scores(self, rows):
+        self.add_totals(totals_params(rows))
+
+    # function adds (PlayerID, games, *STAT_COLUMNS) increments to the
+    # totals, e.g. live-scoring deltas where games is 1 for a player's
+    # first line of a game and 0 afterwards
+    def add_totals(self, rows):
+        with self._lock:
+            if not self._loaded:
+                return
+            touched = set()
+            for row in rows:
+                player = self._players.get(row[0])
+                if player is None:
+                    continue
+                player["games"] += row[1]
+                for column, value in zip(STAT_COLUMNS, row[2:]):
+                    player["totals"][column] += value or 0
+                touched.add(row[0])
+            for player_id in touched:
+                self._reindex(player_id)
+
+    # function registers a new player or replaces their bio fields
+    def set_player(self, player_id, name, team_id, position):
+        with self._lock:
+            if not self._loaded:
+                return
+            player = self._players.get(player_id)
+            if player is None:
+                self._players[player_id] = {
+                    "name": name, "team_id": team_id, "position": position,
+                    "games": 0, "totals": dict.fromkeys(STAT_COLUMNS, 0),
+                }
+            else:
+                player.update(name=name, team_id=team_id, position=position)
+                self._reindex(player_id)
+
+    # function applies a PUT /api/player column change
+    def update_player(self, player_id, column, value):
+        field = {"Name": "name", "TeamID": "team_id", "Position": "position"}.get(column)
+        with self._lock:
+            if not self._loaded or field is None or player_id not in self._players:
+                return
+            self._players[player_id][field] = int(value) if field == "team_id" else value
+            if field == "position":
+                self._reindex(player_id)
+
+    # function records a team's (new) name for team_name filters
+    def set_team(self, team_id, name, old_name=None):
+        with self._lock:
+            if not self._loaded:
+                return
+            if old_name:
+                self._team_ids.pop(old_name.lower(), None)
+            self._team_ids[name.lower()] = team_id
+
+    # ---------- reads ----------
+
+    # function returns the team id behind a name, or None
+    def team_id(self, team_name):
+        with self._lock:
+            self._ensure_loaded()
+            return self._team_ids.get(team_name.lower())
+
+    # function returns a player's position, or None
+    def position(self, player_id):
+        with self._lock:
+            self._ensure_loaded()
+            player = self._players.get(player_id)
+            return player["position"] if player else None
+
+    # function returns the top n players for a stat, best first
+    def top(self, stat, n=10, min_games=1, team_id=None, position=None):
+        if stat not in self._index:
+            raise KeyError(stat)
+        key = value_key(stat)
+        result = []
+        with self._lock:
+            self._ensure_loaded()
+            for neg_value, player_id in self._index[stat]:
+                if len(result) >= n:
+                    break
+                player = self._players[player_id]
+                if player["games"] < min_games:
+                    continue
+                if team_id is not None and player["team_id"] != team_id:
+                    continue
+                if position is not None and player["position"] != position:
+                    continue
+                result.append({
+                    "player_id": player_id,
+                    "name": player["name"],
+                    key: -neg_value,
+                    "games": player["games"],
+                })
+        return result
+
+    # ---------- distributions ----------
+
+    # caller holds the lock. index of a stat for position (None for the
+    # whole league), sorted best first
+    def _distribution_index(self, stat, position):
+        if stat not in self._index:
+            raise KeyError(stat)
+        if position is None:
+            return self._index[stat]
+        return self._by_position[stat].get(position, [])
+
+    # function returns a player's standing in each of stats (all when None)
+    # among the league, or among players at position:
+    #   {stat: {value, percentile, rank, players}}
+    # percentile is the share of players below the value, counting ties
+    # as half; rank 1 is the highest value. None without games
+    def percentiles(self, player_id, stats=None, position=None):
+        stats = STATS if stats is None else stats
+        with self._lock:
+            self._ensure_loaded()
+            if player_id not in self._players:
+                return None
+            result = {}
+            for stat in stats:
+                index = self._distribution_index(stat, position)
+                entry = self._entries[stat].get(player_id)
+                if entry is None or not index:
+                    result[stat] = None
+                    continue
+                value = -entry[0]
+                above = bisect_left(index, (-value, -math.inf))
+                at_least = bisect_right(index, (-value, math.inf))
+                below = len(index) - at_least
+                result[stat] = {
+                    "value": value,
+                    "percentile": round(100 * (below + (at_least - above) / 2) / len(index), 1),
+                    "rank": above + 1,
+                    "players": len(index),
+                }
+            return result
+
+    # function returns the distribution of a stat over the league, or over
+    # players at position: bins equal-width bins between the lowest and
+    # highest value, and the 10/25/50/75/90th percentile values
+    def distribution(self, stat, position=None, bins=10):
+        with self._lock:
+            self._ensure_loaded()
+            index = self._distribution_index(stat, position)
+            players = len(index)
+            result = {"stat": stat, "position": position, "players": players}
+            if players == 0:
+                return dict(result, bins=[], quantiles={})
+            low, high = -index[-1][0], -index[0][0]
+            width = (high - low) / bins if high > low else 0
+
+            # players with a value >= value
+            def at_least(value):
+                return bisect_right(index, (-value, math.inf))
+
+            # [from, to) bins; the last one also takes the highest value
+            histogram = []
+            count = bins if width else 1
+            for i in range(count):
+                start = low + i * width
+                end = low + (i + 1) * width if i < count - 1 else high
+                upper = at_least(end) if i < count - 1 else 0
+                histogram.append({"from": round(start, 4), "to": round(end, 4),
+                                  "count": at_least(start) - upper})
+            quantiles = {}
+            for q in (10, 25, 50, 75, 90):
+                # nearest rank, counted from the lowest value
+                rank = max(math.ceil(q / 100 * players), 1)
+                quantiles[f"p{q}"] = -index[players - rank][0]
+        return dict(result, min=low, max=high, bins=histogram, quantiles=quantiles)
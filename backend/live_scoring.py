@@ -0,0 +1,251 @@
+# backend/live_scoring.py
+#
+# Game-day write path for live stat increments (+2 points, +1 assist...).
+# Events are coalesced per (GameID, PlayerID) in memory and written by a
+# background thread every flush interval, one transaction per flush, so
+# hundreds of events cost a few batched statements instead of an UPDATE
+# and a commit each.
+#
+# Reads stay consistent with events not flushed yet:
+#   - the in-memory engines (leaderboards, box-score column store) take
+#     every event as it arrives, through the on_totals / on_box_scores
+#     hooks;
+#   - routes reading box scores from the database call flush() for the
+#     games or players they touch first.
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from aggregates import STAT_COLUMNS
+from queries import batch, sql
+
+log = logging.getLogger("nba.live")
+
+
+class live_scorer():
+
+    # db: db_operations the deltas are written to
+    # interval: seconds between background flushes
+    # max_pending: pending rows that wake the flusher early
+    # on_totals(rows): gets (PlayerID, games, *STAT_COLUMNS) increments,
+    #   games being 1 for a player's first line of a game
+    # on_box_scores(rows): gets the increments in BOX_SCORE_COLUMNS order
+    # on_flushed(rows, version): gets the increments a flush committed and
+    #   the box-score write version it committed them at
+    # max_games: games whose box-score players are remembered
+    # max_failures: failed flushes in a row after which a game's deltas
+    #   are parked (logged and kept out of later flushes)
+    def __init__(self, db, interval=1.0, max_pending=2000, on_totals=None,
+                 on_box_scores=None, on_flushed=None, max_games=256, max_failures=3):
+        self.db = db
+        self.interval = interval
+        self.max_pending = max_pending
+        self.on_totals = on_totals
+        self.on_box_scores = on_box_scores
+        self.on_flushed = on_flushed
+        self.max_games = max_games
+        self.max_failures = max_failures
+        self._lock = threading.RLock()
+        self._flush_lock = threading.RLock()
+        self._pending = {}      # (GameID, PlayerID) -> list of deltas
+        self._failures = {}     # GameID -> flushes failed in a row
+        self._parked = {}       # (GameID, PlayerID) -> deltas given up on
+        self._players = {}      # GameID -> PlayerIDs with a line, recent games last
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"events": 0, "flushes": 0, "rows_flushed": 0,
+                       "flush_errors": 0, "rows_parked": 0, "last_flush_ms": 0.0}
+
+    # caller holds the lock. returns the players with a line in game_id,
+    # or None for an unknown game
+    def _game_players(self, game_id):
+        players = self._players.get(game_id)
+        if players is None:
+            if not self.db.select_query_params(sql("game.by_id"), (game_id,)):
+                return None
+            players = {row[0] for row in self.db.select_query_params(
+                sql("box_score.players_by_game"), (game_id,))}
+            # first lines still pending are not in the table yet
+            players.update(p for g, p in self._pending if g == game_id)
+            self._players[game_id] = players
+        else:
+            # keep the dict in least recently used order
+            self._players[game_id] = self._players.pop(game_id)
+        return players
+
+    # function records stat increments, rows in BOX_SCORE_COLUMNS order
+    # (GameID, PlayerID, Points, Rebounds, ...); several rows for the same
+    # player and game add up. raises ValueError for unknown games or
+    # players, leaving nothing recorded
+    def record(self, rows):
+        merged = {}
+        for row in rows:
+            key = (int(row[0]), int(row[1]))
+            deltas = merged.setdefault(key, [0] * len(STAT_COLUMNS))
+            for i, value in enumerate(row[2:]):
+                deltas[i] += int(value or 0)
+        if not merged:
+            return 0
+
+        with self._lock:
+            first_lines = set()
+            for game_id in {key[0] for key in merged}:
+                players = self._game_players(game_id)
+                if players is None:
+                    raise ValueError(f"Unknown game {game_id}")
+                first_lines.update(key for key in merged
+                                   if key[0] == game_id and key[1] not in players)
+            new_players = {player_id for _, player_id in first_lines}
+            if new_players:
+                found = {row[0] for row in self.db.select_query_params(
+                    *batch("players.ids_in", "ids", sorted(new_players)))}
+                missing = new_players - found
+                if missing:
+                    raise ValueError(f"Unknown player {min(missing)}")
+
+            for key, deltas in merged.items():
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._pending[key] = list(deltas)
+                else:
+                    for i, value in enumerate(deltas):
+                        pending[i] += value
+                self._players[key[0]].add(key[1])
+            self._stats["events"] += len(rows)
+            while len(self._players) > self.max_games:
+                del self._players[next(iter(self._players))]
+
+            # the engines take the events in arrival order
+            if self.on_totals is not None:
+                self.on_totals([(key[1], int(key in first_lines)) + tuple(deltas)
+                                for key, deltas in merged.items()])
+            if self.on_box_scores is not None:
+                self.on_box_scores([key + tuple(deltas) for key, deltas in merged.items()])
+            pending_rows = len(self._pending)
+
+        if pending_rows >= self.max_pending:
+            self._wake.set()
+        return len(merged)
+
+    # function writes the pending deltas, one transaction per game, only
+    # those of game_ids / player_ids when given. returns the rows written.
+    # a game whose write fails keeps its deltas pending (parked after
+    # max_failures failures in a row) while the other games are written;
+    # the first error is raised after them
+    def flush(self, game_ids=None, player_ids=None):
+        with self._flush_lock:
+            with self._lock:
+                taken = {key: deltas for key, deltas in self._pending.items()
+                         if (game_ids is None or key[0] in game_ids)
+                         and (player_ids is None or key[1] in player_ids)}
+                for key in taken:
+                    del self._pending[key]
+            if not taken:
+                return 0
+
+            by_game = {}
+            for key, deltas in sorted(taken.items()):
+                by_game.setdefault(key[0], []).append(key + tuple(deltas))
+            written, error = 0, None
+            for game_id, rows in by_game.items():
+                start = time.perf_counter()
+                try:
+                    version = self.db.add_box_score_deltas(rows)
+                except Exception as e:
+                    error = error or e
+                    self._failed(game_id, rows)
+                    continue
+                if self.on_flushed is not None:
+                    self.on_flushed(rows, version)
+                with self._lock:
+                    self._failures.pop(game_id, None)
+                    self._stats["flushes"] += 1
+                    self._stats["rows_flushed"] += len(rows)
+                    self._stats["last_flush_ms"] = (time.perf_counter() - start) * 1000
+                written += len(rows)
+            if error is not None:
+                raise error
+            return written
+
+    # function puts a game's deltas back after a failed write, or parks
+    # them once the game has failed max_failures times in a row
+    def _failed(self, game_id, rows):
+        with self._lock:
+            self._stats["flush_errors"] += 1
+            failures = self._failures[game_id] = self._failures.get(game_id, 0) + 1
+            target = self._pending
+            if failures >= self.max_failures:
+                del self._failures[game_id]
+                target = self._parked
+                self._stats["rows_parked"] += len(rows)
+                log.error("live scoring: game %s failed %s flushes in a row, parked %s",
+                          game_id, failures, rows)
+            for row in rows:
+                pending = target.setdefault(row[:2], [0] * len(STAT_COLUMNS))
+                for i, value in enumerate(row[2:]):
+                    pending[i] += value
+
+    # context manager for another path writing box scores of game_ids
+    # directly (e.g. a whole box score): flushes the games first, and holds
+    # off events and flushes until the block ends, so the write cannot
+    # interleave with events deciding whether a line is a player's first
+    @contextmanager
+    def sync(self, game_ids):
+        with self._flush_lock, self._lock:
+            self.flush(game_ids=set(game_ids))
+            try:
+                yield
+            finally:
+                for game_id in game_ids:
+                    self._players.pop(game_id, None)
+
+    # function returns the deltas parked after failing to flush, as
+    # {(GameID, PlayerID): {column: delta}}
+    def parked(self):
+        with self._lock:
+            return {key: dict(zip(STAT_COLUMNS, deltas)) for key, deltas in self._parked.items()}
+
+    # function returns the pending deltas of a game as
+    # {PlayerID: {column: delta}}
+    def pending(self, game_id):
+        with self._lock:
+            return {player_id: dict(zip(STAT_COLUMNS, deltas))
+                    for (g, player_id), deltas in self._pending.items() if g == game_id}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending_rows=len(self._pending),
+                        parked_rows=len(self._parked), running=self._thread is not None)
+
+    # ---------- background flusher ----------
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("live scoring flush failed; the game's deltas are kept for the next one")
+
+    # function starts the background flusher (once)
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="live-flush", daemon=True)
+            self._thread.start()
+
+    # function stops the flusher and writes whatever is still pending
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join()
+        self.flush()
@@ -0,0 +1,112 @@
+# backend/loader.py
+#
+# Streaming CSV loader. Reads the file in chunks of batch_size rows and
+# inserts each chunk in its own transaction, so memory stays bounded
+# however large the season file is. Progress is stored in the LoadProgress
+# table inside the same transaction as the rows, which makes a rerun after
+# a crash resume exactly after the last committed batch.
+#
+#   python loader.py PlayerGameStatistics season.csv \
+#       --columns GameID,PlayerID,Points,Rebounds,Assists,Blocks,Steals,Turnovers,MinutesPlayed,Fouls
+
+import argparse
+import os
+import time
+
+import aggregates
+import queries
+from csv_parser import typed_parser
+
+CREATE_PROGRESS = '''
+CREATE TABLE IF NOT EXISTS LoadProgress (
+    Source VARCHAR(255) PRIMARY KEY,
+    RowsLoaded INT NOT NULL DEFAULT 0
+);
+'''
+
+
+# function returns how many lines of source were already committed
+def rows_loaded(db, source):
+    rows = db.select_query_params(
+        "SELECT RowsLoaded FROM LoadProgress WHERE Source = %s", (source,))
+    return rows[0][0] if rows else 0
+
+
+# function streams a CSV into table. columns: list of column names in
+# file order. Returns (rows inserted, seconds elapsed)
+def load_csv(db, table, path, columns, batch_size=5000, header=False,
+             restart=False, report=print):
+    db.modify_query(CREATE_PROGRESS)
+    source = f"{table}:{os.path.abspath(path)}"
+    if restart:
+        db.modify_query_params("DELETE FROM LoadProgress WHERE Source = %s", (source,))
+    skip = rows_loaded(db, source)
+    if skip:
+        report(f"Resuming {table} from {path} after {skip} committed lines")
+
+    placeholders = ("%s,"*len(columns))[:-1]
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES({placeholders})"
+    progress = db.backend.upsert_increment("LoadProgress", ["Source"], ["RowsLoaded"])
+    # box scores also roll into PlayerStatTotals, batch by batch, and get
+    # the players' teams when the file has none (see migrations); stat
+    # columns the file leaves out are NULL in the table and 0 in the totals
+    box_score_order = None
+    if table == "PlayerGameStatistics":
+        missing = [c for c in ("GameID", "PlayerID") if c not in columns]
+        if missing:
+            raise ValueError(f"{path}: PlayerGameStatistics needs a {missing[0]} column")
+        box_score_order = [columns.index(c) if c in columns else None
+                           for c in aggregates.BOX_SCORE_COLUMNS]
+
+    # column types come from the table's schema, see csv_parser.py
+    parser = typed_parser.for_table(db, table, columns)
+
+    inserted = 0
+    start = time.perf_counter()
+    consumed = skip
+    for lines, batch in parser.parse_file(path, batch_size, skip=skip, header=header):
+        with db.transaction() as cursor:
+            if batch:
+                cursor.executemany(insert, batch)
+            if box_score_order is not None:
+                box_scores = [tuple(None if i is None else row[i] for i in box_score_order)
+                              for row in batch]
+                if box_scores:
+                    cursor.execute(*queries.batch("box_score.fill_teams", "ids",
+                                                  sorted({row[0] for row in box_scores})))
+                aggregates.apply_box_scores(cursor, db.backend, box_scores)
+            cursor.execute(progress, (source, lines))
+        inserted += len(batch)
+        consumed += lines
+        elapsed = time.perf_counter() - start
+        report(f"{table}: {consumed} lines committed "
+               f"({inserted / elapsed if elapsed else 0:.0f} rows/sec)")
+    elapsed = time.perf_counter() - start
+    report(f"Loaded {inserted} rows into {table} in {elapsed:.2f}s "
+           f"({inserted / elapsed if elapsed else 0:.0f} rows/sec)")
+    return inserted, elapsed
+
+
+def main():
+    from backends import from_env
+    from db_operations import db_operations
+
+    parser = argparse.ArgumentParser(description="Stream a CSV file into a table")
+    parser.add_argument("table")
+    parser.add_argument("path")
+    parser.add_argument("--columns", required=True,
+                        help="comma separated column names, in file order")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--header", action="store_true", help="skip the first line")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore saved progress and load from the top")
+    args = parser.parse_args()
+
+    db = db_operations(backend=from_env(), pool_size=1)
+    load_csv(db, args.table, args.path, [c.strip() for c in args.columns.split(",")],
+             batch_size=args.batch_size, header=args.header, restart=args.restart)
+    db.destructor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# backend/loadgen.py
+#
+# Local load generator comparing the sync (app.py) and async (asgi_app.py)
+# servers. Opens `concurrency` client connections, replays the given paths
+# round-robin and reports throughput and latency percentiles per target.
+# Before loading, it checks every path returns identical JSON on all targets.
+#
+#   NBA_DB_BACKEND=sqlite NBA_SQLITE_PATH=league.db python app.py
+#   NBA_DB_BACKEND=sqlite NBA_SQLITE_PATH=league.db uvicorn asgi_app:application --port 8000
+#   python loadgen.py --target sync=http://127.0.0.1:5000 \
+#       --target async=http://127.0.0.1:8000 --concurrency 500 --requests 20000 \
+#       --path /api/players/top/points --path "/api/team/roster?team_name=Team 1"
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import quote, urlsplit
+
+
+class http_connection():
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def _open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    # function sends one GET and returns (status, body); reconnects when
+    # the server does not keep connections alive (werkzeug dev server)
+    async def get(self, path):
+        if self.writer is None:
+            await self._open()
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode("latin-1"))
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readline()
+            body = bytes(body)
+        else:
+            body = await self.reader.read()
+            self.close()
+        if headers.get("connection", "").lower() == "close" or lines[0].startswith("HTTP/1.0"):
+            self.close()
+        return status, body
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def run_target(url, paths, concurrency, total):
+    parts = urlsplit(url)
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        connection = http_connection(parts.hostname, parts.port or 80)
+        for i in counter:
+            path = paths[i % len(paths)]
+            start = time.perf_counter()
+            try:
+                status, _ = await connection.get(path)
+                if status >= 400:
+                    errors += 1
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+                connection.close()
+                continue
+            latencies.append(time.perf_counter() - start)
+        connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+# function fetches every path from every target and reports paths whose
+# JSON differs between them
+async def compare_bodies(targets, paths):
+    mismatches = []
+    for path in paths:
+        bodies = {}
+        for name, url in targets:
+            parts = urlsplit(url)
+            connection = http_connection(parts.hostname, parts.port or 80)
+            _, body = await connection.get(path)
+            connection.close()
+            bodies[name] = json.loads(body or b"null")
+        if len({json.dumps(b, sort_keys=True) for b in bodies.values()}) > 1:
+            mismatches.append(path)
+    return mismatches
+
+
+async def main_async(args):
+    targets = [t.split("=", 1) if "=" in t else (t, t) for t in args.target]
+    paths = [quote(p, safe="/?&=,") for p in args.path]
+
+    mismatches = await compare_bodies(targets, paths)
+    for path in mismatches:
+        print(f"JSON differs between targets: {path}")
+
+    print(f"{'target':<10} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, url in targets:
+        result = await run_target(url, paths, args.concurrency, args.requests)
+        print(f"{name:<10} {result['throughput']:>10.0f} {result['p50_ms']:>9.2f} "
+              f"{result['p99_ms']:>9.2f} {result['errors']:>7}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync and async API servers")
+    parser.add_argument("--target", action="append", required=True,
+                        help="name=url of a running server, repeatable")
+    parser.add_argument("--path", action="append", default=None,
+                        help="request path, repeatable")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10000)
+    args = parser.parse_args()
+    if not args.path:
+        args.path = ["/api/players/top/points", "/api/players/top/assists",
+                     "/api/players/top/rebounds"]
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
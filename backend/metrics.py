@@ -0,0 +1,255 @@
+# backend/metrics.py
+#
+# Request and database instrumentation, served in Prometheus text format:
+#   - per-route latency histograms (method, url rule, status), installed
+#     on the Flask app with install();
+#   - per-query execution time and row counts, keyed by SQL fingerprint
+#     and recorded by timed_cursor, which db_operations wraps around every
+#     cursor when it is given a registry;
+#   - rows serialized into responses, per route;
+#   - a slow-query log (fingerprint, params, time, rows) for statements
+#     slower than slow_query_ms.
+
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+
+# latency buckets in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_log = logging.getLogger("nba.slow_query")
+
+_FINGERPRINT_REWRITES = [
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), "?"),
+    (re.compile(r"\b\d+(\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(\s*,\s*\?)*\s*\)"), "(?+)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+# function normalises a statement so every call of it maps to one series:
+# literals and placeholders become ?, IN lists of any length (?+)
+@lru_cache(maxsize=2048)
+def fingerprint(query):
+    for pattern, replacement in _FINGERPRINT_REWRITES:
+        query = pattern.sub(replacement, query)
+    return query.strip().rstrip(";").strip()
+
+
+class histogram():
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    # caller holds the registry lock
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+class metrics_registry():
+
+    # slow_query_ms: statements at least this slow are logged, None disables
+    def __init__(self, slow_query_ms=200):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._queries = {}
+        self._query_rows = {}
+        self._serialized = {}
+        self._slow = 0
+
+    # function records one request: (method, route, status) -> seconds
+    def observe_request(self, method, route, status, seconds):
+        key = (method, route, status)
+        with self._lock:
+            if key not in self._routes:
+                self._routes[key] = histogram()
+            self._routes[key].observe(seconds)
+
+    # function records one statement's execution time and rows
+    # (fetched for queries, affected for writes)
+    def observe_query(self, query, params, seconds, rows):
+        key = fingerprint(query)
+        with self._lock:
+            if key not in self._queries:
+                self._queries[key] = histogram()
+                self._query_rows[key] = 0
+            self._queries[key].observe(seconds)
+            self._query_rows[key] += rows
+            slow = self.slow_query_ms is not None and seconds * 1000 >= self.slow_query_ms
+            if slow:
+                self._slow += 1
+        if slow:
+            shown = repr(params)
+            if len(shown) > 200:
+                shown = shown[:200] + "..."
+            slow_log.warning("slow query %.1fms rows=%d: %s params=%s",
+                             seconds * 1000, rows, key, shown)
+
+    # function counts rows written into the current request's response
+    def record_rows(self, rows):
+        if not has_request_context():
+            return
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        with self._lock:
+            self._serialized[route] = self._serialized.get(route, 0) + rows
+
+    # function wraps a DB-API cursor so its statements are recorded here
+    def wrap(self, cursor):
+        return timed_cursor(cursor, self)
+
+    # function adds before/after request hooks timing every route of app.
+    # streamed responses are timed up to their headers
+    def install(self, app):
+        @app.before_request
+        def _start_timer():
+            g.metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _stop_timer(response):
+            start = g.pop("metrics_start", None)
+            if start is not None:
+                route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+                self.observe_request(request.method, route, response.status_code,
+                                     time.perf_counter() - start)
+            return response
+
+    # function renders every series in Prometheus text exposition format.
+    # gauges: optional {name: value} added as-is, e.g. pool counters
+    def render(self, gauges=None):
+        with self._lock:
+            routes = {k: (list(h.counts), h.total, h.count) for k, h in self._routes.items()}
+            queries = {k: (list(h.counts), h.total, h.count) for k, h in self._queries.items()}
+            query_rows = dict(self._query_rows)
+            serialized = dict(self._serialized)
+            slow = self._slow
+
+        lines = []
+
+        def emit_histogram(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (counts, total, count) in series:
+                cumulative = 0
+                for bound, n in zip(BUCKETS, counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {total}")
+                lines.append(f"{name}_count{{{labels}}} {count}")
+
+        emit_histogram("nba_http_request_duration_seconds", "Request latency by route.",
+                       [(_labels(method=m, route=r, status=s), v)
+                        for (m, r, s), v in sorted(routes.items())])
+        emit_histogram("nba_db_query_duration_seconds",
+                       "Statement execution time by SQL fingerprint.",
+                       [(_labels(query=q), v) for q, v in sorted(queries.items())])
+
+        lines.append("# HELP nba_db_query_rows_total Rows fetched or affected by SQL fingerprint.")
+        lines.append("# TYPE nba_db_query_rows_total counter")
+        for q, rows in sorted(query_rows.items()):
+            lines.append(f"nba_db_query_rows_total{{{_labels(query=q)}}} {rows}")
+
+        lines.append("# HELP nba_http_rows_serialized_total Rows serialized into responses by route.")
+        lines.append("# TYPE nba_http_rows_serialized_total counter")
+        for route, rows in sorted(serialized.items()):
+            lines.append(f"nba_http_rows_serialized_total{{{_labels(route=route)}}} {rows}")
+
+        lines.append("# HELP nba_db_slow_queries_total Statements over the slow query threshold.")
+        lines.append("# TYPE nba_db_slow_queries_total counter")
+        lines.append(f"nba_db_slow_queries_total {slow}")
+
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# DB-API cursor wrapper timing each statement. time spent fetching counts
+# towards the statement; it is reported on the next execute or finish()
+class timed_cursor():
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._query = None
+
+    def _start(self, query, params):
+        self.finish()
+        self._query, self._params = query, params
+        self._elapsed, self._fetched, self._affected = 0.0, None, 0
+
+    def execute(self, query, params=()):
+        self._start(query, params)
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(query, params)
+        finally:
+            self._elapsed += time.perf_counter() - start
+            self._affected = self._cursor.rowcount
+
+    def executemany(self, query, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        self._start(query, seq_of_params)
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, seq_of_params)
+        finally:
+            self._elapsed += time.perf_counter() - start
+            self._affected = self._cursor.rowcount
+
+    def _fetch(self, fetch, *args):
+        start = time.perf_counter()
+        rows = fetch(*args)
+        self._elapsed += time.perf_counter() - start
+        return rows
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        self._fetched = (self._fetched or 0) + (row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._fetch(self._cursor.fetchmany) if size is None \
+            else self._fetch(self._cursor.fetchmany, size)
+        self._fetched = (self._fetched or 0) + len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        self._fetched = (self._fetched or 0) + len(rows)
+        return rows
+
+    # function reports the current statement, if any
+    def finish(self):
+        if self._query is None:
+            return
+        rows = self._fetched if self._fetched is not None else max(self._affected or 0, 0)
+        self._metrics.observe_query(self._query, self._params, self._elapsed, rows)
+        self._query = None
+
+    def close(self):
+        self.finish()
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
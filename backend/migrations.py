@@ -0,0 +1,269 @@
+# backend/migrations.py
+#
+# Versioned schema migrations. Every migration has a number and runs at
+# most once per database; applied versions are recorded in SchemaVersion.
+# Databases created by the old create_all_tables are recognised and
+# stamped instead of being recreated.
+#
+#   python migrations.py status
+#   python migrations.py migrate
+#   python migrations.py reset     drop everything and migrate again
+
+import argparse
+from datetime import datetime
+
+import aggregates
+import loader
+from queries import average_expression
+
+CREATE_TEAM = '''
+CREATE TABLE Team (
+    TeamID INT PRIMARY KEY AUTO_INCREMENT,
+    Name VARCHAR(70),
+    City VARCHAR(70),
+    Division VARCHAR(30),
+    Conference VARCHAR(30)
+);
+'''
+
+CREATE_COACH = '''
+CREATE TABLE Coach (
+    CoachID INT PRIMARY KEY AUTO_INCREMENT,
+    Name VARCHAR(80),
+    Salary INT,
+    TeamID INT
+);
+'''
+
+CREATE_PLAYER = '''
+CREATE TABLE Player (
+    PlayerID INT PRIMARY KEY AUTO_INCREMENT,
+    Name VARCHAR(70),
+    Height INT,
+    Weight INT,
+    Age INT,
+    Position VARCHAR(2),
+    TeamID INT
+);
+'''
+
+CREATE_GAME = '''
+CREATE TABLE Game (
+    GameID INT PRIMARY KEY AUTO_INCREMENT,
+    Date DATE,
+    Location VARCHAR(80),
+    HomeTeamID INT,
+    AwayTeamID INT,
+    HomeScore INT,
+    AwayScore INT
+);
+'''
+
+CREATE_PLAYERGAMESTATISTICS = '''
+CREATE TABLE PlayerGameStatistics (
+    GameID INT,
+    PlayerID INT,
+    Points INT,
+    Rebounds INT,
+    Assists INT,
+    Blocks INT,
+    Steals INT,
+    Turnovers INT,
+    MinutesPlayed INT,
+    Fouls INT,
+    PRIMARY KEY (GameID, PlayerID),
+    FOREIGN KEY (GameID) REFERENCES Game(GameID),
+    FOREIGN KEY (PlayerID) REFERENCES Player(PlayerID)
+);
+'''
+
+FOREIGN_KEYS = [
+    '''ALTER TABLE Coach
+    ADD CONSTRAINT fk_coach_team
+    FOREIGN KEY (TeamID) REFERENCES Team(TeamID)''',
+    '''ALTER TABLE Player
+    ADD CONSTRAINT fk_player_team
+    FOREIGN KEY (TeamID) REFERENCES Team(TeamID)''',
+    '''ALTER TABLE Game
+    ADD CONSTRAINT fk_home_game_team
+    FOREIGN KEY (HomeTeamID) REFERENCES Team(TeamID),
+    ADD CONSTRAINT fk_away_game_team
+    FOREIGN KEY (AwayTeamID) REFERENCES Team(TeamID)''',
+]
+
+# (table, column) pairs FOREIGN_KEYS points at Team, lower case
+TEAM_REFERENCES = {("coach", "teamid"), ("player", "teamid"),
+                   ("game", "hometeamid"), ("game", "awayteamid")}
+
+# indexes for the columns the API filters and joins on
+HOT_INDEXES = [
+    "CREATE INDEX idx_team_name ON Team (Name)",
+    "CREATE INDEX idx_player_name ON Player (Name)",
+    "CREATE INDEX idx_player_team_position ON Player (TeamID, Position)",
+    "CREATE INDEX idx_player_position ON Player (Position)",
+    "CREATE INDEX idx_coach_team ON Coach (TeamID)",
+    "CREATE INDEX idx_coach_name ON Coach (Name)",
+    "CREATE INDEX idx_game_date ON Game (Date)",
+    "CREATE INDEX idx_game_home ON Game (HomeTeamID, Date)",
+    "CREATE INDEX idx_game_away ON Game (AwayTeamID, Date)",
+    # covers per-player aggregates (aggregates.rebuild/check, averages)
+    # so they never read the base rows
+    f"CREATE INDEX idx_pgs_player_stats ON PlayerGameStatistics "
+    f"(PlayerID, {', '.join(aggregates.STAT_COLUMNS)})",
+]
+
+# the team each box score was played for, so home/away stays right after
+# a trade. rows already stored get the player's current team, the best
+# there is for them; new rows are filled as they are written
+# (queries.box_score.fill_teams)
+BOX_SCORE_TEAM = [
+    "ALTER TABLE PlayerGameStatistics ADD COLUMN TeamID INT",
+    """UPDATE PlayerGameStatistics SET TeamID = (
+        SELECT Player.TeamID FROM Player WHERE Player.PlayerID = PlayerGameStatistics.PlayerID)""",
+]
+
+# expression indexes matching the leaderboard ORDER BY (queries.leaders.avg.*),
+# so the top n are read in order instead of sorting every player's totals
+AVERAGE_INDEXES = [
+    f"CREATE INDEX idx_totals_avg_{column.lower()} ON PlayerStatTotals "
+    f"(({average_expression(column)}))"
+    for column in aggregates.STAT_COLUMNS
+]
+
+# (version, description, statements, tables that mean it is already
+# applied on a pre-migrations database (or a function of the database
+# telling so), MySQL-only)
+MIGRATIONS = [
+    (1, "league tables",
+     [CREATE_TEAM, CREATE_COACH, CREATE_PLAYER, CREATE_GAME, CREATE_PLAYERGAMESTATISTICS],
+     ["Team", "Coach", "Player", "Game", "PlayerGameStatistics"], False),
+    (2, "foreign keys to Team", FOREIGN_KEYS, lambda db: _team_references(db) >= TEAM_REFERENCES,
+     True),
+    # filled from the box scores already stored, so upgraded databases
+    # start with their real history
+    (3, "PlayerStatTotals", [aggregates.CREATE_TOTALS, aggregates.BACKFILL_TOTALS],
+     ["PlayerStatTotals"], False),
+    (4, "LoadProgress", [loader.CREATE_PROGRESS], ["LoadProgress"], False),
+    (5, "hot lookup indexes", HOT_INDEXES, None, False),
+    (6, "leaderboard average indexes", AVERAGE_INDEXES, None, False),
+    (7, "box-score write counter",
+     [aggregates.CREATE_DATA_VERSION, aggregates.INSERT_DATA_VERSION], ["DataVersion"], False),
+    (8, "team of each box score", BOX_SCORE_TEAM, None, False),
+]
+
+CREATE_SCHEMA_VERSION = '''
+CREATE TABLE IF NOT EXISTS SchemaVersion (
+    Version INT PRIMARY KEY,
+    Description VARCHAR(200),
+    AppliedAt VARCHAR(32)
+);
+'''
+
+# drop order, children before parents
+DROP_ORDER = ["PlayerStatTotals", "PlayerGameStatistics", "Game", "Player",
+              "Coach", "Team", "LoadProgress", "DataVersion", "SchemaVersion"]
+
+
+def _existing_tables(db):
+    if db.backend.name == "sqlite":
+        rows = db.select_query("SELECT name FROM sqlite_master WHERE type = 'table'")
+    else:
+        rows = db.select_query(
+            "SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+    return {r[0].lower() for r in rows}
+
+
+# function returns the (table, column) pairs with a foreign key to Team,
+# lower case. SQLite tables cannot get constraints added, so none there
+def _team_references(db):
+    if not db.backend.supports_alter_constraints:
+        return set()
+    rows = db.select_query(
+        "SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+        "WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME = 'Team'")
+    return {(table.lower(), column.lower()) for table, column in rows}
+
+
+# function tells whether a migration is already in a database built
+# before migrations existed (existing: its tables, lower case)
+def _present(db, marker, existing):
+    if not marker or not existing:
+        return False
+    if callable(marker):
+        return marker(db)
+    return all(t.lower() in existing for t in marker)
+
+
+def _record(db, version, description):
+    db.modify_query_params(
+        "INSERT INTO SchemaVersion (Version, Description, AppliedAt) VALUES (%s, %s, %s)",
+        (version, description, datetime.now().isoformat(timespec="seconds")))
+
+
+# function returns the set of applied migration versions
+def applied_versions(db):
+    db.modify_query(CREATE_SCHEMA_VERSION)
+    return {r[0] for r in db.select_query("SELECT Version FROM SchemaVersion")}
+
+
+# function applies every pending migration in order. MySQL commits DDL
+# implicitly, so each migration is recorded right after its statements
+def migrate(db):
+    applied = applied_versions(db)
+    existing = _existing_tables(db) if not applied else set()
+    for version, description, statements, marker, mysql_only in MIGRATIONS:
+        if version in applied:
+            continue
+        # a database built before migrations existed: stamp, don't recreate
+        if _present(db, marker, existing):
+            _record(db, version, description)
+            print(f"Migration {version} ({description}) already present, recorded")
+            continue
+        if mysql_only and not db.backend.supports_alter_constraints:
+            _record(db, version, description)
+            print(f"Migration {version} ({description}) skipped on {db.backend.name}")
+            continue
+        with db.transaction() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        _record(db, version, description)
+        print(f"Migration {version} ({description}) applied")
+
+
+# function drops every league table, for when they are messed up
+def reset(db):
+    existing = _existing_tables(db)
+    with db.transaction() as cursor:
+        for table in DROP_ORDER:
+            if table.lower() in existing:
+                cursor.execute(f"DROP TABLE {table}")
+    print('All tables deleted')
+
+
+def status(db):
+    applied = applied_versions(db)
+    for version, description, *_ in MIGRATIONS:
+        print(f"{version:>3} {'applied' if version in applied else 'pending':<8} {description}")
+
+
+def main():
+    from backends import from_env
+    from db_operations import db_operations
+
+    parser = argparse.ArgumentParser(description="Manage the NBA schema")
+    parser.add_argument("command", choices=["migrate", "status", "reset"])
+    args = parser.parse_args()
+
+    db = db_operations(backend=from_env(), pool_size=1)
+    if args.command == "migrate":
+        migrate(db)
+    elif args.command == "reset":
+        reset(db)
+        migrate(db)
+    else:
+        status(db)
+    db.destructor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# module contains a bounded, thread-safe connection pool
+#----------------------------------------
+
+# raised when no connection frees up before the checkout timeout
+class PoolTimeout(Exception):
+    pass
+
+class connection_pool():
+
+    # factory: callable returning a new DB-API connection
+    # size: max number of connections open at once
+    # timeout: seconds a checkout waits for a free connection
+    # ping: callable(connection) -> bool, health check run on checkout
+    def __init__(self, factory, size=5, timeout=30, ping=None):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.ping = ping
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        # counters, guarded by self._cond
+        self._created = 0       # connections currently open (idle + in use)
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._discarded = 0
+
+    # function hands out a healthy connection, blocking while the
+    # pool is exhausted. caller must give it back with release()
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+        with self._cond:
+            waited = False
+            while not self._idle and self._created >= self.size:
+                if self._closed:
+                    raise PoolTimeout("pool is closed")
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"no connection available after {timeout}s "
+                                      f"(pool size {self.size})")
+                waited = True
+                self._cond.wait(remaining)
+            if self._closed:
+                raise PoolTimeout("pool is closed")
+            connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                self._created += 1
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                elapsed = time.perf_counter() - start
+                self._waits += 1
+                self._wait_time += elapsed
+                self._max_wait = max(self._max_wait, elapsed)
+
+        # connecting and pinging happen outside the lock so a slow
+        # server does not stall every other thread
+        try:
+            if connection is None:
+                connection = self.factory()
+            elif self.ping is not None and not self._healthy(connection):
+                self._close_quietly(connection)
+                connection = self.factory()
+                with self._cond:
+                    self._reconnects += 1
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return connection
+
+    # function returns a connection to the pool. broken connections
+    # are closed and their slot freed so the next checkout reconnects
+    def release(self, connection, discard=False):
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._created -= 1
+                self._discarded += 1 if discard else 0
+            else:
+                self._idle.append(connection)
+            self._cond.notify()
+        if discard or self._closed:
+            self._close_quietly(connection)
+
+    # context manager around acquire/release. on an error (or a streaming
+    # generator being closed early) the open transaction is rolled back;
+    # if even that fails the connection is considered dead and dropped
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except BaseException:
+            discard = False
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+            self.release(connection, discard=discard)
+            raise
+        else:
+            self.release(connection)
+
+    # function closes every idle connection; in-use ones are closed
+    # as they are released
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for connection in idle:
+            self._close_quietly(connection)
+
+    # function returns a snapshot of the pool counters
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_total": self._wait_time,
+                "wait_time_max": self._max_wait,
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "discarded": self._discarded,
+            }
+
+    def _healthy(self, connection):
+        try:
+            return bool(self.ping(connection))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+#----------------------------------------------
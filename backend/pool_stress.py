@@ -0,0 +1,80 @@
+# backend/pool_stress.py
+#
+# Local harness that hammers db_operations from many threads.
+# Every query echoes a value unique to the calling thread, so if two
+# threads ever share a cursor the result comes back wrong and is counted.
+#
+#   python pool_stress.py --threads 50 --iterations 200 --pool-size 10
+#   NBA_DB_BACKEND=sqlite python pool_stress.py   (no MySQL server needed)
+
+import argparse
+import threading
+import time
+
+from backends import from_env
+from db_operations import db_operations
+
+
+def worker(db, thread_no, iterations, errors, mismatches, latencies):
+    query = "SELECT %s, %s"
+    for i in range(iterations):
+        token = f"{thread_no}:{i}"
+        start = time.perf_counter()
+        try:
+            rows = db.select_query_params(query, (thread_no, token))
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        latencies.append(time.perf_counter() - start)
+        if rows != [(thread_no, token)]:
+            mismatches.append((token, rows))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the db_operations connection pool")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--pool-timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    db = db_operations(backend=from_env(), pool_size=args.pool_size, pool_timeout=args.pool_timeout)
+    errors, mismatches, latencies = [], [], []
+    threads = [
+        threading.Thread(target=worker,
+                         args=(db, n, args.iterations, errors, mismatches, latencies))
+        for n in range(args.threads)
+    ]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    stats = db.pool_stats()
+    total = args.threads * args.iterations
+    print(f"queries:     {total} in {elapsed:.2f}s ({total / elapsed:.0f} q/s)")
+    print(f"latency:     p50 {percentile(latencies, 50) * 1000:.2f}ms  "
+          f"p99 {percentile(latencies, 99) * 1000:.2f}ms")
+    print(f"errors:      {len(errors)}")
+    print(f"mismatches:  {len(mismatches)}")
+    for key, value in stats.items():
+        print(f"pool.{key}: {value}")
+    db.destructor()
+
+    if errors or mismatches or stats["in_use"] != 0:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# backend/queries.py
+#
+# Query catalog. Every fixed statement run by app.py, db_operations.py and
+# NBA.py is written here once, under a name, in the MySQL dialect with %s
+# placeholders. db_operations runs them as server-side prepared statements
+# cached per pooled connection, and self_test() compiles the whole catalog
+# against the schema at startup so broken SQL fails at boot.
+#
+#   python queries.py          # self-test against NBA_DB_BACKEND
+
+from string import Formatter
+
+from aggregates import BOX_SCORE_COLUMNS, STAT_COLUMNS
+
+QUERIES = {
+    # ---------- players ----------
+    "player.add": '''
+        INSERT INTO Player (Name, Height, Weight, Age, Position, TeamID)
+        VALUES (%s, %s, %s, %s, %s, %s)''',
+    "player.delete_by_name": '''
+        DELETE FROM Player
+        WHERE Name = %s''',
+    "player.by_name": '''
+        SELECT * FROM Player
+        WHERE Name = %s''',
+    "player.search": '''
+        SELECT Player.PlayerID, Player.Name, Player.Height, Player.Weight, Player.Age,
+               Player.Position, Player.TeamID, Team.Name
+        FROM Player
+        LEFT JOIN Team ON Player.TeamID = Team.TeamID
+        WHERE Player.Name = %s''',
+    "player.id_by_name": '''
+        SELECT PlayerID
+        FROM Player
+        WHERE Name = %s''',
+    "player.name_and_team": '''
+        SELECT Name, TeamID
+        FROM Player
+        WHERE PlayerID = %s''',
+    "player.by_team": '''
+        SELECT * FROM Player
+        INNER JOIN Team ON Player.TeamID = Team.TeamID
+        WHERE Team.Name = %s''',
+    "player.by_position": '''
+        SELECT * FROM Player
+        WHERE Position = %s''',
+    "players.by_ids": '''
+        SELECT Player.PlayerID, Player.Name, Player.Height, Player.Weight, Player.Age,
+               Player.Position, Player.TeamID, Team.Name
+        FROM Player
+        LEFT JOIN Team ON Player.TeamID = Team.TeamID
+        WHERE Player.PlayerID IN ({ids})''',
+    "players.ids_in": '''
+        SELECT PlayerID
+        FROM Player
+        WHERE PlayerID IN ({ids})''',
+    "players.teams_by_ids": '''
+        SELECT PlayerID, TeamID
+        FROM Player
+        WHERE PlayerID IN ({ids})''',
+    "players.by_names": '''
+        SELECT Player.PlayerID, Player.Name, Player.Height, Player.Weight, Player.Age,
+               Player.Position, Player.TeamID, Team.Name
+        FROM Player
+        LEFT JOIN Team ON Player.TeamID = Team.TeamID
+        WHERE Player.Name IN ({names})''',
+
+    # ---------- teams ----------
+    "team.add": '''
+        INSERT INTO Team (Name, City, Division, Conference)
+        VALUES (%s, %s, %s, %s)''',
+    "team.delete_by_name": '''
+        DELETE FROM Team
+        WHERE Name = %s''',
+    "team.by_name": '''
+        SELECT * FROM Team
+        WHERE Name = %s''',
+    "team.all": '''
+        SELECT * FROM Team''',
+    "team.id_by_name": '''
+        SELECT TeamID
+        FROM Team
+        WHERE Name = %s''',
+    "team.name_by_id": '''
+        SELECT Name
+        FROM Team
+        WHERE TeamID = %s''',
+    "team.names_by_ids": '''
+        SELECT Name
+        FROM Team
+        WHERE TeamID IN ({ids})''',
+    "team.roster": '''
+        SELECT Player.PlayerID, Player.Name, Player.Position, Player.Age
+        FROM Player
+        INNER JOIN Team ON Player.TeamID = Team.TeamID
+        WHERE Team.Name = %s''',
+    "team.roster_by_position": '''
+        SELECT Player.PlayerID, Player.Name, Player.Position, Player.Age
+        FROM Player
+        INNER JOIN Team ON Player.TeamID = Team.TeamID
+        WHERE Team.Name = %s AND Player.Position = %s''',
+    "team.rosters": '''
+        SELECT Team.Name, Player.PlayerID, Player.Name, Player.Position, Player.Age
+        FROM Player
+        INNER JOIN Team ON Player.TeamID = Team.TeamID
+        WHERE Team.Name IN ({names})
+        ORDER BY Team.Name, Player.PlayerID''',
+
+    # ---------- coaches ----------
+    "coach.add": '''
+        INSERT INTO Coach (Name, Salary, TeamID)
+        VALUES (%s, %s, %s)''',
+    "coach.delete_by_name": '''
+        DELETE FROM Coach
+        WHERE Name = %s''',
+    "coach.by_name": '''
+        SELECT * FROM Coach
+        WHERE Name = %s''',
+    "coach.by_team": '''
+        SELECT * FROM Coach
+        INNER JOIN Team ON Coach.TeamID = Team.TeamID
+        WHERE Team.Name = %s''',
+
+    # ---------- games ----------
+    "game.add": '''
+        INSERT INTO Game (Date, Location, HomeTeamID, AwayTeamID, HomeScore, AwayScore)
+        VALUES (%s, %s, %s, %s, %s, %s)''',
+    "game.delete": '''
+        DELETE FROM Game
+        WHERE GameID = %s''',
+    "game.by_id": '''
+        SELECT * FROM Game
+        WHERE GameID = %s''',
+    # home and away lookups are separate so each side uses its index
+    # (an OR across both joins reads the whole Game table)
+    "game.by_team": '''
+        SELECT * FROM Game
+        INNER JOIN Team AS home_team ON Game.HomeTeamID = home_team.TeamID
+        INNER JOIN Team AS away_team ON Game.AwayTeamID = away_team.TeamID
+        WHERE home_team.Name = %s
+        UNION ALL
+        SELECT * FROM Game
+        INNER JOIN Team AS home_team ON Game.HomeTeamID = home_team.TeamID
+        INNER JOIN Team AS away_team ON Game.AwayTeamID = away_team.TeamID
+        WHERE away_team.Name = %s''',
+    "games.ids_in": '''
+        SELECT GameID
+        FROM Game
+        WHERE GameID IN ({ids})''',
+    "games.by_ids": '''
+        SELECT GameID, Date, HomeTeamID, AwayTeamID
+        FROM Game
+        WHERE GameID IN ({ids})''',
+    "game.by_date": '''
+        SELECT * FROM Game
+        WHERE Date = %s''',
+
+    # ---------- box scores ----------
+    "box_score.add": f'''
+        INSERT INTO PlayerGameStatistics ({", ".join(BOX_SCORE_COLUMNS)})
+        VALUES ({("%s,"*len(BOX_SCORE_COLUMNS))[:-1]})''',
+    # the team a new line is played for is the player's team when it is
+    # written; trades later on leave it alone
+    "box_score.fill_teams": '''
+        UPDATE PlayerGameStatistics
+        SET TeamID = (SELECT Player.TeamID FROM Player
+                      WHERE Player.PlayerID = PlayerGameStatistics.PlayerID)
+        WHERE TeamID IS NULL AND GameID IN ({ids})''',
+    "box_score.by_key": '''
+        SELECT * FROM PlayerGameStatistics
+        WHERE GameID = %s AND PlayerID = %s''',
+    "box_score.by_player": '''
+        SELECT * FROM PlayerGameStatistics
+        WHERE PlayerID = %s''',
+    "box_score.by_game": '''
+        SELECT * FROM PlayerGameStatistics
+        WHERE GameID = %s''',
+    "box_score.players_by_game": '''
+        SELECT PlayerID
+        FROM PlayerGameStatistics
+        WHERE GameID = %s''',
+    "box_score.keys_by_games": '''
+        SELECT GameID, PlayerID
+        FROM PlayerGameStatistics
+        WHERE GameID IN ({ids})''',
+    "box_scores.by_games": '''
+        SELECT PlayerGameStatistics.GameID, PlayerGameStatistics.PlayerID, Player.Name,
+               Points, Rebounds, Assists, Blocks, Steals, Turnovers, MinutesPlayed, Fouls
+        FROM PlayerGameStatistics
+        JOIN Player ON Player.PlayerID = PlayerGameStatistics.PlayerID
+        WHERE PlayerGameStatistics.GameID IN ({ids})
+        ORDER BY PlayerGameStatistics.GameID, PlayerGameStatistics.PlayerID''',
+    "box_score.averages_by_player_name": '''
+        SELECT AVG(Points) AS AvgPoints, AVG(Rebounds) AS AvgRebounds, AVG(Assists) AS AvgAssists,
+               AVG(Blocks) AS AvgBlocks, AVG(Steals) AS AvgSteals, AVG(Turnovers) AS AvgTurnovers,
+               AVG(MinutesPlayed) AS AvgMinutesPlayed, AVG(Fouls) AS AvgFouls
+        FROM PlayerGameStatistics
+        INNER JOIN Player ON PlayerGameStatistics.PlayerID = Player.PlayerID
+        WHERE Player.Name = %s''',
+
+    # ---------- listings (app.list_response adds WHERE / ORDER BY / LIMIT) ----------
+    "players.list": '''
+        SELECT PlayerID, Name, Height, Weight, Age, Position, TeamID FROM Player''',
+    "games.list": '''
+        SELECT GameID, Date, Location, HomeTeamID, AwayTeamID, HomeScore, AwayScore FROM Game''',
+    "player.games.list": '''
+        SELECT PlayerGameStatistics.GameID, Game.Date, Points, Rebounds, Assists,
+               Blocks, Steals, Turnovers, MinutesPlayed, Fouls
+        FROM PlayerGameStatistics
+        JOIN Game ON Game.GameID = PlayerGameStatistics.GameID''',
+}
+
+# columns the update statements may SET, and the key each table is updated by
+UPDATABLE = {
+    "Player": (["Name", "Height", "Weight", "Age", "Position", "TeamID"], "PlayerID = %s"),
+    "Team": (["Name", "City", "Division", "Conference"], "TeamID = %s"),
+    "Coach": (["Name", "Salary", "TeamID"], "CoachID = %s"),
+    "Game": (["Date", "Location", "HomeTeamID", "AwayTeamID", "HomeScore", "AwayScore"],
+             "GameID = %s"),
+    "PlayerGameStatistics": (STAT_COLUMNS, "GameID = %s AND PlayerID = %s"),
+}
+
+for _table, (_columns, _key) in UPDATABLE.items():
+    for _column in _columns:
+        QUERIES[f"update.{_table}.{_column}"] = f'''
+        UPDATE {_table}
+        SET {_column} = %s
+        WHERE {_key}'''
+
+# per-game average of a PlayerStatTotals column; the leaderboard queries
+# order by exactly this expression so migrations.AVERAGE_INDEXES serve them
+def average_expression(column, table=""):
+    prefix = f"{table}." if table else ""
+    return f"{prefix}{column} * 1.0 / NULLIF({prefix}GamesPlayed, 0)"
+
+
+for _column in STAT_COLUMNS:
+    QUERIES[f"box_score.stat.{_column}"] = f'''
+        SELECT {_column} FROM PlayerGameStatistics
+        WHERE GameID = %s AND PlayerID = %s'''
+    QUERIES[f"leaders.avg.{_column}"] = f'''
+        SELECT
+            Player.PlayerID,
+            Player.Name,
+            {average_expression(_column, "PlayerStatTotals")} AS avg_value
+        FROM PlayerStatTotals
+        JOIN Player ON Player.PlayerID = PlayerStatTotals.PlayerID
+        WHERE PlayerStatTotals.GamesPlayed > 0
+        ORDER BY avg_value DESC
+        LIMIT %s'''
+
+
+# raised at startup when catalog queries do not compile against the schema
+class CatalogError(Exception):
+    pass
+
+
+# function returns a catalog query; {name} slots are expanded into
+# that many placeholders, e.g. sql("team.names_by_ids", ids=3).
+# batch queries take their list through a slot: WHERE ... IN ({ids})
+def sql(name, **counts):
+    query = QUERIES[name]
+    if counts:
+        query = query.format(**{slot: ("%s,"*n)[:-1] for slot, n in counts.items()})
+    return query
+
+
+# function returns a batch query and its params for a non-empty list of values.
+# the list is padded to a power of two by repeating its last value, which
+# leaves IN (...) unchanged while capping the distinct statements (and so
+# the prepared statements cached per connection) at a handful per query
+def batch(name, slot, values):
+    values = list(values)
+    size = 1
+    while size < len(values):
+        size *= 2
+    values += values[-1:] * (size - len(values))
+    return sql(name, **{slot: size}), tuple(values)
+
+
+# function returns the UPDATE for one column of a table.
+# raises ValueError for columns that may not be updated
+def update_sql(table, column):
+    columns, _ = UPDATABLE[table]
+    if column not in columns:
+        raise ValueError(f"Invalid column '{column}'")
+    return QUERIES[f"update.{table}.{column}"]
+
+
+# function compiles every catalog query against the live schema without
+# running it. returns [(name, error message)] for the ones that fail
+def self_test(db):
+    failures = []
+    for name, query in QUERIES.items():
+        slots = [field for _, field, _, _ in Formatter().parse(query) if field]
+        if slots:
+            query = sql(name, **{slot: 1 for slot in slots})
+        try:
+            db.check_statement(query)
+        except Exception as e:
+            failures.append((name, str(e)))
+    return failures
+
+
+# function runs self_test and raises CatalogError listing every failure
+def verify(db):
+    failures = self_test(db)
+    if failures:
+        raise CatalogError("broken catalog queries: " + "; ".join(
+            f"{name}: {error}" for name, error in failures))
+    print(f"Query catalog ok ({len(QUERIES)} statements)")
+
+
+def main():
+    from backends import from_env
+    from db_operations import db_operations
+
+    db = db_operations(backend=from_env(), pool_size=1)
+    failures = self_test(db)
+    db.destructor()
+    for name, error in failures:
+        print(f"FAIL {name}: {error}")
+    if failures:
+        raise SystemExit(f"{len(failures)} of {len(QUERIES)} catalog queries failed")
+    print(f"all {len(QUERIES)} catalog queries compile")
+
+
+if __name__ == "__main__":
+    main()
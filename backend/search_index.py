@@ -0,0 +1,243 @@
+# backend/search_index.py
+#
+# In-memory typeahead over player, team and coach names. Names are folded
+# to lowercase ASCII ("Nikola Jokić" -> "nikola jokic") and split into
+# tokens. A query matches an entry when every query token matches one of
+# its tokens, either as a prefix (bisect over the sorted token list) or,
+# for typos, within a small edit distance (candidate tokens come from a
+# trigram index). Results are ranked exact name > name prefix > token
+# prefixes > typo matches.
+
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+_PLAYERS_QUERY = "SELECT PlayerID, Name, TeamID FROM Player"
+_TEAMS_QUERY = "SELECT TeamID, Name FROM Team"
+_COACHES_QUERY = "SELECT CoachID, Name, TeamID FROM Coach"
+
+KINDS = ("player", "team", "coach")
+
+# letters NFKD does not split into a base letter + accent
+_FOLD = str.maketrans({"ø": "o", "đ": "d", "ł": "l", "ß": "ss", "æ": "ae",
+                       "œ": "oe", "ı": "i", "þ": "th", "ð": "d", "'": None,
+                       "’": None, ".": None})
+
+
+# function folds a name to lowercase ASCII words, e.g.
+# "Šarūnas Marčiulionis" -> "sarunas marciulionis"
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "").casefold().translate(_FOLD)
+    text = "".join(c if c.isalnum() else " " for c in text
+                   if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# function returns the edit distance of a and b counting a swap of two
+# adjacent letters as one edit, or limit + 1 as soon as it is certain
+# to exceed limit
+def edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+# typos allowed in a query token; short tokens must match as prefixes
+def _typo_limit(token):
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+class search_index():
+
+    # db: db_operations to load from; loading waits for the first query
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._clear()
+
+    def _clear(self):
+        self._entries = {}     # (kind, id) -> entry dict
+        self._tokens = []      # sorted distinct tokens
+        self._postings = {}    # token -> set of (kind, id)
+        self._trigrams = {}    # trigram -> set of tokens
+
+    # function (re)builds the index from the Player, Team and Coach tables
+    def load(self):
+        players = self.db.select_query(_PLAYERS_QUERY)
+        teams = self.db.select_query(_TEAMS_QUERY)
+        coaches = self.db.select_query(_COACHES_QUERY)
+        with self._lock:
+            self._clear()
+            for team_id, name in teams:
+                self._add("team", team_id, name, None)
+            for player_id, name, team_id in players:
+                self._add("player", player_id, name, team_id)
+            for coach_id, name, team_id in coaches:
+                self._add("coach", coach_id, name, team_id)
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    # caller holds the lock
+    def _add(self, kind, entry_id, name, team_id):
+        norm = normalize(name)
+        tokens = set(norm.split())
+        key = (kind, entry_id)
+        self._entries[key] = {"name": name, "norm": norm, "tokens": tokens,
+                              "team_id": team_id}
+        for token in tokens:
+            keys = self._postings.get(token)
+            if keys is None:
+                keys = self._postings[token] = set()
+                insort(self._tokens, token)
+                for trigram in _trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            keys.add(key)
+
+    # caller holds the lock
+    def _remove(self, kind, entry_id):
+        key = (kind, entry_id)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        for token in entry["tokens"]:
+            keys = self._postings[token]
+            keys.discard(key)
+            if not keys:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+                for trigram in _trigrams(token):
+                    self._trigrams[trigram].discard(token)
+        return entry
+
+    # ---------- write hooks ----------
+
+    # function adds an entry or replaces its name and team
+    def set(self, kind, entry_id, name, team_id=None):
+        with self._lock:
+            if not self._loaded:
+                return
+            self._remove(kind, entry_id)
+            self._add(kind, entry_id, name, team_id)
+
+    # function changes an entry's name and/or team, keeping the other
+    def update(self, kind, entry_id, name=None, team_id=None):
+        with self._lock:
+            if not self._loaded:
+                return
+            entry = self._entries.get((kind, entry_id))
+            if entry is None:
+                return
+            if name is not None and name != entry["name"]:
+                self._remove(kind, entry_id)
+                self._add(kind, entry_id, name, entry["team_id"])
+                entry = self._entries[(kind, entry_id)]
+            if team_id is not None:
+                entry["team_id"] = team_id
+
+    def remove(self, kind, entry_id):
+        with self._lock:
+            if self._loaded:
+                self._remove(kind, entry_id)
+
+    # ---------- reads ----------
+
+    # caller holds the lock. returns {(kind, id): score} for entries with
+    # a token matching query token t: 1.0 exact, 0.9 prefix, less for typos
+    def _match_token(self, t):
+        matches = {}
+        tokens = self._tokens
+        i = bisect_left(tokens, t)
+        while i < len(tokens) and tokens[i].startswith(t):
+            token = tokens[i]
+            i += 1
+            score = 1.0 if token == t else 0.9
+            for key in self._postings[token]:
+                if matches.get(key, 0) < score:
+                    matches[key] = score
+        limit = _typo_limit(t)
+        if limit == 0:
+            return matches
+
+        # typo tolerance: tokens sharing trigrams with t, confirmed by edit
+        # distance to the whole token or to its first len(t) letters
+        shared = {}
+        for trigram in _trigrams(t):
+            for token in self._trigrams.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        for token, count in shared.items():
+            if count < 2:
+                continue
+            distance = min(edit_distance(t, token, limit),
+                           edit_distance(t, token[:len(t)], limit))
+            if distance > limit:
+                continue
+            score = 0.8 - 0.15 * distance
+            for key in self._postings[token]:
+                if matches.get(key, 0) < score:
+                    matches[key] = score
+        return matches
+
+    # function returns up to limit entries matching query, best first.
+    # kinds: iterable of "player", "team", "coach" (all when None)
+    def search(self, query, limit=10, kinds=None):
+        norm = normalize(query)
+        tokens = list(dict.fromkeys(norm.split()))
+        if not tokens:
+            return []
+        kinds = set(kinds or KINDS)
+        with self._lock:
+            self._ensure_loaded()
+            scores = None
+            for t in tokens:
+                matches = self._match_token(t)
+                if scores is None:
+                    scores = {k: s for k, s in matches.items() if k[0] in kinds}
+                else:
+                    scores = {k: s + matches[k] for k, s in scores.items() if k in matches}
+                if not scores:
+                    return []
+
+            ranked = []
+            for key, score in scores.items():
+                entry = self._entries[key]
+                score /= len(tokens)
+                if entry["norm"] == norm:
+                    score += 1.0
+                elif entry["norm"].startswith(norm):
+                    score += 0.5
+                ranked.append((-score, len(entry["norm"]), entry["norm"], key))
+            ranked.sort()
+
+            result = []
+            for neg_score, _, _, key in ranked[:limit]:
+                entry = self._entries[key]
+                item = {"kind": key[0], "id": key[1], "name": entry["name"],
+                        "score": round(-neg_score, 3)}
+                if key[0] != "team":
+                    team = self._entries.get(("team", entry["team_id"]))
+                    item["team_id"] = entry["team_id"]
+                    item["team"] = team["name"] if team else None
+                result.append(item)
+            return result
@@ -0,0 +1,219 @@
+# backend/similar.py
+#
+# Nearest-neighbour search over players. Each player with games is a
+# vector of their per-game averages plus Height, Weight, Age and a
+# one-hot Position, every column scaled to zero mean and unit variance,
+# and the players most like another are the closest vectors.
+#
+# Queries run against an immutable index (ids + matrix) swapped in whole
+# by rebuild(), so reads never wait on a rebuild. Writes only mark the
+# index stale; a background thread rebuilds it at most every
+# min_interval seconds. Search is a brute-force distance computation
+# (one matrix-vector product), or a scipy KD-tree with algorithm="kdtree"
+# for much larger, e.g. historical, data.
+#
+#   python similar.py <PlayerID> [k]
+#   python bench_similar.py          # query latency vs league size
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+from aggregates import STAT_COLUMNS
+
+POSITIONS = ["PG", "SG", "SF", "PF", "C"]
+
+ALGORITHMS = ("brute", "kdtree")
+
+log = logging.getLogger("nba.similar")
+
+_LOAD_QUERY = f'''
+SELECT Player.PlayerID, Player.Name, Player.TeamID, Player.Position,
+       Player.Height, Player.Weight, Player.Age, PlayerStatTotals.GamesPlayed,
+       {", ".join(f"PlayerStatTotals.{c}" for c in STAT_COLUMNS)}
+FROM Player
+JOIN PlayerStatTotals ON Player.PlayerID = PlayerStatTotals.PlayerID
+WHERE PlayerStatTotals.GamesPlayed > 0
+'''
+
+FEATURES = ([f"avg_{c}" for c in STAT_COLUMNS] + ["Height", "Weight", "Age"]
+            + [f"is_{p}" for p in POSITIONS])
+
+
+# function returns the raw feature matrix for _LOAD_QUERY rows; missing
+# bio fields take the column mean
+def feature_matrix(rows):
+    matrix = np.zeros((len(rows), len(FEATURES)), dtype=np.float64)
+    bio = np.full((len(rows), 3), np.nan)
+    for i, row in enumerate(rows):
+        games = row[7]
+        matrix[i, :len(STAT_COLUMNS)] = [(v or 0) / games for v in row[8:]]
+        bio[i] = [np.nan if v is None else v for v in row[4:7]]
+        if row[3] in POSITIONS:
+            matrix[i, len(STAT_COLUMNS) + 3 + POSITIONS.index(row[3])] = 1.0
+    known = ~np.isnan(bio)
+    means = np.where(known, bio, 0.0).sum(axis=0) / np.maximum(known.sum(axis=0), 1)
+    matrix[:, len(STAT_COLUMNS):len(STAT_COLUMNS) + 3] = np.where(known, bio, means)
+    return matrix
+
+
+# function scales every column to zero mean and unit variance (constant
+# columns are left at zero)
+def normalize(matrix):
+    if len(matrix) == 0:
+        return matrix
+    std = matrix.std(axis=0)
+    return (matrix - matrix.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+
+class _index():
+
+    def __init__(self, ids, info, vectors, algorithm):
+        self.ids = ids
+        self.info = info                # PlayerID -> (Name, TeamID, Position)
+        self.rows = {player_id: i for i, player_id in enumerate(ids.tolist())}
+        self.vectors = vectors
+        self.norms = (vectors * vectors).sum(axis=1)
+        self.tree = None
+        if algorithm == "kdtree" and len(ids):
+            # imported here so the brute-force default needs only NumPy
+            from scipy.spatial import cKDTree
+            self.tree = cKDTree(vectors)
+
+    # function returns [(row, distance)] of the k rows closest to row i,
+    # nearest first, i itself excluded
+    def nearest(self, i, k):
+        k = min(k, len(self.ids) - 1)
+        if k <= 0:
+            return []
+        query = self.vectors[i]
+        if self.tree is not None:
+            distances, rows = self.tree.query(query, k + 1)
+            pairs = zip(rows.tolist(), distances.tolist())
+        else:
+            # |x - q|^2 = |x|^2 + |q|^2 - 2 x.q for every row at once
+            squared = np.maximum(self.norms + self.norms[i] - 2 * (self.vectors @ query), 0.0)
+            squared[i] = np.inf
+            rows = np.argpartition(squared, k)[:k]
+            rows = rows[np.argsort(squared[rows], kind="stable")]
+            pairs = zip(rows.tolist(), np.sqrt(squared[rows]).tolist())
+        return [(row, distance) for row, distance in pairs if row != i][:k]
+
+
+class similarity_index():
+
+    # db: db_operations to load from
+    # algorithm: "brute" or "kdtree" (needs scipy)
+    # min_interval: seconds between background rebuilds
+    def __init__(self, db, algorithm="brute", min_interval=5.0):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{algorithm}'")
+        self.db = db
+        self.algorithm = algorithm
+        self.min_interval = min_interval
+        self._index = None
+        self._lock = threading.Lock()
+        self._stale = threading.Event()
+        self._thread = None
+        self.built_at = None
+        self.build_ms = None
+
+    # function builds a new index from the database and swaps it in
+    def rebuild(self):
+        start = time.perf_counter()
+        rows = self.db.select_query(_LOAD_QUERY)
+        rows.sort(key=lambda row: row[0])
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        info = {row[0]: (row[1], row[2], row[3]) for row in rows}
+        index = _index(ids, info, normalize(feature_matrix(rows)), self.algorithm)
+        self._index = index
+        self.build_ms = (time.perf_counter() - start) * 1000
+        self.built_at = time.time()
+        return len(ids)
+
+    def _current(self):
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self.rebuild()
+                index = self._index
+        return index
+
+    # ---------- write hooks ----------
+
+    # function schedules a background rebuild, e.g. after box scores or
+    # player bio fields changed; without the background thread running
+    # the next query rebuilds instead
+    def mark_stale(self):
+        if self._thread is None:
+            self._index = None
+        else:
+            self._stale.set()
+
+    # ---------- reads ----------
+
+    # function returns the k players most similar to player_id, nearest
+    # first, or None when the player has no games
+    def similar(self, player_id, k=10):
+        index = self._current()
+        i = index.rows.get(player_id)
+        if i is None:
+            return None
+        result = []
+        for row, distance in index.nearest(i, k):
+            other = int(index.ids[row])
+            name, team_id, position = index.info[other]
+            result.append({"player_id": other, "name": name, "team_id": team_id,
+                           "position": position, "distance": round(distance, 4),
+                           "similarity": round(1 / (1 + distance), 4)})
+        return result
+
+    def stats(self):
+        index = self._index
+        return {"players": len(index.ids) if index is not None else 0,
+                "algorithm": self.algorithm, "build_ms": self.build_ms,
+                "built_at": self.built_at, "stale": self._stale.is_set()}
+
+    # ---------- background rebuilds ----------
+
+    def _run(self):
+        while True:
+            self._stale.wait()
+            self._stale.clear()
+            try:
+                self.rebuild()
+            except Exception:
+                log.exception("similarity index rebuild failed; retrying after min_interval")
+                self._stale.set()
+            # changes arriving meanwhile wait for the next rebuild
+            time.sleep(self.min_interval)
+
+    # function starts the background rebuild thread (once)
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="similar-rebuild",
+                                                daemon=True)
+                self._thread.start()
+
+
+def main():
+    import sys
+    from backends import from_env
+    from db_operations import db_operations
+
+    player_id = int(sys.argv[1])
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    db = db_operations(backend=from_env(), pool_size=1)
+    index = similarity_index(db)
+    for entry in index.similar(player_id, k) or []:
+        print(f"{entry['player_id']:>6}  {entry['name'] or '':<28} {entry['position'] or '':<3} "
+              f"distance {entry['distance']:.3f}")
+    db.destructor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# backend/snapshot.py
+#
+# Columnar binary snapshot of the league for read-only workers. Every
+# table is stored column by column as a typed little-endian array; text
+# columns hold int32 codes into one string table shared by all tables
+# (each distinct string is stored once). Workers memory-map the file, so
+# opening it costs a header parse and every process on the host shares
+# the same pages instead of holding its own fetchall() tuples.
+#
+# Like export_sqlite.py, the file is written next to the target and
+# swapped in with os.replace; readers holding the old mapping keep it
+# until they call snapshot_watcher.current() again (column_store does on
+# every read).
+#
+# layout: MAGIC | offset of the arrays (uint64) | JSON header | arrays,
+# each starting on an ALIGN byte boundary at the offset the header lists
+#
+#   python snapshot.py export league.snap
+#   python snapshot.py info league.snap
+#   NBA_SNAPSHOT=league.snap python app.py
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+import aggregates
+from db_operations import TABLES
+
+MAGIC = b"NBASNAP1"
+VERSION = 1
+ALIGN = 64
+
+_INT32 = np.iinfo(np.int32)
+
+# box scores are written grouped by player, so a reader finds a player's
+# games as one range of rows (column_store.py)
+_ORDER = {"PlayerGameStatistics": " ORDER BY PlayerID, GameID"}
+
+
+# function maps a declared SQL type to a snapshot column kind
+def column_kind(sql_type):
+    sql_type = sql_type.upper()
+    if "CHAR" in sql_type or "TEXT" in sql_type:
+        return "str"
+    if sql_type.startswith("DATE"):
+        return "date"
+    if any(t in sql_type for t in ("FLOAT", "DOUBLE", "DECIMAL", "REAL", "NUMERIC")):
+        return "float"
+    return "int"
+
+
+# function converts one column's values to (array, null mask or None)
+def _encode(kind, values, strings):
+    if kind == "str":
+        codes = [-1 if v is None else strings.setdefault(str(v), len(strings)) for v in values]
+        return np.array(codes, dtype="<i4"), None
+    if kind == "date":
+        return np.array([str(v) if v is not None else "NaT" for v in values],
+                        dtype="<M8[D]"), None
+    nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    nulls = nulls if nulls.any() else None
+    if kind == "float":
+        return np.array([0.0 if v is None else float(v) for v in values], dtype="<f8"), nulls
+    array = np.array([0 if v is None else int(v) for v in values], dtype="<i8")
+    if len(array) == 0 or (array.min() >= _INT32.min and array.max() <= _INT32.max):
+        array = array.astype("<i4")
+    return array, nulls
+
+
+# function writes db's tables to a snapshot at path, replacing any
+# previous one atomically. returns {table: rows}
+def export(db, path, tables=TABLES, batch_size=5000):
+    strings = {}
+    arrays = []
+
+    # offsets are relative to the first array, which follows the header
+    def place(array):
+        offset = 0
+        if arrays:
+            last_offset, last = arrays[-1]
+            offset = last_offset + last.nbytes
+            offset += -offset % ALIGN
+        arrays.append((offset, np.ascontiguousarray(array)))
+        return offset
+
+    header = {"version": VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "tables": {}}
+    names = {table: [(name, column_kind(sql_type))
+                     for name, sql_type in db.backend.column_types(db, table)]
+             for table in tables}
+    # every table and the box-score write version come from one consistent
+    # read, so a reader knows exactly which writes the file holds (see
+    # column_store's replay on swap)
+    with db.get_cursor(commit=True) as cursor:
+        db.backend.begin_snapshot(cursor)
+        header["box_score_version"] = aggregates.read_version(cursor)
+        for table in tables:
+            cursor.execute(f"SELECT {', '.join(name for name, _ in names[table])} "
+                           f"FROM {table}{_ORDER.get(table, '')}")
+            values = [[] for _ in names[table]]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    for column, value in zip(values, row):
+                        column.append(value)
+            entry = header["tables"][table] = {"rows": len(values[0]) if values else 0,
+                                               "columns": {}}
+            for (name, kind), column in zip(names[table], values):
+                array, nulls = _encode(kind, column, strings)
+                entry["columns"][name] = {
+                    "kind": kind, "dtype": array.dtype.str, "offset": place(array),
+                    "nulls": place(nulls) if nulls is not None else None}
+
+    text = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(text) + 1, dtype="<i8")
+    np.cumsum([len(t) for t in text], out=offsets[1:])
+    header["strings"] = {"count": len(text), "offsets": place(offsets),
+                         "data": place(np.frombuffer(b"".join(text), dtype=np.uint8))}
+
+    raw = json.dumps(header).encode("utf-8")
+    base = len(MAGIC) + 8 + len(raw)
+    base += -base % ALIGN
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", base) + raw)
+        position = len(MAGIC) + 8 + len(raw)
+        for offset, array in arrays:
+            f.write(b"\0" * (base + offset - position))
+            f.write(array.tobytes())
+            position = base + offset + array.nbytes
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return {table: entry["rows"] for table, entry in header["tables"].items()}
+
+
+class league_snapshot():
+
+    # path: snapshot file, mapped read-only
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a league snapshot")
+        (self._base,) = struct.unpack_from("<Q", self._map, len(MAGIC))
+        header = self._map[len(MAGIC) + 8:self._base].rstrip(b"\0")
+        self.header = json.loads(header)
+        if self.header["version"] != VERSION:
+            raise ValueError(f"unsupported snapshot version {self.header['version']}")
+        strings = self.header["strings"]
+        self._string_offsets = self._array("<i8", strings["offsets"], strings["count"] + 1)
+        self._string_data = self._base + strings["data"]
+        self._decoded = {}
+
+    def _array(self, dtype, offset, count):
+        return np.frombuffer(self._map, dtype=dtype, count=count, offset=self._base + offset)
+
+    @property
+    def tables(self):
+        return list(self.header["tables"])
+
+    def rows(self, table):
+        return self.header["tables"][table]["rows"]
+
+    def columns(self, table):
+        return list(self.header["tables"][table]["columns"])
+
+    # function returns a column as a read-only array backed by the file:
+    # int32/int64, float64, datetime64[D] (NaT for NULL) or, for text,
+    # int32 codes into the string table (-1 for NULL)
+    def column(self, table, name):
+        entry = self.header["tables"][table]
+        spec = entry["columns"][name]
+        return self._array(spec["dtype"], spec["offset"], entry["rows"])
+
+    # function returns the NULL mask of a numeric column, or None when it
+    # has no NULLs
+    def nulls(self, table, name):
+        entry = self.header["tables"][table]
+        spec = entry["columns"][name]
+        if spec["nulls"] is None:
+            return None
+        return self._array(bool, spec["nulls"], entry["rows"])
+
+    # function returns string code i, or None for -1
+    def string(self, code):
+        if code < 0:
+            return None
+        text = self._decoded.get(code)
+        if text is None:
+            start, end = self._string_offsets[code], self._string_offsets[code + 1]
+            text = self._map[self._string_data + start:self._string_data + end].decode("utf-8")
+            self._decoded[code] = text
+        return text
+
+    # function returns a column as Python values (str / int / float / date
+    # strings, None for NULL), e.g. to build small lookup dicts
+    def values(self, table, name):
+        spec = self.header["tables"][table]["columns"][name]
+        array = self.column(table, name)
+        if spec["kind"] == "str":
+            return [self.string(int(code)) for code in array]
+        if spec["kind"] == "date":
+            return [None if np.isnat(d) else str(d) for d in array]
+        nulls = self.nulls(table, name)
+        values = array.tolist()
+        if nulls is not None:
+            values = [None if null else v for v, null in zip(values, nulls)]
+        return values
+
+    # function returns an int column with NULLs replaced by fill
+    def ints(self, table, name, fill=-1):
+        array = self.column(table, name)
+        nulls = self.nulls(table, name)
+        return array if nulls is None else np.where(nulls, fill, array)
+
+
+# keeps the newest snapshot at path mapped; checks for a published
+# replacement at most every check_interval seconds
+class snapshot_watcher():
+
+    def __init__(self, path, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._identity = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    # function returns the newest snapshot; cheap enough for every read
+    def current(self):
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is not None and now - self._checked < self.check_interval:
+                return self._snapshot
+            self._checked = now
+            stat = os.stat(self.path)
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if identity != self._identity:
+                # the old mapping stays valid for whoever still holds it
+                self._snapshot = league_snapshot(self.path)
+                self._identity = identity
+            return self._snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or inspect a league snapshot")
+    parser.add_argument("command", choices=["export", "info"])
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from backends import from_env
+        from db_operations import db_operations
+
+        db = db_operations(backend=from_env(), pool_size=1)
+        start = time.perf_counter()
+        counts = export(db, args.path)
+        db.destructor()
+        print(f"Snapshot written to {args.path} in {time.perf_counter() - start:.2f}s: "
+              + ", ".join(f"{n} {table}" for table, n in counts.items()))
+        return
+
+    start = time.perf_counter()
+    snap = league_snapshot(args.path)
+    print(f"{args.path}: {os.path.getsize(args.path)} bytes, created {snap.header['created']}, "
+          f"opened in {(time.perf_counter() - start) * 1000:.2f}ms, "
+          f"{snap.header['strings']['count']} distinct strings")
+    for table in snap.tables:
+        columns = ", ".join(f"{name}:{spec['kind']}"
+                            for name, spec in snap.header["tables"][table]["columns"].items())
+        print(f"  {table:<22} {snap.rows(table):>8} rows  {columns}")
+
+
+if __name__ == "__main__":
+    main()
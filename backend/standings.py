@@ -0,0 +1,201 @@
+# backend/standings.py
+#
+# In-memory standings. Every team keeps a running record (wins, losses,
+# home/away splits, points for/against) and its results in date order,
+# so adding a game touches two records and an insort, and a standings
+# page only sorts the teams of each group. load() is the full rebuild
+# from the Game table, for startup and after backfills.
+#
+# A game counts once both scores are set and differ; scheduled games
+# (NULL or equal scores) are ignored.
+#
+#   python standings.py [conference|division|league]
+
+import threading
+from bisect import insort
+
+_GAMES_QUERY = '''
+SELECT GameID, Date, HomeTeamID, AwayTeamID, HomeScore, AwayScore
+FROM Game
+WHERE HomeScore IS NOT NULL AND AwayScore IS NOT NULL
+'''
+_TEAMS_QUERY = "SELECT TeamID, Name, Conference, Division FROM Team"
+
+GROUPS = ("conference", "division", "league")
+
+
+def _record(name, conference, division):
+    return {
+        "name": name, "conference": conference, "division": division,
+        "wins": 0, "losses": 0, "home_wins": 0, "home_losses": 0,
+        "away_wins": 0, "away_losses": 0, "points_for": 0, "points_against": 0,
+        # sorted (date, GameID, won) tuples, oldest first
+        "results": [],
+    }
+
+
+def _win_pct(wins, losses):
+    games = wins + losses
+    return wins / games if games else 0.0
+
+
+class standings_engine():
+
+    # db: db_operations to load from; loading waits for the first query
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._teams = {}
+        self._games = set()
+
+    # function (re)builds every record from the Team and Game tables
+    def load(self):
+        teams = self.db.select_query(_TEAMS_QUERY)
+        games = self.db.select_query(_GAMES_QUERY)
+        with self._lock:
+            self._teams = {row[0]: _record(*row[1:]) for row in teams}
+            self._games = set()
+            for game in games:
+                self._apply(*game)
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    # caller holds the lock
+    def _apply(self, game_id, date, home_id, away_id, home_score, away_score):
+        if home_score is None or away_score is None or home_score == away_score:
+            return
+        if game_id in self._games:
+            return
+        home, away = self._teams.get(home_id), self._teams.get(away_id)
+        if home is None or away is None:
+            # a team this process has not seen yet; rebuild on next read
+            self._loaded = False
+            return
+        self._games.add(game_id)
+        home_won = home_score > away_score
+        key = str(date) if date is not None else ""
+        for record, won, side, scored, allowed in (
+                (home, home_won, "home", home_score, away_score),
+                (away, not home_won, "away", away_score, home_score)):
+            outcome = "wins" if won else "losses"
+            record[outcome] += 1
+            record[f"{side}_{outcome}"] += 1
+            record["points_for"] += scored
+            record["points_against"] += allowed
+            insort(record["results"], (key, game_id, won))
+
+    # ---------- write hooks ----------
+
+    # function folds a newly added game into both teams' records
+    def add_game(self, game_id, date, home_team_id, away_team_id, home_score, away_score):
+        with self._lock:
+            if not self._loaded:
+                return
+            self._apply(game_id, date, home_team_id, away_team_id, home_score, away_score)
+
+    # function registers a new team or replaces its name/conference/division
+    def set_team(self, team_id, name, conference, division):
+        with self._lock:
+            if not self._loaded:
+                return
+            record = self._teams.get(team_id)
+            if record is None:
+                self._teams[team_id] = _record(name, conference, division)
+            else:
+                record.update(name=name, conference=conference, division=division)
+
+    # function applies a PUT /api/team column change
+    def update_team(self, team_id, column, value):
+        field = {"Name": "name", "Conference": "conference", "Division": "division"}.get(column)
+        with self._lock:
+            if not self._loaded or field is None or team_id not in self._teams:
+                return
+            self._teams[team_id][field] = value
+
+    # ---------- reads ----------
+
+    @staticmethod
+    def _row(team_id, record):
+        results = record["results"]
+        streak = ""
+        if results:
+            last = results[-1][2]
+            length = 0
+            for _, _, won in reversed(results):
+                if won != last:
+                    break
+                length += 1
+            streak = f"{'W' if last else 'L'}{length}"
+        last_10 = [won for _, _, won in results[-10:]]
+        return {
+            "team_id": team_id,
+            "name": record["name"],
+            "conference": record["conference"],
+            "division": record["division"],
+            "wins": record["wins"],
+            "losses": record["losses"],
+            "win_pct": round(_win_pct(record["wins"], record["losses"]), 3),
+            "home": f"{record['home_wins']}-{record['home_losses']}",
+            "away": f"{record['away_wins']}-{record['away_losses']}",
+            "points_for": record["points_for"],
+            "points_against": record["points_against"],
+            "point_diff": record["points_for"] - record["points_against"],
+            "streak": streak,
+            "last_10": f"{sum(last_10)}-{len(last_10) - sum(last_10)}",
+        }
+
+    # function returns standings grouped by conference, division or the
+    # whole league, best record first, with games back of each group leader.
+    # conference / division narrow the result to one group
+    def standings(self, group="conference", conference=None, division=None):
+        if group not in GROUPS:
+            raise ValueError(f"Unknown group '{group}'")
+        with self._lock:
+            self._ensure_loaded()
+            rows = [self._row(team_id, record) for team_id, record in self._teams.items()
+                    if (conference is None or record["conference"] == conference)
+                    and (division is None or record["division"] == division)]
+
+        groups = {}
+        for row in rows:
+            name = "league" if group == "league" else row[group]
+            groups.setdefault(name, []).append(row)
+
+        result = []
+        for name in sorted(groups, key=lambda g: (g is None, g or "")):
+            teams = sorted(groups[name], key=lambda r: (
+                -_win_pct(r["wins"], r["losses"]), -r["wins"], -r["point_diff"], r["name"] or ""))
+            leader = teams[0]
+            for row in teams:
+                row["games_back"] = ((leader["wins"] - row["wins"])
+                                     + (row["losses"] - leader["losses"])) / 2
+            result.append({group: name, "teams": teams})
+        return result
+
+
+def main():
+    import sys
+    from backends import from_env
+    from db_operations import db_operations
+
+    group = sys.argv[1] if len(sys.argv) > 1 else "conference"
+    db = db_operations(backend=from_env(), pool_size=1)
+    engine = standings_engine(db)
+    for block in engine.standings(group):
+        print(f"\n{block[group]}")
+        print(f"{'team':<24} {'W':>3} {'L':>3} {'PCT':>6} {'GB':>5} {'HOME':>7} "
+              f"{'AWAY':>7} {'DIFF':>6} {'STRK':>5} {'L10':>5}")
+        for row in block["teams"]:
+            print(f"{row['name'] or '':<24} {row['wins']:>3} {row['losses']:>3} "
+                  f"{row['win_pct']:>6.3f} {row['games_back']:>5.1f} {row['home']:>7} "
+                  f"{row['away']:>7} {row['point_diff']:>+6} {row['streak']:>5} "
+                  f"{row['last_10']:>5}")
+    db.destructor()
+
+
+if __name__ == "__main__":
+    main()
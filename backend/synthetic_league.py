@@ -0,0 +1,183 @@
+# backend/synthetic_league.py
+#
+# Generates a reproducible synthetic league: teams split into two
+# conferences of three divisions, a coach and a roster per team, seasons
+# of games where every team plays games_per_team times, and a box score
+# for every player who took the floor. Game scores are the sums of the
+# box-score points. PlayerStatTotals is rebuilt at the end.
+#
+#   python synthetic_league.py --db league.db --teams 30 --seasons 2
+
+import argparse
+import datetime
+import os
+import random
+
+import aggregates
+
+NICKNAMES = ["Hawks", "Celtics", "Nets", "Hornets", "Bulls", "Cavaliers", "Mavericks",
+             "Nuggets", "Pistons", "Warriors", "Rockets", "Pacers", "Clippers", "Lakers",
+             "Grizzlies", "Heat", "Bucks", "Timberwolves", "Pelicans", "Knicks", "Thunder",
+             "Magic", "76ers", "Suns", "Trail Blazers", "Kings", "Spurs", "Raptors",
+             "Jazz", "Wizards"]
+CITIES = ["Atlanta", "Boston", "Brooklyn", "Charlotte", "Chicago", "Cleveland", "Dallas",
+          "Denver", "Detroit", "San Francisco", "Houston", "Indianapolis", "Los Angeles",
+          "Los Angeles", "Memphis", "Miami", "Milwaukee", "Minneapolis", "New Orleans",
+          "New York", "Oklahoma City", "Orlando", "Philadelphia", "Phoenix", "Portland",
+          "Sacramento", "San Antonio", "Toronto", "Salt Lake City", "Washington"]
+CONFERENCES = {"East": ["Atlantic", "Central", "Southeast"],
+               "West": ["Northwest", "Pacific", "Southwest"]}
+FIRST_NAMES = ["James", "Luka", "Nikola", "Giannis", "Jayson", "Stephen", "Kevin", "Joel",
+               "Devin", "Anthony", "Damian", "Jimmy", "Kawhi", "Paul", "Trae", "Ja",
+               "Zion", "Donovan", "Jaylen", "Bam", "Domantas", "Tyrese", "Jalen", "De'Aaron",
+               "Shai", "Karl", "Rudy", "Pascal", "Julius", "Jrue", "José", "Théo",
+               "Dāvis", "Goran", "Bojan", "Jonas", "Álex", "Dennis", "Kristaps", "Šarūnas"]
+LAST_NAMES = ["Harden", "Dončić", "Jokić", "Antetokounmpo", "Tatum", "Curry", "Durant",
+              "Embiid", "Booker", "Davis", "Lillard", "Butler", "Leonard", "George",
+              "Young", "Morant", "Williamson", "Mitchell", "Brown", "Adebayo", "Sabonis",
+              "Haliburton", "Brunson", "Fox", "Gilgeous-Alexander", "Towns", "Gobert",
+              "Siakam", "Randle", "Holiday", "Calderón", "Maledon", "Bertāns", "Dragić",
+              "Bogdanović", "Valančiūnas", "Abrines", "Schröder", "Porziņģis", "Marčiulionis"]
+POSITIONS = ["PG", "SG", "SF", "PF", "C"]
+# players per team who get minutes in a game
+ACTIVE_PLAYERS = 10
+
+
+# function returns count distinct player names, cycling through the
+# first/last name pairs and numbering them once they run out
+def player_names(count, rng):
+    pairs = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    rng.shuffle(pairs)
+    names = []
+    for i in range(count):
+        name = pairs[i % len(pairs)]
+        names.append(name if i < len(pairs) else f"{name} {i // len(pairs) + 1}")
+    return names
+
+
+def _stat_line(rng, minutes):
+    scale = minutes / 36
+    points = int(rng.gauss(16, 7) * scale)
+    return (max(points, 0),
+            max(int(rng.gauss(6, 3) * scale), 0),
+            max(int(rng.gauss(4, 2.5) * scale), 0),
+            max(int(rng.gauss(0.6, 0.8) * scale), 0),
+            max(int(rng.gauss(1, 0.8) * scale), 0),
+            max(int(rng.gauss(2, 1.2) * scale), 0),
+            minutes,
+            min(max(int(rng.gauss(2.2, 1.3)), 0), 6))
+
+
+# function writes the league into db (tables must exist and be empty).
+# returns {"teams", "players", "games", "box_scores"} row counts
+def generate(db, teams=30, players_per_team=15, seasons=1, games_per_team=82,
+             start=datetime.date(2023, 10, 24), seed=408):
+    if teams < 2 or teams % 2:
+        raise ValueError("teams must be an even number of at least 2")
+    rng = random.Random(seed)
+
+    divisions = [(conference, division) for conference, names in CONFERENCES.items()
+                 for division in names]
+    team_rows = []
+    for i in range(teams):
+        name = NICKNAMES[i % len(NICKNAMES)]
+        city = CITIES[i % len(CITIES)]
+        if i >= len(NICKNAMES):
+            name = f"{name} {i // len(NICKNAMES) + 1}"
+        conference, division = divisions[i * len(divisions) // teams]
+        team_rows.append((i + 1, name, city, division, conference))
+    db.bulk_insert("INSERT INTO Team (TeamID, Name, City, Division, Conference) "
+                   "VALUES (%s, %s, %s, %s, %s)", team_rows)
+
+    db.bulk_insert("INSERT INTO Coach (CoachID, Name, Salary, TeamID) VALUES (%s, %s, %s, %s)",
+                   [(t, f"Coach {team_rows[t - 1][1]}", rng.randrange(2, 12) * 1000000, t)
+                    for t in range(1, teams + 1)])
+
+    names = player_names(teams * players_per_team, rng)
+    player_rows, rosters = [], {}
+    for i, name in enumerate(names):
+        team_id = i // players_per_team + 1
+        position = POSITIONS[i % len(POSITIONS)]
+        height = int(rng.gauss(78, 3)) + POSITIONS.index(position)
+        player_rows.append((i + 1, name, height, int(height * 2.8 + rng.gauss(0, 12)),
+                            rng.randrange(19, 39), position, team_id))
+        rosters.setdefault(team_id, []).append(i + 1)
+    db.bulk_insert("INSERT INTO Player (PlayerID, Name, Height, Weight, Age, Position, TeamID) "
+                   "VALUES (%s, %s, %s, %s, %s, %s, %s)", player_rows)
+
+    # every team plays once per slate; a season is games_per_team slates
+    team_ids = list(range(1, teams + 1))
+    game_rows, box_scores = [], []
+    game_id = 0
+    for season in range(seasons):
+        opening = start.replace(year=start.year + season)
+        for slate in range(games_per_team):
+            date = opening + datetime.timedelta(days=slate * 2 + rng.randrange(2))
+            rng.shuffle(team_ids)
+            for home, away in zip(team_ids[::2], team_ids[1::2]):
+                game_id += 1
+                scores = {}
+                for team_id in (home, away):
+                    active = rng.sample(rosters[team_id], min(ACTIVE_PLAYERS, players_per_team))
+                    scores[team_id] = 0
+                    for player_id in active:
+                        line = _stat_line(rng, rng.randrange(8, 42))
+                        scores[team_id] += line[0]
+                        box_scores.append((game_id, player_id) + line + (team_id,))
+                if scores[home] == scores[away]:
+                    # overtime: the home side's last listed player hits a three
+                    last = next(i for i in range(len(box_scores) - 1, -1, -1)
+                                if box_scores[i][0] == game_id and
+                                box_scores[i][1] in rosters[home])
+                    row = box_scores[last]
+                    box_scores[last] = row[:2] + (row[2] + 3,) + row[3:]
+                    scores[home] += 3
+                game_rows.append((game_id, date.isoformat(), CITIES[(home - 1) % len(CITIES)],
+                                  home, away, scores[home], scores[away]))
+    db.bulk_insert("INSERT INTO Game (GameID, Date, Location, HomeTeamID, AwayTeamID, "
+                   "HomeScore, AwayScore) VALUES (%s, %s, %s, %s, %s, %s, %s)", game_rows)
+    # databases from before migration 8 have no team column on box scores
+    columns = aggregates.BOX_SCORE_COLUMNS + ["TeamID"]
+    if "TeamID" not in {name for name, _ in db.backend.column_types(db, "PlayerGameStatistics")}:
+        columns = aggregates.BOX_SCORE_COLUMNS
+        box_scores = [row[:-1] for row in box_scores]
+    for i in range(0, len(box_scores), 20000):
+        db.bulk_insert(f"INSERT INTO PlayerGameStatistics ({', '.join(columns)}) "
+                       f"VALUES ({('%s,' * len(columns))[:-1]})",
+                       box_scores[i:i + 20000])
+    aggregates.rebuild(db)
+    return {"teams": len(team_rows), "players": len(player_rows),
+            "games": len(game_rows), "box_scores": len(box_scores)}
+
+
+# function builds a fresh SQLite league file at path, replacing it
+def build_sqlite(path, **sizes):
+    from backends import sqlite_backend
+    from db_operations import db_operations
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db = db_operations(backend=sqlite_backend(path), pool_size=1)
+    db.create_all_tables()
+    counts = generate(db, **sizes)
+    db.destructor()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic league")
+    parser.add_argument("--db", default="league.db", help="SQLite file to (re)create")
+    parser.add_argument("--teams", type=int, default=30)
+    parser.add_argument("--players", type=int, default=15, help="players per team")
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--games", type=int, default=82, help="games per team per season")
+    parser.add_argument("--seed", type=int, default=408)
+    args = parser.parse_args()
+    counts = build_sqlite(args.db, teams=args.teams, players_per_team=args.players,
+                          seasons=args.seasons, games_per_team=args.games, seed=args.seed)
+    print(", ".join(f"{n} {name}" for name, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# backend/tests/conftest.py
+#
+# Shared fixtures. Every test runs against the SQLite backend: an empty
+# migrated in-memory database (db), or a small synthetic league (league).
+# The app fixture imports app.py against its own league file, since the
+# module builds its db_operations from the environment at import time.
+#
+#   cd backend && python -m pytest -q
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import sqlite_backend  # noqa: E402
+from db_operations import db_operations  # noqa: E402
+from synthetic_league import build_sqlite, generate  # noqa: E402
+
+LEAGUE = {"teams": 4, "players_per_team": 6, "games_per_team": 6}
+
+
+@pytest.fixture
+def empty_db():
+    db = db_operations(backend=sqlite_backend(), pool_size=2)
+    yield db
+    db.destructor()
+
+
+@pytest.fixture
+def db(empty_db):
+    empty_db.create_all_tables()
+    return empty_db
+
+
+@pytest.fixture
+def league(db):
+    generate(db, **LEAGUE)
+    return db
+
+
+# app.py against a league file of its own, loaded once per test session
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("app") / "league.db")
+    build_sqlite(path, **LEAGUE)
+    os.environ["NBA_DB_BACKEND"] = "sqlite"
+    os.environ["NBA_SQLITE_PATH"] = path
+    os.environ["NBA_LIVE_FLUSH_SECONDS"] = "3600"
+    import app
+    app.warm_up()
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    app_module.cache.clear()
+    return app_module.app.test_client()
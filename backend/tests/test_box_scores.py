@@ -0,0 +1,57 @@
+# backend/tests/test_box_scores.py
+
+
+def _count(db):
+    return db.select_query("SELECT COUNT(*) FROM PlayerGameStatistics")[0][0]
+
+
+# a game and two players without lines in it
+def _free_lines(db):
+    for (game_id,) in db.select_query("SELECT GameID FROM Game ORDER BY GameID"):
+        players = db.select_query_params(
+            "SELECT PlayerID FROM Player WHERE PlayerID NOT IN "
+            "(SELECT PlayerID FROM PlayerGameStatistics WHERE GameID = %s) "
+            "ORDER BY PlayerID LIMIT 2", (game_id,))
+        if len(players) == 2:
+            return game_id, [row[0] for row in players]
+    raise AssertionError("every player has a line in every game")
+
+
+def test_box_score_for_unknown_game_or_player_is_rejected(app_module, client):
+    db = app_module.db
+    game_id, players = _free_lines(db)
+    before = _count(db)
+
+    response = client.post("/api/games/999999/boxscore", json=[{"player_id": players[0]}])
+    assert response.status_code == 400
+    assert "Unknown game" in response.get_json()["error"]
+
+    response = client.post(f"/api/games/{game_id}/boxscore",
+                           json=[{"player_id": players[0]}, {"player_id": 999999}])
+    assert response.status_code == 400
+    assert "Unknown player" in response.get_json()["error"]
+    assert _count(db) == before
+
+
+def test_duplicate_box_score_is_a_conflict(app_module, client):
+    db = app_module.db
+    game_id, players = _free_lines(db)
+    existing = db.select_query("SELECT GameID, PlayerID FROM PlayerGameStatistics LIMIT 1")[0]
+    before = _count(db)
+
+    response = client.post(f"/api/games/{existing[0]}/boxscore",
+                           json=[{"player_id": existing[1], "points": 3}])
+    assert response.status_code == 409
+    assert _count(db) == before
+
+    lines = [{"player_id": player_id, "points": 12} for player_id in players]
+    assert client.post(f"/api/games/{game_id}/boxscore", json=lines).status_code == 201
+    assert _count(db) == before + 2
+    response = client.post(f"/api/games/{game_id}/boxscore", json=lines[:1])
+    assert response.status_code == 409
+    assert _count(db) == before + 2
+
+    response = client.post("/api/player/log-game", json={
+        "game_id": game_id, "player_id": players[1], "points": 1, "rebounds": 1, "assists": 1})
+    assert response.status_code == 409
+    assert response.get_json()["error"]
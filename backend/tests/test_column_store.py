@@ -0,0 +1,227 @@
+# backend/tests/test_column_store.py
+
+import numpy as np
+import pytest
+
+import aggregates
+import snapshot
+from backends import sqlite_backend
+from column_store import box_score_store
+from db_operations import db_operations
+from live_scoring import live_scorer
+from queries import sql
+from synthetic_league import build_sqlite
+
+from conftest import LEAGUE
+
+
+@pytest.fixture
+def snap_path(league, tmp_path):
+    path = str(tmp_path / "league.snap")
+    snapshot.export(league, path)
+    return path
+
+
+def _player_ids(db):
+    return [row[0] for row in db.select_query("SELECT PlayerID FROM Player ORDER BY PlayerID")]
+
+
+# a box-score row (BOX_SCORE_COLUMNS order) for a game the player has no line in
+def _new_line(db, player_id):
+    game_id = db.select_query_params(
+        "SELECT GameID FROM Game WHERE GameID NOT IN "
+        "(SELECT GameID FROM PlayerGameStatistics WHERE PlayerID = %s) LIMIT 1", (player_id,))
+    return (game_id[0][0], player_id, 10, 5, 3, 1, 1, 2, 30, 2)
+
+
+def test_snapshot_reads_are_served_from_the_mapping(league, snap_path):
+    store = box_score_store(league, snapshot=snapshot.snapshot_watcher(snap_path))
+    store.load()
+    base = store._base
+    for array in [base.game_id, base.player_id] + base.stats:
+        assert not array.flags.owndata and not array.flags.writeable
+    assert store._size == 0
+
+
+def test_snapshot_store_matches_database_store(league, snap_path):
+    from_db = box_score_store(league)
+    from_db.load()
+    from_snap = box_score_store(league, snapshot=snapshot.snapshot_watcher(snap_path))
+    from_snap.load()
+
+    for player_id in _player_ids(league):
+        assert from_snap.game_log(player_id) == from_db.game_log(player_id)
+    rows = [np.column_stack(store.columns()).tolist() for store in (from_db, from_snap)]
+    assert sorted(rows[0]) == sorted(rows[1])
+
+
+def test_live_updates_copy_on_write(league, snap_path):
+    store = box_score_store(league, snapshot=snapshot.snapshot_watcher(snap_path))
+    store.load()
+    player_id = _player_ids(league)[0]
+    before = store.game_log(player_id)
+    mapped = store._base.stats[0].copy()
+
+    game_id = before[-1]["game_id"]
+    store.add_stat_deltas([(game_id, player_id, 3, 1, 0, 0, 0, 0, 2, 0)])
+    new_line = _new_line(league, player_id)
+    store.add_box_scores([new_line])
+
+    after = store.game_log(player_id)
+    assert len(after) == len(before) + 1
+    changed = next(entry for entry in after if entry["game_id"] == game_id)
+    original = next(entry for entry in before if entry["game_id"] == game_id)
+    assert changed["points"] == original["points"] + 3
+    assert changed["minutes_played"] == original["minutes_played"] + 2
+    added = next(entry for entry in after if entry["game_id"] == new_line[0])
+    assert added["points"] == 10 and added["date"] is not None
+    # the mapped columns are untouched
+    assert (store._base.stats[0] == mapped).all()
+
+
+def test_reads_swap_in_a_republished_snapshot(league, snap_path):
+    from advanced import advanced_engine
+
+    store = box_score_store(league, snapshot=snapshot.snapshot_watcher(snap_path,
+                                                                       check_interval=0))
+    store.load()
+    advanced = advanced_engine(store)
+    player_id = _player_ids(league)[0]
+    games = advanced.player(player_id)["games"]
+    first = store._base.snap
+
+    # logged before the next export: the new file has it
+    logged = _new_line(league, player_id)
+    league.log_box_scores([logged])
+    store.add_box_scores([logged])
+    advanced.touch([player_id])
+    snapshot.export(league, snap_path)
+    # live increment after the export: replayed on top of the new file
+    game_id = logged[0]
+    store.add_stat_deltas([(game_id, player_id, 4, 0, 0, 0, 0, 0, 0, 0)])
+    generation = store.generation
+
+    log = store.game_log(player_id)
+    assert store._base.snap is not first
+    assert store.generation > generation
+    assert store._size == 0
+    assert [entry["game_id"] for entry in log].count(game_id) == 1
+    assert next(entry for entry in log if entry["game_id"] == game_id)["points"] == 14
+    assert advanced.player(player_id)["games"] == games + 1
+
+
+# a league in a WAL database file, so writes can commit while an export
+# holds its read transaction open
+@pytest.fixture
+def file_league(tmp_path):
+    path = str(tmp_path / "league.db")
+    build_sqlite(path, **LEAGUE)
+    db = db_operations(backend=sqlite_backend(path), pool_size=3)
+    yield db
+    db.destructor()
+
+
+def test_live_deltas_around_an_export_count_once(file_league, tmp_path, monkeypatch):
+    db = file_league
+    snap_path = str(tmp_path / "league.snap")
+    snapshot.export(db, snap_path)
+    store = box_score_store(db, snapshot=snapshot.snapshot_watcher(snap_path, check_interval=0))
+    store.load()
+    live = live_scorer(db, on_box_scores=store.add_stat_deltas,
+                       on_flushed=store.deltas_flushed)
+    game_id, player_id = db.select_query(
+        "SELECT GameID, PlayerID FROM PlayerGameStatistics ORDER BY GameID LIMIT 1")[0]
+    points = next(entry["points"] for entry in store.game_log(player_id)
+                  if entry["game_id"] == game_id)
+
+    def add(n):
+        live.record([(game_id, player_id, n, 0, 0, 0, 0, 0, 0, 0)])
+
+    # committed before the export: in the file
+    add(1)
+    live.flush()
+    # recorded before the export, committed while it reads
+    add(10)
+    # recorded and committed while it reads
+    read_version = aggregates.read_version
+
+    def during_export(cursor):
+        version = read_version(cursor)
+        monkeypatch.undo()
+        add(100)
+        live.flush()
+        return version
+    monkeypatch.setattr(aggregates, "read_version", during_export)
+    snapshot.export(db, snap_path)
+    # recorded after the export, not committed yet
+    add(1000)
+
+    def current():
+        return next(entry["points"] for entry in store.game_log(player_id)
+                    if entry["game_id"] == game_id)
+    first = store._base.snap
+    assert current() == points + 1111
+    assert store._base.snap is not first
+    assert db.select_query_params(sql("box_score.stat.Points"), (game_id, player_id)) == [
+        (points + 111,)]
+
+    live.flush()
+    snapshot.export(db, snap_path)
+    assert current() == points + 1111
+    assert store._unflushed == {}
+
+
+def test_home_and_away_stay_with_the_team_played_for(league, tmp_path):
+    player_id = _player_ids(league)[0]
+    team_id, = league.select_query_params("SELECT TeamID FROM Player WHERE PlayerID = %s",
+                                          (player_id,))[0]
+    before = box_score_store(league)
+    before.load()
+    sides = {entry["game_id"]: entry["home"] for entry in before.game_log(player_id)}
+    assert set(sides.values()) <= {True, False}
+
+    # traded: the games already played stay on the old team's side
+    new_team, = league.select_query_params(
+        "SELECT TeamID FROM Team WHERE TeamID <> %s ORDER BY TeamID LIMIT 1", (team_id,))[0]
+    league.modify_query_params("UPDATE Player SET TeamID = %s WHERE PlayerID = %s",
+                               (new_team, player_id))
+    game_id = league.insert_query_params(
+        "INSERT INTO Game (Date, Location, HomeTeamID, AwayTeamID, HomeScore, AwayScore) "
+        "VALUES (%s, %s, %s, %s, %s, %s)", ("2030-01-01", "Test", team_id, new_team, 0, 0))
+    line = (game_id, player_id, 10, 5, 3, 1, 1, 2, 30, 2)
+    league.log_box_scores([line])
+    before.add_box_scores([line])
+
+    snap_path = str(tmp_path / "league.snap")
+    snapshot.export(league, snap_path)
+    from_db = box_score_store(league)
+    from_db.load()
+    from_snap = box_score_store(league, snapshot=snapshot.snapshot_watcher(snap_path))
+    from_snap.load()
+    for store in (before, from_db, from_snap):
+        log = {entry["game_id"]: entry for entry in store.game_log(player_id)}
+        assert {g: log[g]["home"] for g in sides} == sides
+        assert log[game_id]["home"] is False and log[game_id]["opponent_team_id"] == team_id
+
+
+def test_new_rows_are_looked_up_in_one_query_per_table(league, monkeypatch):
+    store = box_score_store(league)
+    store.load()
+    game_ids = [league.insert_query_params(
+        "INSERT INTO Game (Date, Location, HomeTeamID, AwayTeamID, HomeScore, AwayScore) "
+        "VALUES (%s, %s, %s, %s, %s, %s)", (f"2030-01-0{day}", "Test", 1, 2, 0, 0))
+        for day in range(1, 6)]
+    rows = [(game_id, player_id, 1, 1, 1, 0, 0, 0, 10, 1)
+            for game_id in game_ids for player_id in _player_ids(league)]
+    queries = []
+    select = league.select_query_params
+
+    def counted(query, params):
+        queries.append(query)
+        return select(query, params)
+    monkeypatch.setattr(league, "select_query_params", counted)
+
+    store.add_box_scores(rows)
+
+    assert len(queries) == 2
+    assert all(len(store.game_log(row[1])) for row in rows)
@@ -0,0 +1,18 @@
+# backend/tests/test_csv_parser.py
+
+import pytest
+
+from csv_parser import typed_parser
+
+
+def test_int_columns_take_whole_floats_and_blanks():
+    parser = typed_parser(["int", "int", "float"])
+    rows = parser.parse_rows([["5.0", "7", "1.5"], [" 12.00 ", "", "2"], ["-3.0", "1e2", ""]])
+    assert rows == [(5, 7, 1.5), (12, None, 2.0), (-3, 100, None)]
+    assert all(type(value) is int for row in rows for value in row[:2] if value is not None)
+
+
+@pytest.mark.parametrize("value", ["5.5", "0.1", "abc", "nan", "inf"])
+def test_int_columns_refuse_fractions_and_text(value):
+    with pytest.raises(ValueError):
+        typed_parser(["int"]).parse_rows([["1"], [value]])
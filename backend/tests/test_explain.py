@@ -0,0 +1,35 @@
+# backend/tests/test_explain.py
+
+import explain_check
+from queries import self_test
+
+
+def test_catalog_compiles(league):
+    assert self_test(league) == []
+
+
+def test_hot_queries_use_indexes(league):
+    assert explain_check.check(league) == []
+
+
+def test_check_flags_full_scans(league):
+    query = '''
+        SELECT * FROM Game
+        INNER JOIN Team AS home_team ON Game.HomeTeamID = home_team.TeamID
+        INNER JOIN Team AS away_team ON Game.AwayTeamID = away_team.TeamID
+        WHERE home_team.Name = %s OR away_team.Name = %s'''
+    assert "Game" in explain_check.full_scans(league, query, ("Lakers", "Lakers"))
+
+
+def test_games_by_team_covers_home_and_away(league):
+    name, team_id = league.select_query("SELECT Name, TeamID FROM Team ORDER BY TeamID")[0]
+    rows = league.select_query_params(explain_check.sql("game.by_team"), (name, name))
+    expected = league.select_query_params(
+        "SELECT GameID FROM Game WHERE HomeTeamID = %s OR AwayTeamID = %s", (team_id, team_id))
+    assert sorted(row[0] for row in rows) == sorted(row[0] for row in expected)
+
+
+def test_leaderboard_averages_are_ordered(league):
+    rows = league.select_query_params(explain_check.sql("leaders.avg.Points"), (5,))
+    averages = [row[2] for row in rows]
+    assert len(averages) == 5 and averages == sorted(averages, reverse=True)
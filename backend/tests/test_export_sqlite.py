@@ -0,0 +1,23 @@
+# backend/tests/test_export_sqlite.py
+
+import os
+import sqlite3
+
+import export_sqlite
+from backends import sqlite_backend
+from db_operations import db_operations
+
+
+def test_snapshot_is_left_in_rollback_journal_mode(league, tmp_path):
+    path = str(tmp_path / "leaderboard.db")
+    export_sqlite.export(league, path)
+
+    assert sorted(os.listdir(tmp_path)) == ["leaderboard.db"]
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+    reader = db_operations(backend=sqlite_backend(path, read_only=True), pool_size=1)
+    try:
+        count = "SELECT COUNT(*) FROM Player"
+        assert reader.select_query(count) == league.select_query(count)
+    finally:
+        reader.destructor()
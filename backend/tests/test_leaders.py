@@ -0,0 +1,18 @@
+# backend/tests/test_leaders.py
+
+import pytest
+
+from conftest import LEAGUE
+
+PLAYERS = LEAGUE["teams"] * LEAGUE["players_per_team"]
+
+
+@pytest.mark.parametrize("n, expected", [("0", 1), ("-5", 1), ("3", 3), ("9999", PLAYERS)])
+def test_top_players_n_is_clamped(client, n, expected):
+    response = client.get(f"/api/players/top/points?n={n}")
+    assert response.status_code == 200
+    assert len(response.get_json()) == expected
+
+
+def test_top_players_rejects_bad_min_games(client):
+    assert client.get("/api/players/top/points?min_games=x").status_code == 400
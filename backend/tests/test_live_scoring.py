@@ -0,0 +1,151 @@
+# backend/tests/test_live_scoring.py
+
+import threading
+
+import pytest
+
+import aggregates
+from live_scoring import live_scorer
+
+
+def _line(db, game_id, player_id):
+    return db.select_query_params(
+        "SELECT Points, Assists FROM PlayerGameStatistics WHERE GameID = %s AND PlayerID = %s",
+        (game_id, player_id))
+
+
+def _totals(db, player_id):
+    return db.select_query_params(
+        "SELECT GamesPlayed, Points, Assists FROM PlayerStatTotals WHERE PlayerID = %s",
+        (player_id,))[0]
+
+
+# (GameID, PlayerID) of an existing line, and a player without a line in that game
+def _keys(db):
+    game_id, player_id = db.select_query(
+        "SELECT GameID, PlayerID FROM PlayerGameStatistics ORDER BY GameID, PlayerID LIMIT 1")[0]
+    newcomer = db.select_query_params(
+        "SELECT PlayerID FROM Player WHERE PlayerID NOT IN "
+        "(SELECT PlayerID FROM PlayerGameStatistics WHERE GameID = %s) LIMIT 1", (game_id,))[0][0]
+    return game_id, player_id, newcomer
+
+
+def _event(game_id, player_id, points=0, assists=0):
+    return (game_id, player_id, points, 0, assists, 0, 0, 0, 0, 0)
+
+
+def test_flush_writes_coalesced_deltas_and_totals(league):
+    game_id, player_id, newcomer = _keys(league)
+    line, totals, newcomer_totals = (_line(league, game_id, player_id)[0],
+                                     _totals(league, player_id), _totals(league, newcomer))
+    seen = []
+    live = live_scorer(league, on_totals=seen.extend)
+
+    live.record([_event(game_id, player_id, points=2), _event(game_id, player_id, points=3),
+                 _event(game_id, player_id, assists=1), _event(game_id, newcomer, points=2)])
+    live.record([_event(game_id, player_id, points=-1)])
+    # nothing reaches the database before the flush
+    assert _line(league, game_id, player_id)[0] == line
+    assert _line(league, game_id, newcomer) == []
+    assert live.pending(game_id)[player_id]["Points"] == 4
+    # a player's first line of the game counts as a game played
+    assert [row[:3] for row in seen] == [(player_id, 0, 5), (newcomer, 1, 2), (player_id, 0, -1)]
+
+    assert live.flush() == 2
+    assert _line(league, game_id, player_id) == [(line[0] + 4, line[1] + 1)]
+    assert _line(league, game_id, newcomer) == [(2, 0)]
+    assert _totals(league, player_id) == (totals[0], totals[1] + 4, totals[2] + 1)
+    assert _totals(league, newcomer) == (newcomer_totals[0] + 1, newcomer_totals[1] + 2,
+                                         newcomer_totals[2])
+    assert aggregates.check(league) == []
+    assert live.pending(game_id) == {} and live.flush() == 0
+    assert live.stats()["rows_flushed"] == 2
+
+
+def test_failed_flush_keeps_the_deltas(league, monkeypatch):
+    game_id, player_id, _ = _keys(league)
+    line = _line(league, game_id, player_id)[0]
+    live = live_scorer(league)
+    live.record([_event(game_id, player_id, points=2)])
+
+    def fail(deltas):
+        raise RuntimeError("database went away")
+    monkeypatch.setattr(league, "add_box_score_deltas", fail)
+    with pytest.raises(RuntimeError):
+        live.flush()
+    live.record([_event(game_id, player_id, points=1)])
+    assert live.pending(game_id)[player_id]["Points"] == 3
+    assert live.stats()["flush_errors"] == 1
+
+    monkeypatch.undo()
+    assert live.flush() == 1
+    assert _line(league, game_id, player_id)[0] == (line[0] + 3, line[1])
+    assert aggregates.check(league) == []
+
+
+def test_events_for_unknown_games_or_players_record_nothing(league):
+    game_id, player_id, _ = _keys(league)
+    live = live_scorer(league)
+    with pytest.raises(ValueError, match="Unknown game"):
+        live.record([_event(999999, player_id, points=2)])
+    with pytest.raises(ValueError, match="Unknown player"):
+        live.record([_event(game_id, player_id, points=2), _event(game_id, 999999, points=2)])
+    assert live.pending(game_id) == {}
+    assert live.stats()["events"] == 0
+
+
+def test_each_game_flushes_on_its_own_and_failing_ones_are_parked(league, monkeypatch, caplog):
+    game_id, player_id, _ = _keys(league)
+    other_game = league.select_query_params(
+        "SELECT GameID FROM PlayerGameStatistics WHERE PlayerID = %s AND GameID <> %s LIMIT 1",
+        (player_id, game_id))[0][0]
+    line = _line(league, other_game, player_id)[0]
+    live = live_scorer(league, max_failures=2)
+    write = league.add_box_score_deltas
+
+    def fail_one_game(deltas):
+        if deltas[0][0] == game_id:
+            raise RuntimeError("bad row")
+        return write(deltas)
+    monkeypatch.setattr(league, "add_box_score_deltas", fail_one_game)
+
+    live.record([_event(game_id, player_id, points=2), _event(other_game, player_id, points=5)])
+    with pytest.raises(RuntimeError):
+        live.flush()
+    # the other game went through; the failing one waits for the next flush
+    assert _line(league, other_game, player_id)[0] == (line[0] + 5, line[1])
+    assert live.pending(game_id)[player_id]["Points"] == 2
+
+    with caplog.at_level("ERROR", logger="nba.live"), pytest.raises(RuntimeError):
+        live.flush()
+    assert "parked" in caplog.text
+    assert live.pending(game_id) == {}
+    assert live.parked() == {(game_id, player_id): dict.fromkeys(aggregates.STAT_COLUMNS, 0)
+                             | {"Points": 2}}
+    assert live.stats()["parked_rows"] == 1
+    assert live.flush() == 0
+    assert aggregates.check(league) == []
+
+
+def test_sync_holds_events_until_the_direct_write_is_done(league):
+    game_id, _, newcomer = _keys(league)
+    games = _totals(league, newcomer)[0]
+    seen = []
+    live = live_scorer(league, on_totals=seen.extend)
+    live.record([_event(game_id, _keys(league)[1], points=1)])
+
+    recorder = threading.Thread(target=live.record, args=([_event(game_id, newcomer, points=3)],))
+    with live.sync([game_id]):
+        recorder.start()
+        recorder.join(0.2)
+        # the event waits: the newcomer has no line yet
+        assert recorder.is_alive()
+        league.log_box_scores([_event(game_id, newcomer, points=10)])
+    recorder.join(5)
+
+    # the event saw the line written by the block: not a first line
+    assert seen[-1][:3] == (newcomer, 0, 3)
+    live.flush()
+    assert _line(league, game_id, newcomer) == [(13, 0)]
+    assert _totals(league, newcomer)[0] == games + 1
+    assert aggregates.check(league) == []
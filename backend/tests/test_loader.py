@@ -0,0 +1,40 @@
+# backend/tests/test_loader.py
+
+import pytest
+
+import aggregates
+from loader import load_csv
+
+
+def _quiet(message):
+    pass
+
+
+def test_box_scores_without_some_stat_columns_load(league, tmp_path):
+    game_id, player_id = league.select_query(
+        "SELECT Game.GameID, Player.PlayerID FROM Game, Player WHERE NOT EXISTS "
+        "(SELECT 1 FROM PlayerGameStatistics WHERE PlayerGameStatistics.GameID = Game.GameID "
+        "AND PlayerGameStatistics.PlayerID = Player.PlayerID) LIMIT 1")[0]
+    points, games = league.select_query_params(
+        "SELECT Points, GamesPlayed FROM PlayerStatTotals WHERE PlayerID = %s", (player_id,))[0]
+    path = tmp_path / "lines.csv"
+    path.write_text(f"{game_id},{player_id},17\n")
+
+    inserted, _ = load_csv(league, "PlayerGameStatistics", str(path),
+                           ["GameID", "PlayerID", "Points"], report=_quiet)
+
+    assert inserted == 1
+    assert league.select_query_params(
+        "SELECT Points, Rebounds FROM PlayerGameStatistics WHERE GameID = %s AND PlayerID = %s",
+        (game_id, player_id)) == [(17, None)]
+    assert league.select_query_params(
+        "SELECT Points, GamesPlayed FROM PlayerStatTotals WHERE PlayerID = %s",
+        (player_id,)) == [(points + 17, games + 1)]
+    assert aggregates.check(league) == []
+
+
+def test_box_scores_without_a_key_column_are_refused(league, tmp_path):
+    path = tmp_path / "lines.csv"
+    path.write_text("1,17\n")
+    with pytest.raises(ValueError, match="PlayerID"):
+        load_csv(league, "PlayerGameStatistics", str(path), ["GameID", "Points"], report=_quiet)
@@ -0,0 +1,87 @@
+# backend/tests/test_migrations.py
+
+import pytest
+
+import aggregates
+import migrations
+from synthetic_league import generate
+
+from conftest import LEAGUE
+
+
+# a database made by the old create_all_tables: league tables with box
+# scores, no SchemaVersion and no PlayerStatTotals
+def _legacy_db(db):
+    statements = migrations.MIGRATIONS[0][2]
+    with db.transaction() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    # generate() ends with a rebuild of the totals, which do not exist yet
+    with db.transaction() as cursor:
+        cursor.execute(aggregates.CREATE_TOTALS)
+    generate(db, **LEAGUE)
+    with db.transaction() as cursor:
+        cursor.execute("DROP TABLE PlayerStatTotals")
+
+
+def test_fresh_database_gets_every_migration(db):
+    assert migrations.applied_versions(db) == {m[0] for m in migrations.MIGRATIONS}
+    assert db.select_query("SELECT COUNT(*) FROM PlayerStatTotals") == [(0,)]
+
+
+def test_upgrade_backfills_totals_from_existing_box_scores(empty_db):
+    db = empty_db
+    _legacy_db(db)
+    box_scores = db.select_query("SELECT COUNT(*) FROM PlayerGameStatistics")[0][0]
+    assert box_scores > 0
+
+    migrations.migrate(db)
+
+    assert aggregates.check(db) == []
+    games = db.select_query("SELECT SUM(GamesPlayed) FROM PlayerStatTotals")[0][0]
+    assert games == box_scores
+
+
+def test_upgrade_then_box_score_counts_on_top_of_history(empty_db):
+    db = empty_db
+    _legacy_db(db)
+    migrations.migrate(db)
+    player_id, played = db.select_query(
+        "SELECT PlayerID, GamesPlayed FROM PlayerStatTotals ORDER BY PlayerID LIMIT 1")[0]
+    game_id = db.insert_query_params(
+        "INSERT INTO Game (Date, Location, HomeTeamID, AwayTeamID, HomeScore, AwayScore) "
+        "VALUES (%s, %s, %s, %s, %s, %s)", ("2024-06-01", "Test", 1, 2, 0, 0))
+
+    db.log_box_scores([(game_id, player_id, 10, 5, 3, 1, 1, 2, 30, 2)])
+
+    assert db.select_query_params("SELECT GamesPlayed FROM PlayerStatTotals WHERE PlayerID = %s",
+                                  (player_id,)) == [(played + 1,)]
+    assert aggregates.check(db) == []
+
+
+def test_migrate_is_idempotent(db):
+    before = db.select_query("SELECT Version FROM SchemaVersion ORDER BY Version")
+    migrations.migrate(db)
+    assert db.select_query("SELECT Version FROM SchemaVersion ORDER BY Version") == before
+
+
+@pytest.mark.parametrize("references, outcome", [
+    (migrations.TEAM_REFERENCES, "already present, recorded"),
+    (migrations.TEAM_REFERENCES - {("game", "awayteamid")}, "applied"),
+    (set(), "applied"),
+])
+def test_team_foreign_keys_are_stamped_only_when_there(empty_db, monkeypatch, capsys,
+                                                      references, outcome):
+    db = empty_db
+    _legacy_db(db)
+    # a MySQL database reporting those constraints; the ALTERs themselves
+    # cannot run on SQLite, so they are left out
+    monkeypatch.setattr(db.backend, "supports_alter_constraints", True)
+    monkeypatch.setattr(migrations, "_team_references", lambda db: references)
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        m[:2] + ([],) + m[3:] if m[0] == 2 else m for m in migrations.MIGRATIONS])
+    capsys.readouterr()
+
+    migrations.migrate(db)
+
+    assert f"Migration 2 (foreign keys to Team) {outcome}" in capsys.readouterr().out.splitlines()
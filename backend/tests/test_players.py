@@ -0,0 +1,64 @@
+# backend/tests/test_players.py
+
+import pytest
+
+
+def _player(db):
+    return db.select_query(
+        "SELECT PlayerID, Name, Height, Weight, Age, Position, TeamID FROM Player "
+        "ORDER BY PlayerID LIMIT 1")[0]
+
+
+def _row(db, player_id):
+    return db.select_query_params(
+        "SELECT PlayerID, Name, Height, Weight, Age, Position, TeamID FROM Player "
+        "WHERE PlayerID = %s", (player_id,))[0]
+
+
+@pytest.mark.parametrize("column, new_value", [
+    ("TeamID", "abc"), ("TeamID", 999999), ("Height", "tall"), ("Age", None),
+    ("Name", 42),
+])
+def test_bad_player_update_is_rejected_and_changes_nothing(app_module, client, column,
+                                                           new_value):
+    before = _player(app_module.db)
+    response = client.put("/api/player", json={"player_id": before[0], "column": column,
+                                               "new_value": new_value})
+    assert response.status_code == 400
+    assert response.get_json()["error"]
+    assert _row(app_module.db, before[0]) == before
+    # the player can still be updated
+    response = client.put("/api/player", json={"player_id": before[0], "column": "Age",
+                                               "new_value": str(before[4])})
+    assert response.status_code == 200
+
+
+def test_player_update_needs_a_known_player(client):
+    response = client.put("/api/player", json={"player_id": "x", "column": "Age",
+                                               "new_value": 30})
+    assert response.status_code == 400
+    response = client.put("/api/player", json={"player_id": 999999, "column": "Age",
+                                               "new_value": 30})
+    assert response.status_code == 404
+
+
+def test_player_team_update_stores_an_integer(app_module, client):
+    db = app_module.db
+    player = _player(db)
+    other = db.select_query_params("SELECT TeamID FROM Team WHERE TeamID <> %s LIMIT 1",
+                                   (player[6],))[0][0]
+    response = client.put("/api/player", json={"player_id": player[0], "column": "TeamID",
+                                               "new_value": str(other)})
+    assert response.status_code == 200
+    assert _row(db, player[0])[6] == other
+    assert client.put("/api/player", json={"player_id": player[0], "column": "TeamID",
+                                           "new_value": player[6]}).status_code == 200
+
+
+@pytest.mark.parametrize("view", ["gamelog", "splits", "advanced"])
+def test_game_views_of_an_unknown_player_are_not_found(app_module, client, view):
+    player_id = _player(app_module.db)[0]
+    assert client.get(f"/api/player/{player_id}/{view}").status_code == 200
+    response = client.get(f"/api/player/999999/{view}")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "No player 999999"}
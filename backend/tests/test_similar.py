@@ -0,0 +1,28 @@
+# backend/tests/test_similar.py
+
+import logging
+import time
+
+from similar import similarity_index
+
+
+class _failing_db():
+
+    def select_query(self, query):
+        raise RuntimeError("database went away")
+
+
+def test_failed_background_rebuild_is_logged(caplog):
+    index = similarity_index(_failing_db(), min_interval=3600)
+    with caplog.at_level(logging.ERROR, logger="nba.similar"):
+        index.start()
+        index.mark_stale()
+        deadline = time.monotonic() + 5
+        while not (caplog.records and index.stats()["stale"]) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    record = caplog.records[0]
+    assert record.name == "nba.similar"
+    assert "rebuild failed" in record.getMessage()
+    assert record.exc_info[0] is RuntimeError
+    # retried on the next round
+    assert index.stats()["stale"]
@@ -0,0 +1,50 @@
+# backend/tests/test_teams.py
+
+
+def _teams(db):
+    return db.select_query("SELECT TeamID, Name FROM Team ORDER BY TeamID LIMIT 2")
+
+
+def test_rosters_take_comma_separated_team_names(app_module, client):
+    (_, first), (second_id, second) = _teams(app_module.db)
+    repeated = client.get(f"/api/team/rosters?team_name={first}&team_name={second}")
+    joined = client.get(f"/api/team/rosters?team_name={first},{second}")
+    assert joined.status_code == repeated.status_code == 200
+    assert joined.get_json() == repeated.get_json()
+    assert set(joined.get_json()) == {first, second}
+    assert all(joined.get_json().values())
+
+    # the cached response is dropped when either team changes
+    response = client.post("/api/player", json={
+        "name": "Comma Rookie", "height": 80, "weight": 220, "age": 20,
+        "position": "SF", "team_id": second_id})
+    assert response.status_code == 201
+    roster = client.get(f"/api/team/rosters?team_name={first},{second}").get_json()[second]
+    assert "Comma Rookie" in [player["name"] for player in roster]
+
+
+def test_games_by_team_pages_through_home_and_away(app_module, client):
+    team_id = _teams(app_module.db)[0][0]
+    expected = [row[0] for row in app_module.db.select_query_params(
+        "SELECT GameID FROM Game WHERE HomeTeamID = %s OR AwayTeamID = %s ORDER BY GameID",
+        (team_id, team_id))]
+    seen, after = [], 0
+    while after is not None:
+        page = client.get(f"/api/games?team_id={team_id}&limit=4&after={after}").get_json()
+        seen += [game["game_id"] for game in page["items"]]
+        after = page["next_cursor"]
+    assert seen == expected
+    streamed = client.get(f"/api/games?team_id={team_id}&format=ndjson").get_data(as_text=True)
+    assert len(streamed.splitlines()) == len(expected)
+
+
+def test_game_between_unknown_teams_is_rejected(app_module, client):
+    team_id = _teams(app_module.db)[0][0]
+    before = app_module.db.select_query("SELECT COUNT(*) FROM Game")
+    for home, away in [(999999, team_id), (team_id, 999999)]:
+        response = client.post("/api/game", json={
+            "date": "2030-02-01", "location": "Nowhere",
+            "home_team_id": home, "away_team_id": away})
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "Unknown team 999999"
+    assert app_module.db.select_query("SELECT COUNT(*) FROM Game") == before
@@ -0,0 +1,62 @@
+# backend/tests/test_trades.py
+
+import pytest
+
+from trades import TradeError
+
+
+def _teams(db):
+    return dict(db.select_query("SELECT Name, TeamID FROM Team ORDER BY TeamID"))
+
+
+def _player_teams(db):
+    return dict(db.select_query("SELECT Name, TeamID FROM Player"))
+
+
+# one player of each team, in TeamID order
+def _one_per_team(db):
+    rows = db.select_query("SELECT TeamID, MIN(Name) FROM Player GROUP BY TeamID ORDER BY TeamID")
+    return [name for _, name in rows]
+
+
+def test_three_team_trade_moves_every_player(league):
+    names = list(_teams(league))
+    a, b, c = _one_per_team(league)[:3]
+    plan = league.trade([(a, names[1]), (b, names[2]), (c, names[0])])
+
+    teams, after = _teams(league), _player_teams(league)
+    assert [move["name"] for move in plan] == [a, b, c]
+    assert (after[a], after[b], after[c]) == (teams[names[1]], teams[names[2]], teams[names[0]])
+
+
+# (players, team names) -> a move the trade engine refuses
+BAD_MOVES = {
+    "unknown player": lambda players, names: ("Nobody Atall", names[1]),
+    "unknown team": lambda players, names: (players[1], "No Such Team"),
+    "already on the team": lambda players, names: (players[0], names[0]),
+}
+
+
+@pytest.mark.parametrize("bad_move", BAD_MOVES.values(), ids=BAD_MOVES.keys())
+def test_trade_with_a_bad_move_changes_nothing(league, bad_move):
+    names = list(_teams(league))
+    players = _one_per_team(league)
+    before = _player_teams(league)
+
+    with pytest.raises(TradeError):
+        league.trade([(players[2], names[3]), bad_move(players, names)])
+    assert _player_teams(league) == before
+
+
+def test_trade_route_is_all_or_nothing(app_module, client):
+    db = app_module.db
+    names = list(_teams(db))
+    players = _one_per_team(db)
+    before = _player_teams(db)
+
+    response = client.post("/api/trades", json={"moves": [
+        {"player": players[0], "to_team": names[1]},
+        {"player": "Nobody Atall", "to_team": names[2]}]})
+    assert response.status_code == 400
+    assert "Nobody Atall" in response.get_json()["error"]
+    assert _player_teams(db) == before
@@ -0,0 +1,39 @@
+# backend/tests/test_versions.py
+
+
+# a game and a player without a line in it
+def _free_line(db):
+    return db.select_query(
+        "SELECT Game.GameID, Player.PlayerID FROM Game, Player WHERE NOT EXISTS "
+        "(SELECT 1 FROM PlayerGameStatistics WHERE PlayerGameStatistics.GameID = Game.GameID "
+        "AND PlayerGameStatistics.PlayerID = Player.PlayerID) LIMIT 1")[0]
+
+
+def test_etag_revalidates_until_a_write_touches_the_tables(app_module, client):
+    game_id, player_id = _free_line(app_module.db)
+    url = f"/api/player/{player_id}/gamelog"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b""
+
+    # a write to a table the route does not read keeps the tag
+    response = client.post("/api/team", json={"name": "Expansion", "city": "Seattle",
+                                              "division": "Pacific", "conference": "West"})
+    assert response.status_code == 201
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    response = client.post(f"/api/games/{game_id}/boxscore",
+                           json=[{"player_id": player_id, "points": 21}])
+    assert response.status_code == 201
+
+    fresh = client.get(url, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert game_id in [entry["game_id"] for entry in fresh.get_json()]
+    assert client.get(url, headers={"If-None-Match": fresh.headers["ETag"]}).status_code == 304
@@ -0,0 +1,82 @@
+# backend/trades.py
+#
+# Trade engine. A trade is a list of moves (player name -> new team name)
+# and may involve any number of teams (A -> B, B -> C, C -> A). All names
+# are resolved with a single query and every team change is applied by a
+# single UPDATE, inside one transaction: the trade happens completely or
+# not at all, in a constant number of round trips whatever its size.
+
+
+# raised for trades that cannot be applied; nothing has been written
+class TradeError(Exception):
+    pass
+
+
+def _placeholders(values):
+    return ("%s,"*len(values))[:-1]
+
+
+# function resolves player and team names in one round trip.
+# returns ({player name: [(PlayerID, TeamID), ...]}, {team name: TeamID})
+def resolve_names(cursor, player_names, team_names):
+    query = f'''
+    SELECT 'P', PlayerID, Name, TeamID FROM Player WHERE Name IN ({_placeholders(player_names)})
+    UNION ALL
+    SELECT 'T', TeamID, Name, NULL FROM Team WHERE Name IN ({_placeholders(team_names)})
+    '''
+    cursor.execute(query, tuple(player_names) + tuple(team_names))
+    players, teams = {}, {}
+    for kind, row_id, name, team_id in cursor.fetchall():
+        if kind == 'P':
+            players.setdefault(name.lower(), []).append((row_id, team_id))
+        else:
+            teams[name.lower()] = row_id
+    return players, teams
+
+
+# function applies a trade atomically.
+# moves: list of (player name, new team name)
+# returns [{"player_id", "name", "from_team_id", "to_team_id"}]
+def execute_trade(db, moves):
+    if not moves:
+        raise TradeError("a trade needs at least one move")
+    player_names = [p for p, _ in moves]
+    lowered = [p.lower() for p in player_names]
+    if len(set(lowered)) != len(lowered):
+        raise TradeError("a player appears in more than one move")
+    team_names = sorted({t for _, t in moves})
+
+    with db.transaction() as cursor:
+        players, teams = resolve_names(cursor, player_names, team_names)
+
+        problems = []
+        plan = []
+        for player_name, team_name in moves:
+            matches = players.get(player_name.lower(), [])
+            to_team = teams.get(team_name.lower())
+            if not matches:
+                problems.append(f"Player '{player_name}' not found")
+            elif len(matches) > 1:
+                problems.append(f"Player name '{player_name}' is ambiguous")
+            if to_team is None:
+                problems.append(f"Team '{team_name}' not found")
+            if matches and len(matches) == 1 and to_team is not None:
+                player_id, from_team = matches[0]
+                if from_team == to_team:
+                    problems.append(f"Player '{player_name}' is already on '{team_name}'")
+                plan.append({"player_id": player_id, "name": player_name,
+                             "from_team_id": from_team, "to_team_id": to_team})
+        if problems:
+            raise TradeError("; ".join(problems))
+
+        cases = " ".join("WHEN %s THEN %s" for _ in plan)
+        params = [v for move in plan for v in (move["player_id"], move["to_team_id"])]
+        ids = [move["player_id"] for move in plan]
+        cursor.execute(f'''
+        UPDATE Player
+        SET TeamID = CASE PlayerID {cases} END
+        WHERE PlayerID IN ({_placeholders(ids)})''', tuple(params + ids))
+        if cursor.rowcount != len(plan):
+            # someone deleted a player between the lookup and the update
+            raise TradeError("players changed during the trade, nothing applied")
+    return plan
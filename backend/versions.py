@@ -0,0 +1,117 @@
+# backend/versions.py
+#
+# Per-table data-version counters and conditional GETs. Every write made
+# through db_operations (and the write routes that change in-memory
+# state directly, like live scoring) bumps the version of the tables it
+# touched. A read route declares the tables its response is built from;
+# its strong ETag hashes the route, its query args and those tables'
+# versions, so a client sending the ETag back in If-None-Match gets a
+# 304 before the view runs: no query, no serialization, no body.
+#
+# Counters live in this process only. Tags include a random epoch, so
+# they never match across restarts or between workers, and the current
+# max_age window, which bounds staleness for writes made by other
+# processes the way the response cache's TTL does.
+
+import hashlib
+import os
+import re
+import threading
+import time
+from functools import wraps
+
+from flask import Response, request
+
+from serialize import ENCODINGS
+
+# tables whose contents change along with another's, e.g. box-score
+# writes fold into PlayerStatTotals (aggregates.py)
+DERIVED = {"PlayerGameStatistics": ["PlayerStatTotals"]}
+
+_DML = re.compile(r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)"
+                  r"\s+`?(\w+)`?", re.IGNORECASE)
+_DDL = re.compile(r"^\s*(?:CREATE|ALTER|DROP|TRUNCATE)\b", re.IGNORECASE)
+
+
+class data_versions():
+
+    # max_age: seconds after which tags change even without local
+    # writes (0 disables the window)
+    def __init__(self, max_age=60):
+        self.max_age = max_age
+        self.epoch = os.urandom(8).hex()
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._all = 0               # bumped by schema changes, part of every tag
+        self._not_modified = 0
+
+    # function marks tables (and the tables derived from them) as changed
+    def bump(self, *tables):
+        with self._lock:
+            for table in tables:
+                for name in [table] + DERIVED.get(table, []):
+                    self._versions[name] = self._versions.get(name, 0) + 1
+
+    # function marks every table as changed, e.g. after migrations
+    def bump_all(self):
+        with self._lock:
+            self._all += 1
+
+    # function bumps the table a DML statement writes to; DDL changes
+    # every table. other statements are ignored
+    def changed(self, query):
+        match = _DML.match(query)
+        if match:
+            self.bump(match.group(1))
+        elif _DDL.match(query):
+            self.bump_all()
+
+    # function returns {table: version} for tables
+    def get(self, tables):
+        with self._lock:
+            return {table: self._versions.get(table, 0) for table in tables}
+
+    # function returns the strong ETag for tables' current versions and
+    # any further parts (route, args, ...)
+    def etag(self, tables, *parts):
+        with self._lock:
+            versions = [self._versions.get(table, 0) for table in tables]
+            everything = self._all
+        window = int(time.time() // self.max_age) if self.max_age else 0
+        key = repr((self.epoch, window, everything, versions) + parts)
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+    def stats(self):
+        with self._lock:
+            return {"tables": dict(self._versions), "schema": self._all,
+                    "not_modified": self._not_modified}
+
+    # decorator answering If-None-Match with 304 for a read view and
+    # adding the ETag to its 200 responses.
+    # tables: the tables the view's response is built from
+    # extra: callable() -> value also hashed into the tag, for state the
+    #   table versions do not capture (e.g. an index rebuilt later)
+    def conditional(self, *tables, extra=None):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                etag = self.etag(tables, request.path,
+                                 tuple(sorted(request.args.items(multi=True))),
+                                 extra() if extra is not None else None)
+                # compressed responses carry the tag of their encoding
+                matched = next((tag for tag in [etag] + [f"{etag}-{e}" for e in ENCODINGS]
+                                if request.if_none_match.contains_weak(tag)), None)
+                if matched is not None:
+                    with self._lock:
+                        self._not_modified += 1
+                    response = Response(status=304)
+                    response.set_etag(matched)
+                    return response
+                response = view(*args, **kwargs)
+                if isinstance(response, Response) and response.status_code == 200:
+                    response.set_etag(etag)
+                    # cache, but revalidate on every use
+                    response.headers["Cache-Control"] = "no-cache"
+                return response
+            return wrapper
+        return decorator
@@ -165,6 +165,21 @@ function App() {
       return await res.json()
     })
 
+  // leaders for points, assists and rebounds plus any rosters, in one request
+  const dashboard = () =>
+    handleRequest(async () => {
+      const teams = window.prompt('Team names for rosters (comma separated, optional)?') || ''
+      const params = new URLSearchParams()
+      teams
+        .split(',')
+        .map((t) => t.trim())
+        .filter(Boolean)
+        .forEach((t) => params.append('team_name', t))
+      const res = await fetch(`${API_BASE}/dashboard?${params}`)
+      if (!res.ok) throw new Error('Failed to get dashboard')
+      return await res.json()
+    })
+
   return (
     <>
       <h1 className='HeaderColor'>Select From the Following:</h1>
@@ -192,6 +207,8 @@ function App() {
           <button onClick={topAssists}>Top Ten Players for Assists</button>
           {/* This button just returns the names of the players */}
           <button onClick={topRebounds}>Top Ten Players for Rebounds</button>
+          {/* This button returns all three top ten lists and the chosen rosters */}
+          <button onClick={dashboard}>Dashboard</button>
         </ul>
       </div>
 